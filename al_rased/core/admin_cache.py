@@ -0,0 +1,104 @@
+"""
+Admin Directory - shared per-chat administrator cache.
+Fetches a chat's whole administrator list in one API call and answers
+membership checks as set lookups, instead of one get_chat_member /
+get_permissions round-trip per (chat, user) pair.
+
+Memory is bounded (LRU over chats) and entries expire after a TTL.
+ChatMemberUpdated events patch the cached set in place. An optional shared
+cache (core.cache.CacheManager) lets processes reuse each other's fetches.
+"""
+import logging
+
+from al_rased.core.cache import cache
+from al_rased.core.metrics import metrics
+from al_rased.core.ttl_cache import TTLCache
+
+ADMIN_CACHE_TTL = 300  # 5 minutes
+ADMIN_CACHE_FAILURE_TTL = 60  # Back off when the admin list can't be fetched
+ADMIN_CACHE_MAX_CHATS = 5000
+
+
+class AdminDirectory:
+    """LRU + TTL map of chat_id -> frozenset of admin user IDs."""
+
+    def __init__(self, ttl: int = ADMIN_CACHE_TTL, max_chats: int = ADMIN_CACHE_MAX_CHATS,
+                 failure_ttl: int = ADMIN_CACHE_FAILURE_TTL, shared=None):
+        self.shared = shared
+        self.failure_ttl = failure_ttl
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0, "failures": 0, "evictions": 0}
+        self._chats = TTLCache(ttl, max_chats, self.stats)
+
+    def __len__(self):
+        return len(self._chats)
+
+    def set_admins(self, chat_id: int, admin_ids, ttl: int = None):
+        """Store the full admin list for a chat."""
+        self._chats.set(chat_id, frozenset(admin_ids), ttl)
+
+    def update_member(self, chat_id: int, user_id: int, is_admin: bool):
+        """Apply a single promotion/demotion (from a ChatMemberUpdated event).
+
+        Only patches chats already cached; uncached chats are fetched on demand.
+        """
+        if self.shared is not None:
+            self.shared.discard("admin", chat_id)
+        self._chats.patch(chat_id, lambda admins: admins | {user_id} if is_admin else admins - {user_id})
+
+    def invalidate(self, chat_id: int):
+        self._chats.pop(chat_id)
+        if self.shared is not None:
+            self.shared.discard("admin", chat_id)
+
+    def peek(self, chat_id: int, user_id: int):
+        """Cached answer without fetching: True/False, or None if unknown."""
+        admins = self._chats.get(chat_id)
+        return None if admins is None else user_id in admins
+
+    async def get_admins(self, chat_id: int, fetch) -> frozenset:
+        """Return the admin set for a chat, calling `await fetch(chat_id)` on a miss.
+
+        Concurrent misses for the same chat share a single fetch.
+        """
+        return await self._chats.get_or_load(chat_id, lambda: self._load(chat_id, fetch))
+
+    async def _load(self, chat_id: int, fetch) -> tuple:
+        if self.shared is not None:
+            shared_admins = await self.shared.get("admin", chat_id)
+            if shared_admins is not None:
+                return frozenset(shared_admins), None
+
+        self.stats["fetches"] += 1
+        try:
+            admins = frozenset(await fetch(chat_id))
+        except Exception as e:
+            # Cache an empty list briefly so a failing chat isn't hammered
+            logging.warning(f"Failed to fetch admins for chat {chat_id}: {e}")
+            self.stats["failures"] += 1
+            return frozenset(), self.failure_ttl
+        if self.shared is not None:
+            await self.shared.set("admin", chat_id, sorted(admins))
+        return admins, None
+
+    async def is_admin(self, chat_id: int, user_id: int, fetch) -> bool:
+        return user_id in await self.get_admins(chat_id, fetch)
+
+
+# ==================== Bot API (python-telegram-bot) ====================
+
+async def fetch_bot_chat_admins(bot, chat_id: int) -> set:
+    """One get_chat_administrators call for the whole chat."""
+    with metrics.timer("telegram_api"):
+        members = await bot.get_chat_administrators(chat_id)
+    return {m.user.id for m in members}
+
+
+async def is_chat_admin(bot, chat_id: int, user_id: int) -> bool:
+    """Check admin status through the shared bot-side directory."""
+    return await admin_directory.is_admin(
+        chat_id, user_id, lambda cid: fetch_bot_chat_admins(bot, cid)
+    )
+
+
+# Singleton instance (bot process)
+admin_directory = AdminDirectory(shared=cache)
@@ -0,0 +1,207 @@
+"""
+Admission Control - load shedding and VIP priority under message floods.
+Tracks the inference backlog (messages waiting for or in a model slot) and
+a moving average of time-to-verdict. When either grows past its limit,
+work for non-VIP groups is shed in stages, cheapest loss first:
+
+1. skip_gray      - gray-zone samples are not forwarded for relabeling
+2. sample_ml      - low-risk groups only run the model for a sample of
+                    messages; the rest get the keyword rules alone
+3. keywords_only  - non-VIP groups get the keyword rules alone
+
+Keyword rules always run. Groups with is_vip in managed_groups are never
+shed and take free model slots before anyone else. Every shed decision is
+counted in metrics ("shed", by stage).
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from al_rased.core.metrics import metrics
+from al_rased.core.update_processor import MAX_CONCURRENT_UPDATES
+
+MAX_CONCURRENT_INFERENCE = int(os.getenv("MAX_CONCURRENT_INFERENCE", "32"))
+# Backlog of stage 1 (x4, x16 for 2, 3); 0 disables shedding. The bot never has
+# more than MAX_CONCURRENT_UPDATES messages in flight, so stage 1 must start below that
+SHED_BACKLOG = min(int(os.getenv("SHED_BACKLOG", "64")), max(1, MAX_CONCURRENT_UPDATES // 2))
+LATENCY_TARGET = float(os.getenv("INFERENCE_LATENCY_TARGET", "0.5"))  # Seconds (x2, x4 for stages 2, 3)
+LOW_RISK_SAMPLE_RATE = float(os.getenv("LOW_RISK_SAMPLE_RATE", "0.25"))
+
+LATENCY_ALPHA = 0.2           # Weight of the newest time-to-verdict in the moving average
+LATENCY_STALE_SECONDS = 5.0   # No verdicts for this long: the latency signal no longer counts
+RISK_ALPHA = 0.05             # Weight of the newest message in a group's violation rate
+LOW_RISK_MAX_RATE = 0.02      # Groups below this violation rate count as low-risk
+MAX_TRACKED_CHATS = 5000      # Per-group violation rates kept (least recent dropped)
+VIP_REFRESH_SECONDS = 60
+
+NORMAL, SKIP_GRAY, SAMPLE_ML, KEYWORDS_ONLY = range(4)
+LEVELS = ("normal", "skip_gray", "sample_ml", "keywords_only")
+STAGE_FACTORS = {"backlog": (1, 4, 16), "latency": (1, 2, 4)}
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_INFERENCE, shed_backlog: int = SHED_BACKLOG,
+                 latency_target: float = LATENCY_TARGET, sample_rate: float = LOW_RISK_SAMPLE_RATE,
+                 rng=random.random):
+        self.max_concurrent = max_concurrent
+        self.shed_backlog = shed_backlog
+        self.latency_target = latency_target
+        self.sample_rate = sample_rate
+        self._rng = rng
+        self._running = 0
+        self._waiters = {True: deque(), False: deque()}  # vip -> futures waiting for a slot
+        self._latency = 0.0
+        self._latency_at = 0.0
+        self._risk = OrderedDict()  # chat_id -> moving violation rate (LRU-bounded)
+        self._vip_chats = set()
+        self._vip_loaded_at = None
+        self._vip_loading = False
+        self.stats = {"admitted": 0, "shed": 0, "max_backlog": 0}
+
+    # ==================== Load Signals ====================
+
+    @property
+    def backlog(self) -> int:
+        return self._running + len(self._waiters[True]) + len(self._waiters[False])
+
+    @property
+    def latency(self) -> float:
+        """Moving average time-to-verdict (0 once no verdict came for a while)."""
+        if time.monotonic() - self._latency_at > LATENCY_STALE_SECONDS:
+            return 0.0
+        return self._latency
+
+    def level(self) -> int:
+        if self.shed_backlog <= 0:
+            return NORMAL
+        backlog, latency = self.backlog, self.latency
+        by_backlog = sum(1 for f in STAGE_FACTORS["backlog"] if backlog >= self.shed_backlog * f)
+        by_latency = sum(1 for f in STAGE_FACTORS["latency"] if latency >= self.latency_target * f)
+        return max(by_backlog, by_latency)
+
+    def observe_latency(self, seconds: float):
+        if time.monotonic() - self._latency_at > LATENCY_STALE_SECONDS:
+            self._latency = seconds
+        else:
+            self._latency += LATENCY_ALPHA * (seconds - self._latency)
+        self._latency_at = time.monotonic()
+
+    # ==================== Group Risk ====================
+
+    def record(self, chat_id: int, violation: bool):
+        """Feed a verdict into the group's violation rate."""
+        rate = self._risk.pop(chat_id, 0.0)
+        self._risk[chat_id] = rate + RISK_ALPHA * ((1.0 if violation else 0.0) - rate)
+        if len(self._risk) > MAX_TRACKED_CHATS:
+            self._risk.popitem(last=False)
+
+    def is_low_risk(self, chat_id: int) -> bool:
+        return self._risk.get(chat_id, 0.0) < LOW_RISK_MAX_RATE
+
+    async def is_vip(self, chat_id: int) -> bool:
+        """VIP status from managed_groups, reloaded every VIP_REFRESH_SECONDS
+        (concurrent callers use the current set while one reload runs)."""
+        stale = self._vip_loaded_at is None or time.monotonic() - self._vip_loaded_at > VIP_REFRESH_SECONDS
+        if stale and not self._vip_loading:
+            self._vip_loading = True
+            try:
+                await self._load_vip()
+            finally:
+                self._vip_loading = False
+        return chat_id in self._vip_chats
+
+    async def _load_vip(self):
+        try:
+            from al_rased.core.database import get_all_managed_groups
+            groups = await get_all_managed_groups()
+            self._vip_chats = {g["group_id"] for g in groups if g["is_vip"]}
+        except Exception as e:
+            logging.warning(f"Admission: could not load VIP groups: {e}")
+        self._vip_loaded_at = time.monotonic()
+
+    def forget_vip(self):
+        """Reload VIP groups on the next message (after a VIP change)."""
+        self._vip_loaded_at = None
+
+    # ==================== Decisions ====================
+
+    def shed(self, stage: str):
+        self.stats["shed"] += 1
+        metrics.inc("shed", stage)
+
+    def admit(self, chat_id: int, vip: bool = False) -> str | None:
+        """Whether this message may run the model: None for full processing,
+        otherwise the stage that shed it (the caller runs keyword rules only)."""
+        level = NORMAL if vip else self.level()
+        if level >= KEYWORDS_ONLY:
+            self.shed(LEVELS[KEYWORDS_ONLY])
+            return LEVELS[KEYWORDS_ONLY]
+        if level >= SAMPLE_ML and self.is_low_risk(chat_id) and self._rng() >= self.sample_rate:
+            self.shed(LEVELS[SAMPLE_ML])
+            return LEVELS[SAMPLE_ML]
+        self.stats["admitted"] += 1
+        return None
+
+    def forward_gray(self, vip: bool = False) -> bool:
+        """Whether a gray-zone sample may be forwarded for relabeling."""
+        if vip or self.level() < SKIP_GRAY:
+            return True
+        self.shed(LEVELS[SKIP_GRAY])
+        return False
+
+    # ==================== Model Slots ====================
+
+    @asynccontextmanager
+    async def slot(self, vip: bool = False):
+        """Hold one of max_concurrent model slots; VIP messages are served
+        first. Time from here to release feeds the latency signal."""
+        start = time.perf_counter()
+        await self._acquire(vip)
+        try:
+            yield
+        finally:
+            self._release()
+            self.observe_latency(time.perf_counter() - start)
+
+    async def _acquire(self, vip: bool):
+        if self._running < self.max_concurrent and not self._waiters[True] and not self._waiters[False]:
+            self._running += 1
+            return
+        queue = self._waiters[vip]
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        self.stats["max_backlog"] = max(self.stats["max_backlog"], self.backlog)
+        try:
+            await future  # The slot is handed over by _release
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # Handed over as we were cancelled: pass it on
+            elif future in queue:
+                queue.remove(future)
+            raise
+
+    def _release(self):
+        for queue in (self._waiters[True], self._waiters[False]):
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self._running -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "level": LEVELS[self.level()],
+            "backlog": self.backlog,
+            "latency": self.latency,
+            "vip_groups": len(self._vip_chats),
+        }
+
+
+# Singleton instance (one per process: bot or monitor)
+admission = AdmissionController()
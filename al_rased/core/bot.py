@@ -1,23 +1,56 @@
+import asyncio
 import os
 import logging
 from telegram.ext import ApplicationBuilder, Application
+from al_rased.core.startup import startup
 from .database import init_db
 from .cache import cache
+from al_rased.core.outbox import outbox, TokenBucket, GLOBAL_RATE, GLOBAL_BURST
+from al_rased.core.delete_scheduler import delete_scheduler
+from al_rased.core.update_processor import ChatOrderedUpdateProcessor
+from al_rased.core.metrics import metrics, MetricsServer, METRICS_PORT
+from al_rased.features.detection.inference_pool import inference_pool
 
 # Import feature handlers (to be implemented)
-from features.admin import register_admin_handlers
-from features.review_flow import register_review_handlers
-from features.detection import register_feature as register_detection_handlers
-from features.developer import register_developer_handlers
-from features.group_settings import register_group_settings_handlers
-from features.activation import register_activation_handlers
+with startup.importing("features"):
+    from features.admin import register_admin_handlers
+    from features.review_flow import register_review_handlers
+    from features.detection import register_feature as register_detection_handlers
+    from features.developer import register_developer_handlers
+    from features.group_settings import register_group_settings_handlers
+    from features.activation import register_activation_handlers
 
 async def post_init(application: Application):
     await init_db()
     await cache.connect()
+    owns = None
+    metrics_port = METRICS_PORT
+    shard = application.bot_data.get("shard")  # (index, count) in webhook worker processes
+    if shard:
+        metrics_port = METRICS_PORT + 2 + shard[0]  # +1 is the Telethon monitor
+        from .webhook import shard_owner
+        owns = shard_owner(*shard)
+        # The bot-wide send limit is split between the worker processes
+        outbox.global_bucket = TokenBucket(GLOBAL_RATE / shard[1], max(1.0, GLOBAL_BURST / shard[1]))
+    await outbox.start(application.bot)
+    await delete_scheduler.start(application.bot, owns=owns)  # Resumes pending auto-deletes
+    await inference_pool.start()
+    # Model load + dummy inference in the background; handlers already serve
+    application.bot_data["warm_up"] = asyncio.create_task(inference_pool.warm_up())
+    application.bot_data["metrics_server"] = MetricsServer(metrics, port=metrics_port)
+    await application.bot_data["metrics_server"].start()
+    startup.mark("post_init")
     logging.info("Bot components initialized.")
 
 async def post_shutdown(application: Application):
+    warm_up = application.bot_data.get("warm_up")
+    if warm_up and not warm_up.done():
+        warm_up.cancel()
+    if "metrics_server" in application.bot_data:
+        await application.bot_data["metrics_server"].stop()
+    await inference_pool.stop()
+    await delete_scheduler.stop()
+    await outbox.stop()
     await cache.close()
     logging.info("Bot components shut down.")
 
@@ -26,7 +59,14 @@ def create_app() -> Application:
     if not token:
         raise ValueError("BOT_TOKEN environment variable is not set.")
 
-    app = ApplicationBuilder().token(token).post_init(post_init).post_shutdown(post_shutdown).build()
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(ChatOrderedUpdateProcessor())  # Chats in parallel, ordered within a chat
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Register handlers here
     register_developer_handlers(app)  # Developer menu first (priority)
@@ -35,5 +75,6 @@ def create_app() -> Application:
     register_admin_handlers(app)
     register_review_handlers(app)
     register_detection_handlers(app)
+    startup.mark("handlers_registered")
     
     return app
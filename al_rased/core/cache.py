@@ -1,37 +1,177 @@
-import redis.asyncio as redis
-import os
+"""
+Cache Manager - two-tier cache for the bot's and monitor's hot paths.
+L1 is an in-process LRU; L2 is Redis, shared across processes (bot, webhook
+workers, Telethon monitor) and restarts.
+Values are JSON-encoded and grouped by namespace, each with its own TTL
+(model verdicts, admin lists, chat metadata).
+
+Multi-key reads use MGET and multi-key writes a single pipeline. If Redis
+is unreachable the cache keeps working on L1 alone and retries Redis
+after a short back-off.
+"""
+import asyncio
+import json
 import logging
+import os
+import time
+
+from al_rased.core.ttl_cache import TTLCache
+
+
+# Namespace -> TTL in seconds
+NAMESPACE_TTLS = {
+    "verdict": 600,     # Model output per message text (keyed by model/keyword version)
+    "admin": 300,       # Admin user IDs per chat
+    "chat": 86400,      # Chat metadata (linked channel, title, type)
+}
+DEFAULT_TTL = 300
+L1_MAX_ITEMS = 20000
+REDIS_RETRY_AFTER = 30  # Seconds to stay on L1 only after a Redis error
+
 
 class CacheManager:
-    def __init__(self):
-        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    def __init__(self, redis_url: str = None, l1_max_items: int = L1_MAX_ITEMS,
+                 namespace_ttls: dict = None):
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379")
         self.client = None
+        self.l1_max_items = l1_max_items
+        self.namespace_ttls = {**NAMESPACE_TTLS, **(namespace_ttls or {})}
+        self._redis_down_until = 0
+        self._tasks = set()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "redis_errors": 0, "evictions": 0}
+        self._l1 = TTLCache(DEFAULT_TTL, l1_max_items, self.stats)  # "ns:key" -> value
 
-    async def connect(self):
-        self.client = redis.from_url(self.redis_url, decode_responses=True)
+    async def connect(self, client=None):
+        """Connect to Redis (or use an injected client, e.g. a fake in tests)."""
+        if client is None:
+            import redis.asyncio as redis  # Deferred: only needed once post_init connects
+            client = redis.from_url(self.redis_url, decode_responses=True)
+        self.client = client
         try:
             await self.client.ping()
             logging.info("Connected to Redis.")
         except Exception as e:
             logging.error(f"Failed to connect to Redis: {e}")
+            self._mark_redis_down()
 
     async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
         if self.client:
             await self.client.close()
 
+    # ==================== Helpers ====================
+
+    def ttl_for(self, namespace: str) -> int:
+        return self.namespace_ttls.get(namespace, DEFAULT_TTL)
+
+    @staticmethod
+    def _key(namespace: str, key) -> str:
+        return f"{namespace}:{key}"
+
+    @property
+    def redis_available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._redis_down_until
+
+    def _mark_redis_down(self):
+        self.stats["redis_errors"] += 1
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    # ==================== Namespaced API ====================
+
+    async def get(self, namespace: str, key):
+        """Return a cached value or None."""
+        return (await self.get_many(namespace, [key])).get(key)
+
+    async def get_many(self, namespace: str, keys: list) -> dict:
+        """Return {key: value} for the keys found; L1 first, then one MGET."""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._l1.get(self._key(namespace, key))
+            if value is not None:
+                found[key] = value
+                self.stats["l1_hits"] += 1
+            else:
+                missing.append(key)
+
+        if missing and self.redis_available:
+            try:
+                raw = await self.client.mget([self._key(namespace, k) for k in missing])
+            except Exception as e:
+                logging.error(f"Redis get error: {e}")
+                self._mark_redis_down()
+                raw = [None] * len(missing)
+            ttl = self.ttl_for(namespace)
+            for key, data in zip(missing, raw):
+                if data is None:
+                    continue
+                value = json.loads(data)
+                found[key] = value
+                self._l1.set(self._key(namespace, key), value, ttl)
+                self.stats["l2_hits"] += 1
+
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    async def set(self, namespace: str, key, value, ttl: int = None):
+        await self.set_many(namespace, {key: value}, ttl)
+
+    async def set_many(self, namespace: str, mapping: dict, ttl: int = None):
+        """Store values in L1 and write them to Redis in one pipeline."""
+        ttl = self.ttl_for(namespace) if ttl is None else ttl
+        for key, value in mapping.items():
+            self._l1.set(self._key(namespace, key), value, ttl)
+
+        if mapping and self.redis_available:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for key, value in mapping.items():
+                    pipe.set(self._key(namespace, key), json.dumps(value, ensure_ascii=False), ex=ttl)
+                await pipe.execute()
+            except Exception as e:
+                logging.error(f"Redis set error: {e}")
+                self._mark_redis_down()
+
+    async def delete(self, namespace: str, key):
+        full_key = self._key(namespace, key)
+        self._l1.pop(full_key)
+        if self.redis_available:
+            try:
+                await self.client.delete(full_key)
+            except Exception as e:
+                logging.error(f"Redis delete error: {e}")
+                self._mark_redis_down()
+
+    def discard(self, namespace: str, key):
+        """Synchronous delete: L1 now, Redis in the background."""
+        self._l1.pop(self._key(namespace, key))
+        if not self.redis_available:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.delete(namespace, key))
+        except RuntimeError:
+            return  # No loop (sync caller outside the bot); L2 entry expires by TTL
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ==================== Raw string API ====================
+
     async def set_value(self, key: str, value: str, ex: int = None):
-        if self.client:
+        if self.redis_available:
             try:
                 await self.client.set(key, value, ex=ex)
             except Exception as e:
                 logging.error(f"Redis set error: {e}")
+                self._mark_redis_down()
 
     async def get_value(self, key: str):
-        if self.client:
+        if self.redis_available:
             try:
                 return await self.client.get(key)
             except Exception as e:
                 logging.error(f"Redis get error: {e}")
+                self._mark_redis_down()
         return None
 
 # Singleton instance
@@ -0,0 +1,89 @@
+"""
+Chat Metadata Cache - per-chat info fetched lazily with get_chat.
+Keeps the linked channel ID, title, type and forum flag so hot paths
+(e.g. skipping linked-channel posts in monitor_messages) cost one API call
+per chat per day instead of one per message.
+
+Entries are invalidated on chat migration and patched on title changes.
+An optional shared cache (core.cache.CacheManager) keeps them across restarts.
+"""
+import logging
+
+from al_rased.core.cache import cache
+from al_rased.core.metrics import metrics
+from al_rased.core.ttl_cache import TTLCache
+
+CHAT_CACHE_TTL = 86400  # 1 day
+CHAT_CACHE_FAILURE_TTL = 300
+CHAT_CACHE_MAX_CHATS = 5000
+
+
+class ChatMetadataCache:
+    """LRU + TTL map of chat_id -> metadata dict."""
+
+    def __init__(self, ttl: int = CHAT_CACHE_TTL, max_chats: int = CHAT_CACHE_MAX_CHATS,
+                 failure_ttl: int = CHAT_CACHE_FAILURE_TTL, shared=None):
+        self.shared = shared
+        self.failure_ttl = failure_ttl
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0, "failures": 0, "evictions": 0}
+        self._chats = TTLCache(ttl, max_chats, self.stats)
+
+    def __len__(self):
+        return len(self._chats)
+
+    @staticmethod
+    def from_chat(chat) -> dict:
+        """Extract the fields we keep from a telegram Chat / ChatFullInfo."""
+        return {
+            "linked_chat_id": getattr(chat, "linked_chat_id", None),
+            "title": getattr(chat, "title", None),
+            "type": getattr(chat, "type", None),
+            "is_forum": bool(getattr(chat, "is_forum", False)),
+        }
+
+    def peek(self, chat_id: int):
+        return self._chats.get(chat_id)
+
+    def set(self, chat_id: int, metadata: dict, ttl: int = None):
+        self._chats.set(chat_id, metadata, ttl)
+
+    def update_title(self, chat_id: int, title: str):
+        self._chats.patch(chat_id, lambda metadata: {**metadata, "title": title})
+        if self.shared is not None:
+            self.shared.discard("chat", chat_id)
+
+    def invalidate(self, chat_id: int):
+        self._chats.pop(chat_id)
+        if self.shared is not None:
+            self.shared.discard("chat", chat_id)
+
+    async def get(self, bot, chat_id: int) -> dict:
+        """Return metadata for a chat, calling bot.get_chat once on a miss.
+
+        On failure an empty-metadata entry is cached briefly; callers treat
+        missing fields the same way they treated a failed get_chat.
+        """
+        return await self._chats.get_or_load(chat_id, lambda: self._load(bot, chat_id))
+
+    async def _load(self, bot, chat_id: int) -> tuple:
+        if self.shared is not None:
+            metadata = await self.shared.get("chat", chat_id)
+            if metadata is not None:
+                return metadata, None
+
+        self.stats["fetches"] += 1
+        try:
+            with metrics.timer("telegram_api"):
+                chat = await bot.get_chat(chat_id)
+        except Exception as e:
+            logging.warning(f"Failed to fetch chat info for {chat_id}: {e}")
+            self.stats["failures"] += 1
+            return self.from_chat(None), self.failure_ttl
+        metadata = self.from_chat(chat)
+        if self.shared is not None:
+            await self.shared.set("chat", chat_id, metadata)
+        return metadata, None
+
+
+# Singleton instance (bot process)
+chat_metadata = ChatMetadataCache(shared=cache)
@@ -98,6 +98,18 @@ async def init_db():
             )
         """)
         
+        # Table for pending auto-deletions (survives restarts)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_deletions (
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                due_at REAL NOT NULL, -- unix timestamp
+                PRIMARY KEY (chat_id, message_id)
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scheduled_deletions_due ON scheduled_deletions (due_at)"
+        )
         
         # Insert default mode (dry_run) if not exists
         await db.execute("INSERT OR IGNORE INTO bot_settings (key, value) VALUES ('mode', 'dry_run')")
@@ -430,6 +442,37 @@ async def set_notification_delete_time(group_id: int, category: str, seconds: in
         )
         await db.commit()
 
+# ==================== Scheduled Deletions ====================
+
+async def add_scheduled_deletion(chat_id: int, message_id: int, due_at: float):
+    """Persist a message deletion due at `due_at` (unix time)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            "INSERT OR REPLACE INTO scheduled_deletions (chat_id, message_id, due_at) VALUES (?, ?, ?)",
+            (chat_id, message_id, due_at)
+        )
+        await db.commit()
+
+async def get_pending_deletions() -> list:
+    """Get all pending deletions as (due_at, chat_id, message_id), oldest first."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT due_at, chat_id, message_id FROM scheduled_deletions ORDER BY due_at"
+        )
+        rows = await cursor.fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+async def remove_scheduled_deletions(items: list):
+    """Remove completed deletions given as (chat_id, message_id) pairs."""
+    if not items:
+        return
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(
+            "DELETE FROM scheduled_deletions WHERE chat_id = ? AND message_id = ?",
+            items
+        )
+        await db.commit()
+
 # ==================== Bot Mode Settings ====================
 
 async def get_bot_mode() -> str:
@@ -0,0 +1,179 @@
+"""
+Delete Scheduler - persistent auto-delete for warning messages.
+Replaces one sleeping asyncio task per warning with a SQLite-backed queue
+and a single consumer that sleeps until the next due item. Due deletions
+are grouped per chat and sent with delete_messages (up to 100 IDs per call).
+Pending jobs are reloaded at startup, so restarts don't lose them.
+Deletions that fail on a network error or flood limit keep their row and
+are retried with back-off; permanent errors (already deleted, too old)
+drop them.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from al_rased.core.database import (
+    add_scheduled_deletion,
+    get_pending_deletions,
+    remove_scheduled_deletions
+)
+from al_rased.core.outbox import _seconds
+
+DELETE_BATCH_SIZE = 100  # Bot API limit for delete_messages
+MAX_DUE_PER_TICK = 1000
+RETRY_DELAY = 5  # Seconds before the first retry (doubles per attempt)
+MAX_RETRIES = 5
+
+
+class DeleteScheduler:
+    def __init__(self):
+        self.bot = None
+        self._heap = []  # (due_at, chat_id, message_id)
+        self._wakeup = None
+        self._worker = None
+        self._attempts = {}  # (chat_id, message_id) -> failed attempts so far
+        self.stats = {"scheduled": 0, "deleted": 0, "failed": 0, "retried": 0, "api_calls": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def pending_count(self) -> int:
+        return len(self._heap)
+
+    async def start(self, bot, owns=None):
+        """Resume persisted jobs and start the consumer (call from post_init).
+
+        `owns(chat_id)` limits resumed jobs to this process's chats when
+        updates are sharded across worker processes.
+        """
+        self.bot = bot
+        if self.running:
+            return
+        self._heap = [
+            item for item in await get_pending_deletions()
+            if owns is None or owns(item[1])
+        ]
+        heapq.heapify(self._heap)
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+        logging.info(f"Delete scheduler started ({len(self._heap)} pending deletions resumed).")
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        # Rows stay in the database and are resumed on next start
+
+    async def schedule(self, chat_id: int, message_id: int, delay: float):
+        """Delete `message_id` in `chat_id` after `delay` seconds."""
+        due_at = time.time() + delay
+        await add_scheduled_deletion(chat_id, message_id, due_at)
+        self.stats["scheduled"] += 1
+        if not self.running:
+            return  # Persisted; picked up when the scheduler starts
+        is_next = not self._heap or due_at < self._heap[0][0]
+        heapq.heappush(self._heap, (due_at, chat_id, message_id))
+        if is_next:
+            self._wakeup.set()
+
+    def _pop_due(self, now: float) -> dict:
+        """Pop due items grouped per chat: {chat_id: [message_id, ...]}."""
+        due = defaultdict(list)
+        count = 0
+        while self._heap and self._heap[0][0] <= now and count < MAX_DUE_PER_TICK:
+            _, chat_id, message_id = heapq.heappop(self._heap)
+            due[chat_id].append(message_id)
+            count += 1
+        return due
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            wait = self._heap[0][0] - time.time()
+            if wait > 0:
+                # Sleep until the next item is due, or until an earlier one is added
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self._pop_due(time.time())
+            done = []
+            for chat_id, message_ids in due.items():
+                retry, retry_after = await self._delete_chat_messages(chat_id, message_ids)
+                done.extend((chat_id, mid) for mid in message_ids if mid not in retry)
+                done.extend(await self._reschedule(chat_id, retry, retry_after))
+            for key in done:
+                self._attempts.pop(key, None)
+            try:
+                await remove_scheduled_deletions(done)
+            except Exception as e:
+                logging.error(f"Failed to clear scheduled deletions: {e}")
+
+    async def _delete_chat_messages(self, chat_id: int, message_ids: list) -> tuple:
+        """Delete messages in batches. Returns (IDs to retry, minimum delay)."""
+        retry, retry_after = set(), 0.0
+        for i in range(0, len(message_ids), DELETE_BATCH_SIZE):
+            batch = message_ids[i:i + DELETE_BATCH_SIZE]
+            self.stats["api_calls"] += 1
+            try:
+                if len(batch) == 1:
+                    await self.bot.delete_message(chat_id, batch[0])
+                else:
+                    await self.bot.delete_messages(chat_id, batch)
+                self.stats["deleted"] += len(batch)
+            except (BadRequest, Forbidden) as e:
+                # Messages might already be deleted or too old (48h limit)
+                self.stats["failed"] += len(batch)
+                logging.debug(f"Auto-delete failed in chat {chat_id}: {e}")
+            except RetryAfter as e:
+                retry.update(batch)
+                retry_after = max(retry_after, _seconds(e.retry_after))
+            except (TimedOut, NetworkError) as e:
+                retry.update(batch)
+                logging.warning(f"Auto-delete in chat {chat_id} failed ({e}), retrying")
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logging.debug(f"Auto-delete failed in chat {chat_id}: {e}")
+        return retry, retry_after
+
+    async def _reschedule(self, chat_id: int, message_ids, retry_after: float = 0.0) -> list:
+        """Push transient failures back with back-off (their rows stay and get
+        the new due time). Returns the items that ran out of retries."""
+        given_up = []
+        for message_id in message_ids:
+            key = (chat_id, message_id)
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts > MAX_RETRIES:
+                self.stats["failed"] += 1
+                given_up.append(key)
+                continue
+            self._attempts[key] = attempts
+            self.stats["retried"] += 1
+            due_at = time.time() + max(RETRY_DELAY * 2 ** (attempts - 1), retry_after)
+            heapq.heappush(self._heap, (due_at, chat_id, message_id))
+            try:
+                await add_scheduled_deletion(chat_id, message_id, due_at)
+            except Exception as e:
+                logging.error(f"Failed to reschedule deletion: {e}")
+        return given_up
+
+
+# Singleton instance (bot process)
+delete_scheduler = DeleteScheduler()
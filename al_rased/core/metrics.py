@@ -0,0 +1,232 @@
+"""
+Metrics - low-overhead latency histograms and counters.
+Each pipeline stage (normalize, keyword rules, model inference, DB gating,
+Telegram API calls, file I/O) records into a fixed-bucket histogram; an
+observation is one bisect and two additions. Labeled counters track
+messages per chat and detections per category.
+
+Exposed as Prometheus text on a local HTTP endpoint (METRICS_PORT) by the
+bot and by the Telethon monitor, and summarized in the developer menu.
+
+In INFERENCE_WORKERS mode, engine-level stages run in worker processes and
+are not exported; the end-to-end "predict" stage still is.
+"""
+import asyncio
+import bisect
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))  # Bot; the monitor uses METRICS_PORT + 1
+METRICS_PREFIX = "rased"
+
+# Upper bounds in seconds (+Inf implied)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+MAX_LABEL_SETS = 1000  # Per counter; further label values fold into "other"
+
+STAGES = ("normalize", "keyword", "inference", "predict", "db", "telegram_api", "file_io")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile (upper bound of the bucket holding it)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self.stages = {}    # stage -> Histogram
+        self.counters = {}  # name -> {label value: count}
+        self.help = {}
+        self.started_at = time.time()
+
+    # ==================== Recording ====================
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str):
+        """Decorator for sync or async functions."""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.observe(stage, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def inc(self, name: str, label=None, amount: int = 1):
+        values = self.counters.get(name)
+        if values is None:
+            values = self.counters[name] = {}
+        if label not in values and len(values) >= MAX_LABEL_SETS:
+            label = "other"
+        values[label] = values.get(label, 0) + amount
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def reset(self):
+        """Drop recorded values (keeps descriptions); used between benchmark runs."""
+        self.stages.clear()
+        self.counters.clear()
+        self.started_at = time.time()
+
+    # ==================== Export ====================
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_seconds Time spent per pipeline stage.",
+            f"# TYPE {p}_stage_seconds histogram",
+        ]
+        for stage, h in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, n in zip(h.buckets, h.counts):
+                cumulative += n
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+        for name, values in sorted(self.counters.items()):
+            metric = f"{p}_{name}_total"
+            if name in self.help:
+                lines.append(f"# HELP {metric} {self.help[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for label, value in values.items():
+                if label is None:
+                    lines.append(f"{metric} {value}")
+                else:
+                    escaped = str(label).replace("\\", "\\\\").replace('"', '\\"')
+                    lines.append(f'{metric}{{label="{escaped}"}} {value}')
+
+        lines.append(f"# TYPE {p}_uptime_seconds gauge")
+        lines.append(f"{p}_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Per-stage count/mean/p50/p95/p99 (seconds) for dashboards."""
+        return {
+            stage: {
+                "count": h.count,
+                "mean": h.sum / h.count if h.count else 0.0,
+                "p50": h.quantile(0.50),
+                "p95": h.quantile(0.95),
+                "p99": h.quantile(0.99),
+            }
+            for stage, h in self.stages.items()
+        }
+
+    def top(self, name: str, n: int = 5) -> list:
+        values = self.counters.get(name, {})
+        return sorted(values.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class MetricsServer:
+    """Serves GET /metrics in Prometheus text format."""
+
+    def __init__(self, registry: Metrics, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            logging.warning(f"Metrics endpoint not started on {self.host}:{self.port}: {e}")
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are not needed
+            parts = request_line.decode("latin-1").split(" ")
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                body = self.registry.render().encode("utf-8")
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body, status, content_type = b"", "404 Not Found", "text/plain"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# Singleton instance (one per process: bot or monitor)
+metrics = Metrics()
+metrics.describe("messages", "Messages screened, by chat ID.")
+metrics.describe("detections", "Model/keyword verdicts, by category.")
+metrics.describe("violations", "Violations acted on, by category.")
+metrics.describe("prefilter", "Verdicts answered by the prefilter without the model, by reason.")
+metrics.describe("flood", "Messages flagged by the per-user flood/repeat check, by kind.")
+metrics.describe("shed", "Work skipped by admission control under overload, by stage.")
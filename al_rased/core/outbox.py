@@ -0,0 +1,430 @@
+"""
+Outbound Dispatcher - rate-limited Telegram send queue.
+All bot-initiated messages (warnings, violation reports, gray samples,
+review samples) go through one queue so detection handlers never stall on
+Telegram flood limits.
+
+- Priority lanes: warnings before reports before gray/review samples.
+- Token buckets: one global (~30 msg/s Bot API limit) and one per chat
+  (~20 msg/min in groups). A throttled chat never blocks other chats.
+- RetryAfter: the whole dispatcher pauses for the requested time and the
+  job is retried.
+- Digests: report / gray-sample jobs for the same (chat, topic) are
+  coalesced into a single message while they wait in the queue. If
+  Telegram can't parse a formatted message, its parts are resent one by
+  one, and a single part falls back to plain text.
+"""
+import asyncio
+import datetime
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from al_rased.core.metrics import metrics
+
+# Priority lanes (lower is sent first)
+PRIORITY_WARNING = 0
+PRIORITY_REPORT = 1
+PRIORITY_GRAY = 2
+
+GLOBAL_RATE = 25.0  # messages / second (Bot API allows ~30)
+GLOBAL_BURST = 25
+CHAT_RATE = 20 / 60  # messages / second per chat (groups: 20 per minute)
+CHAT_BURST = 3
+MAX_RETRIES = 3
+MAX_INFLIGHT = 8  # Concurrent API requests
+MAX_QUEUE = 10000  # Lowest-priority jobs are dropped beyond this
+MAX_TRACKED_CHATS = 5000
+
+MESSAGE_LIMIT = 4096
+DIGEST_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+
+
+class TokenBucket:
+    """Classic token bucket. `wait_time()` returns how long to wait (0 = go)."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Job:
+    __slots__ = ("bot", "method", "chat_id", "kwargs", "future", "on_sent", "attempts",
+                 "digest_key", "parts", "priority")
+
+    def __init__(self, bot, method, chat_id, kwargs, future, on_sent=None, digest_key=None, parts=None):
+        self.bot = bot
+        self.method = method
+        self.chat_id = chat_id
+        self.kwargs = kwargs
+        self.future = future
+        self.on_sent = on_sent
+        self.attempts = 0
+        self.digest_key = digest_key
+        self.parts = parts  # Digest entries [(text, future)] behind this message
+        self.priority = PRIORITY_REPORT
+
+
+def _seconds(value) -> float:
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+def split_digest(parts: list, limit: int = MESSAGE_LIMIT) -> list:
+    """Group digest parts into as few messages as fit under the size limit.
+
+    Returns lists of part indices, one per message. Parts are never cut (that
+    could split a formatting entity); one longer than the limit gets a
+    message of its own and is cut when sent as plain text.
+    """
+    groups, current, size = [], [], 0
+    for i, part in enumerate(parts):
+        added = len(part) + (len(DIGEST_SEPARATOR) if current else 0)
+        if current and size + added > limit:
+            groups.append(current)
+            current, size = [], 0
+            added = len(part)
+        current.append(i)
+        size += added
+    if current:
+        groups.append(current)
+    return groups
+
+
+class OutboundDispatcher:
+    def __init__(self, global_rate: float = GLOBAL_RATE, global_burst: float = GLOBAL_BURST,
+                 chat_rate: float = CHAT_RATE, chat_burst: float = CHAT_BURST,
+                 max_queue: int = MAX_QUEUE, max_inflight: int = MAX_INFLIGHT):
+        self.bot = None
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_queue = max_queue
+        self._chat_buckets = OrderedDict()
+        self._heap = []  # (priority, not_before, seq, job)
+        self._seq = itertools.count()
+        self._digests = {}  # (chat_id, thread_id, parse_mode) -> [(text, future)]
+        self._wakeup = None
+        self._worker = None
+        self._slots = None
+        self._inflight = set()
+        self.max_inflight = max_inflight
+        self._paused_until = 0.0
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "dropped": 0,
+                      "coalesced": 0, "flood_waits": 0, "format_fallbacks": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def queue_size(self) -> int:
+        return len(self._heap)
+
+    # ---------- lifecycle ----------
+
+    async def start(self, bot):
+        self.bot = bot
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_inflight)
+            self._worker = asyncio.create_task(self._run())
+            logging.info("Outbound dispatcher started.")
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Try to flush what is queued, then stop the worker."""
+        if not self.running:
+            return
+        deadline = time.monotonic() + drain_timeout
+        while self._heap and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        if self._inflight:
+            await asyncio.wait(self._inflight, timeout=max(deadline - time.monotonic(), 0.1))
+        for _, _, _, job in self._heap:
+            self._discard(job)
+        self._heap.clear()
+        logging.info("Outbound dispatcher stopped.")
+
+    # ---------- public API ----------
+
+    # `bot` is only used when the worker isn't running (tests, scripts):
+    # the call is then executed inline, exactly like a direct bot call.
+
+    def send_message(self, bot, chat_id: int, text: str, priority: int = PRIORITY_REPORT,
+                     on_sent=None, **kwargs) -> asyncio.Future:
+        """Queue a send_message call. Returns a future with the sent Message (or None)."""
+        return self.call(bot, "send_message", chat_id, priority, on_sent=on_sent, text=text, **kwargs)
+
+    def call(self, bot, method: str, chat_id: int, priority: int = PRIORITY_REPORT,
+             on_sent=None, **kwargs) -> asyncio.Future:
+        """Queue any chat-scoped Bot API call (e.g. create_forum_topic)."""
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(bot, method, chat_id, {"chat_id": chat_id, **kwargs}, future, on_sent)
+        self._push(priority, job)
+        return future
+
+    def send_digest(self, bot, chat_id: int, text: str, priority: int = PRIORITY_REPORT,
+                    message_thread_id: int = None, parse_mode: str = None) -> asyncio.Future:
+        """Queue a digest entry; entries for the same chat/topic are merged while queued."""
+        future = asyncio.get_running_loop().create_future()
+        key = (chat_id, message_thread_id, parse_mode)
+        pending = self._digests.get(key)
+        if pending is not None:
+            pending.append((text, future))
+            self.stats["coalesced"] += 1
+            return future
+
+        self._digests[key] = [(text, future)]
+        kwargs = {"chat_id": chat_id, "parse_mode": parse_mode}
+        if message_thread_id:
+            kwargs["message_thread_id"] = message_thread_id
+        job = _Job(bot, "send_message", chat_id, kwargs, future, digest_key=key)
+        self._push(priority, job)
+        return future
+
+    # ---------- internals ----------
+
+    def _push(self, priority: int, job: _Job, not_before: float = 0.0):
+        job.priority = priority
+        if not self.running:
+            # No worker (tests, scripts): send right away as before
+            task = asyncio.ensure_future(self._execute(job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            return
+        if len(self._heap) >= self.max_queue and not self._drop_lowest(priority):
+            self.stats["dropped"] += 1
+            self._discard(job)
+            return
+        heapq.heappush(self._heap, (priority, not_before, next(self._seq), job))
+        self._wakeup.set()
+
+    def _drop_lowest(self, priority: int) -> bool:
+        """Make room by dropping the newest job of a lower-priority lane."""
+        worst = max(range(len(self._heap)), key=lambda i: (self._heap[i][0], self._heap[i][2]))
+        if self._heap[worst][0] <= priority:
+            return False
+        _, _, _, job = self._heap.pop(worst)
+        heapq.heapify(self._heap)
+        self.stats["dropped"] += 1
+        self._discard(job)
+        return True
+
+    def _discard(self, job: _Job):
+        """Resolve a job (and its pending digest entries) without sending it."""
+        if job.digest_key is not None and "text" not in job.kwargs:
+            job.future = [f for _, f in self._digests.pop(job.digest_key, [])]
+        self._finish(job, None)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+            # Forget the least recently used chats when over the cap
+            while len(self._chat_buckets) > MAX_TRACKED_CHATS:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def _next_ready(self, now: float):
+        """Pop the best job whose chat has a token; returns (job, wait_if_none)."""
+        deferred, job, wait = [], None, None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            priority, not_before, seq, candidate = entry
+            chat_wait = max(not_before - now, self._chat_bucket(candidate.chat_id).wait_time(now))
+            if chat_wait <= 0:
+                job = (priority, candidate)
+                break
+            deferred.append(entry)
+            wait = chat_wait if wait is None else min(wait, chat_wait)
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        return job, wait
+
+    async def _next_job(self):
+        """Wait until some queued job may be sent now; returns (priority, job)."""
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            ready, wait = self._next_ready(now)
+            if ready is not None:
+                return ready
+
+            # Every queued chat is throttled; sleep until the first frees up or new work arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                priority, job = await self._next_job()
+            except BaseException:
+                self._slots.release()
+                raise
+            now = time.monotonic()
+            self.global_bucket.consume(now)
+            self._chat_bucket(job.chat_id).consume(now)
+            task = asyncio.create_task(self._dispatch(priority, job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, priority: int, job: _Job):
+        try:
+            retry_in = await self._execute(job)
+            if retry_in is not None:
+                self._push(priority, job, not_before=time.monotonic() + retry_in)
+        finally:
+            self._slots.release()
+
+    def _digest_job(self, job: _Job, entries: list):
+        """Point a job at a group of digest entries (text and futures)."""
+        job.parts = entries
+        job.future = [f for _, f in entries]
+        text = DIGEST_SEPARATOR.join(t for t, _ in entries)
+        if len(text) > MESSAGE_LIMIT:
+            # Only a single oversized part gets here: cut it as plain text
+            job.kwargs["parse_mode"] = None
+            text = text[:MESSAGE_LIMIT]
+        job.kwargs["text"] = text
+
+    def _drain_digest(self, job: _Job):
+        """Turn a digest buffer into this job's message plus one queued job
+        per overflow message."""
+        entries = self._digests.pop(job.digest_key, [])
+        groups = split_digest([t for t, _ in entries]) or [[]]
+        self._digest_job(job, [entries[i] for i in groups[0]])
+        for group in groups[1:]:
+            extra = _Job(job.bot, "send_message", job.chat_id, dict(job.kwargs), None)
+            self._digest_job(extra, [entries[i] for i in group])
+            self._push(job.priority, extra)
+
+    def _format_fallback(self, job: _Job) -> bool:
+        """After Telegram rejected a formatted message: resend a digest's
+        parts one by one, or a single message as plain text. Returns False if
+        there is nothing left to try."""
+        if not job.kwargs.get("parse_mode"):
+            return False
+        self.stats["format_fallbacks"] += 1
+        if job.parts and len(job.parts) > 1:
+            for entry in job.parts:
+                part = _Job(job.bot, job.method, job.chat_id, dict(job.kwargs), None)
+                self._digest_job(part, [entry])
+                self._push(job.priority, part)
+            return True
+        retry = _Job(job.bot, job.method, job.chat_id, {**job.kwargs, "parse_mode": None},
+                     job.future, job.on_sent)
+        self._push(job.priority, retry)
+        return True
+
+    async def _execute(self, job: _Job):
+        """Run one job. Returns a retry delay in seconds, or None when done."""
+        if job.digest_key is not None and "text" not in job.kwargs:
+            self._drain_digest(job)
+
+        job.attempts += 1
+        try:
+            bot = self.bot if self.running else job.bot
+            with metrics.timer("telegram_api"):
+                result = await getattr(bot, job.method)(**job.kwargs)
+        except RetryAfter as e:
+            delay = _seconds(e.retry_after)
+            logging.warning(f"Flood control: pausing outbound queue for {delay:.0f}s")
+            self.stats["flood_waits"] += 1
+            self._paused_until = time.monotonic() + delay
+            return self._retry(job, delay)
+        except BadRequest as e:
+            if "parse entities" in str(e).lower() and self._format_fallback(job):
+                logging.warning(f"Outbound {job.method} to {job.chat_id}: bad formatting ({e}), resending")
+                return None
+            logging.error(f"Outbound {job.method} to {job.chat_id} failed: {e}")
+            self.stats["failed"] += 1
+            self._finish(job, None)
+            return None
+        except Forbidden as e:
+            logging.error(f"Outbound {job.method} to {job.chat_id} failed: {e}")
+            self.stats["failed"] += 1
+            self._finish(job, None)
+            return None
+        except (TimedOut, NetworkError) as e:
+            logging.warning(f"Outbound {job.method} to {job.chat_id} failed ({e}), retrying")
+            return self._retry(job, 1.0 * job.attempts)
+        except Exception as e:
+            logging.error(f"Outbound {job.method} to {job.chat_id} failed: {e}")
+            self.stats["failed"] += 1
+            self._finish(job, None)
+            return None
+
+        self.stats["sent"] += 1
+        self._finish(job, result)
+        if job.on_sent is not None:
+            try:
+                await job.on_sent(result)
+            except Exception as e:
+                logging.error(f"Outbound on_sent callback failed: {e}")
+        return None
+
+    def _retry(self, job: _Job, delay: float):
+        if job.attempts > MAX_RETRIES or not self.running:
+            self.stats["failed"] += 1
+            self._finish(job, None)
+            return None
+        self.stats["retried"] += 1
+        return delay
+
+    @staticmethod
+    def _finish(job: _Job, result):
+        futures = job.future if isinstance(job.future, list) else [job.future]
+        for future in futures:
+            if future is not None and not future.done():
+                future.set_result(result)
+
+
+# Singleton instance (bot process)
+outbox = OutboundDispatcher()
@@ -0,0 +1,136 @@
+"""
+Sampling Profiler - on-demand, time-boxed profiling of a running process.
+A background thread samples the stack of every other thread every few
+milliseconds (sys._current_frames): the event loop as well as the executor
+threads that run normalization, keyword rules and the model. Handlers run at
+full speed and nothing needs restarting. Stacks are rooted at their thread's
+name and written as collapsed stacks (for flamegraph tools) under
+data/profiles/; the top functions by cumulative time are returned for a
+quick reply (times are summed over threads).
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILES_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "profiles")
+DEFAULT_DURATION = 30  # seconds
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 300
+MAX_STACK_DEPTH = 100
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()      # "outer;...;inner" -> samples
+        self.cumulative = Counter()  # function -> samples with it anywhere on the stack
+        self.own = Counter()         # function -> samples with it on top
+        self.samples = 0             # Stacks recorded (one per thread per tick)
+        self._thread = None
+        self._stop = threading.Event()
+        self._target = None          # Only this thread, or None for all
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: int = None):
+        """Start sampling every thread, or only `thread_id` if given."""
+        self._target = thread_id
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self._target is not None:
+                frames = {self._target: frames[self._target]} if self._target in frames else {}
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id != own_id:
+                    self._record(thread_names.get(thread_id, str(thread_id)), frame)
+
+    def _record(self, thread_name: str, frame):
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        if not names:
+            return
+        names.reverse()
+        self.samples += 1
+        self.stacks[f"thread:{thread_name};" + ";".join(names)] += 1
+        self.own[names[-1]] += 1
+        for name in set(names):
+            self.cumulative[name] += 1
+
+    def top(self, n: int = 15) -> list:
+        """[(function, cumulative seconds, own seconds)] by cumulative time."""
+        return [
+            (name, count * self.interval, self.own.get(name, 0) * self.interval)
+            for name, count in self.cumulative.most_common(n)
+        ]
+
+    def write_collapsed(self, directory: str = PROFILES_DIR, label: str = "profile") -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return os.path.abspath(path)
+
+
+_active = None
+
+
+def is_profiling() -> bool:
+    return _active is not None
+
+
+async def profile_for(duration: float = DEFAULT_DURATION, top_n: int = 15,
+                      label: str = "profile", directory: str = PROFILES_DIR) -> dict:
+    """Profile every thread of this process for `duration` seconds.
+
+    Returns {"path", "samples", "duration", "top"}; raises RuntimeError if a
+    profile is already running in this process.
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("A profile is already running")
+    duration = max(1.0, min(duration, MAX_DURATION))
+
+    profiler = _active = SamplingProfiler()
+    started = time.monotonic()
+    profiler.start()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.stop()
+        _active = None
+
+    # Disk write off the event loop
+    path = await asyncio.get_running_loop().run_in_executor(
+        None, profiler.write_collapsed, directory, label
+    )
+    return {
+        "path": path,
+        "samples": profiler.samples,
+        "duration": time.monotonic() - started,
+        "top": profiler.top(top_n),
+    }
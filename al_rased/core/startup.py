@@ -0,0 +1,59 @@
+"""
+Startup Timeline - where process start-up time goes.
+Records how long groups of imports take and when start-up milestones are
+reached (handlers registered, post_init done, model ready, first verdict),
+in seconds since this module was first imported; entry points import it
+before anything else. The report is logged once the first verdict is
+produced and shown in the developer metrics screen.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+# Milestones in the order they normally happen
+MILESTONES = ("imports", "handlers_registered", "post_init", "model_ready", "first_verdict")
+
+
+class StartupTimeline:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = {}     # import group -> seconds
+        self.durations = {}   # step (model_load, warm_up_inference) -> seconds
+        self.marks = {}       # milestone -> seconds since start
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @contextmanager
+    def importing(self, group: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.imports[group] = self.imports.get(group, 0.0) + time.perf_counter() - start
+
+    def record(self, step: str, seconds: float):
+        self.durations[step] = seconds
+
+    def mark(self, milestone: str):
+        """Record the first time a milestone is reached (later calls are no-ops)."""
+        if milestone in self.marks:
+            return
+        self.marks[milestone] = self.elapsed()
+        if milestone == "first_verdict":
+            logging.info(f"Startup: {self.summary_text()}")
+
+    def report(self) -> dict:
+        return {"imports": dict(self.imports), "durations": dict(self.durations), "marks": dict(self.marks)}
+
+    def summary_text(self) -> str:
+        parts = [f"{m} {self.marks[m]:.2f}s" for m in MILESTONES if m in self.marks]
+        parts += [f"{name} {seconds:.2f}s" for name, seconds in self.durations.items()]
+        if self.imports:
+            imports = ", ".join(f"{g} {s:.2f}s" for g, s in sorted(self.imports.items(), key=lambda i: -i[1]))
+            parts.append(f"imports: {imports}")
+        return " | ".join(parts)
+
+
+# Singleton instance (one per process: bot or monitor)
+startup = StartupTimeline()
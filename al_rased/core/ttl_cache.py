@@ -0,0 +1,106 @@
+"""
+TTL Cache - bounded LRU map with per-entry expiry and single-flight loads.
+Backs the admin directory, the chat metadata cache, the monitor's entity
+cache and the L1 tier of CacheManager.
+
+Entries expire after a TTL (per cache, overridable per entry); when the
+cache is full the least recently used entry goes first. get_or_load runs
+one load per key at a time and lets concurrent misses share its result.
+None is not a cacheable value (it means "missing").
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """LRU + TTL map of key -> value."""
+
+    def __init__(self, ttl: float, max_size: int, stats: dict = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        # Owners may pass their own stats dict to get the counters merged in
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault("evictions", 0)
+        self._items = OrderedDict()  # key -> (value, expires_at)
+        self._inflight = {}  # key -> Future (one load per key at a time)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _count(self, name: str):
+        self.stats[name] = self.stats.get(name, 0) + 1
+
+    def get(self, key):
+        """Fresh value for key, or None (expired entries are dropped)."""
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._items[key] = (value, time.monotonic() + ttl)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self._count("evictions")
+
+    def patch(self, key, update) -> bool:
+        """Replace a cached value with update(value), keeping its expiry.
+        Returns False (and does nothing) if key is not cached."""
+        entry = self._items.get(key)
+        if entry is None:
+            return False
+        value, expires_at = entry
+        self._items[key] = (update(value), expires_at)
+        return True
+
+    def pop(self, key):
+        entry = self._items.pop(key, None)
+        return None if entry is None else entry[0]
+
+    def clear(self):
+        self._items.clear()
+
+    async def get_or_load(self, key, load):
+        """Return the cached value, or `value, ttl = await load()` on a miss
+        (ttl None means the cache default). Counts hits and misses.
+
+        Concurrent misses for the same key share a single load and get its
+        result or exception. If the loading task is cancelled, a waiter takes
+        over the load instead of being cancelled with it.
+        """
+        value = self.get(key)
+        if value is not None:
+            self._count("hits")
+            return value
+        self._count("misses")
+
+        while (pending := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This waiter was cancelled, not the load
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, ttl = await load()
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved: no "never retrieved" log without waiters
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
@@ -0,0 +1,77 @@
+"""
+Update Processor - concurrent update handling with per-chat ordering.
+Updates from different chats are processed in parallel (up to
+MAX_CONCURRENT_UPDATES at once), so one slow API call in a group no longer
+stalls every other group. Updates of the same chat still run one after
+another in arrival order, which keeps ConversationHandler state (keyed by
+chat and user) consistent.
+
+Updates of a chat that is already being processed wait in that chat's
+backlog and do not hold a concurrency slot while waiting.
+"""
+import logging
+import os
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "32"))
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int = MAX_CONCURRENT_UPDATES):
+        super().__init__(max_concurrent_updates)
+        self._backlogs = {}  # ordering key -> deque of coroutines behind the running one
+        self.stats = {"processed": 0, "queued": 0, "max_backlog": 0}
+
+    @staticmethod
+    def ordering_key(update):
+        """Chat ID, or user ID for chat-less updates (inline queries etc.)."""
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return ("user", update.effective_user.id)
+        return None
+
+    def active_chats(self) -> int:
+        return len(self._backlogs)
+
+    async def do_process_update(self, update, coroutine):
+        key = self.ordering_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        backlog = self._backlogs.get(key)
+        if backlog is not None:
+            # The chat's current runner will process this after the earlier updates
+            backlog.append(coroutine)
+            self.stats["queued"] += 1
+            self.stats["max_backlog"] = max(self.stats["max_backlog"], len(backlog))
+            return
+
+        backlog = self._backlogs[key] = deque()
+        try:
+            await self._run(coroutine)
+            while backlog:
+                await self._run(backlog.popleft())
+        finally:
+            del self._backlogs[key]
+            for pending in backlog:
+                pending.close()  # Only reached on cancellation (shutdown)
+
+    async def _run(self, coroutine):
+        try:
+            await coroutine
+        except Exception as e:
+            # Application.process_update already routes handler errors; this is a last resort
+            logging.error(f"Unhandled error while processing update: {e}")
+        self.stats["processed"] += 1
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
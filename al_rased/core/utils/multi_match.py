@@ -0,0 +1,84 @@
+"""
+Multi-pattern literal matcher (Aho-Corasick).
+Finds every occurrence of a set of keywords in one left-to-right pass,
+so the cost is O(len(text) + matches) no matter how many keywords exist.
+"""
+from collections import deque
+
+
+class MultiMatcher:
+    """Aho-Corasick automaton over literal keywords.
+
+    Each keyword carries a payload (e.g. its category); `finditer` yields
+    (end_index, keyword, payload) for every occurrence, overlaps included.
+    """
+
+    def __init__(self, keywords=()):
+        self._goto = [{}]     # state -> {char: next_state}
+        self._fail = [0]
+        self._out = [[]]      # state -> [(keyword, payload), ...]
+        self.size = 0
+        for item in keywords:
+            if isinstance(item, tuple):
+                self._add(*item)
+            else:
+                self._add(item)
+        self._build()
+
+    def __len__(self):
+        return self.size
+
+    def _add(self, keyword: str, payload=None):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append((keyword, payload))
+        self.size += 1
+
+    def _build(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        # Full transitions (goto + failure links), filled in as characters are seen
+        self._delta = [dict(g) for g in self._goto]
+
+    def _step(self, state: int, ch: str) -> int:
+        """Transition from `state` on `ch`, following failure links (cached)."""
+        goto, fail = self._goto, self._fail
+        origin = state
+        while state and ch not in goto[state]:
+            state = fail[state]
+        nxt = goto[state].get(ch, 0)
+        self._delta[origin][ch] = nxt
+        return nxt
+
+    def finditer(self, text: str):
+        delta, out, step = self._delta, self._out, self._step
+        state = 0
+        for i, ch in enumerate(text):
+            nxt = delta[state].get(ch)
+            state = step(state, ch) if nxt is None else nxt
+            if out[state]:
+                for keyword, payload in out[state]:
+                    yield i, keyword, payload
+
+    def search(self, text: str):
+        """Return the first (end_index, keyword, payload) found, or None."""
+        return next(self.finditer(text), None)
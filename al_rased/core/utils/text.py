@@ -1,6 +1,22 @@
 import re
 import unicodedata
 
+HOMOGLYPHS = {
+    'ڪ': 'ك', 'ك': 'ك', 'ک': 'ك', # Unify all Kafs
+    'ی': 'ي', # Farsi Yeh
+    'ھ': 'ه', # Heh
+    'پ': 'ب',
+    'چ': 'ج',
+    'گ': 'ك',  # Persian Gaf → Kaf (visual similarity)
+    'ڤ': 'ف'
+}
+
+# Skeleton folding: the letter unification normalize_text does, char by char
+SKELETON_FOLD = {**HOMOGLYPHS, 'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ة': 'ه', 'ى': 'ي'}
+# Dropped from the skeleton: separators used to split keywords apart
+# (whitespace, tatweel, zero-width and combining marks are dropped too)
+SKELETON_SEPARATORS = set(".-_~،,*|/\\·•'`\"")
+
 def normalize_text(text: str) -> str:
     if not text:
         return ""
@@ -59,16 +75,7 @@ def normalize_text(text: str) -> str:
     
     # 5.5 Homoglyph Normalization (Persian/Urdu chars to Arabic)
     # Swash Kaf -> Kaf, Farsi Yeh -> Yeh, etc.
-    replacements = {
-        'ڪ': 'ك', 'ك': 'ك', 'ک': 'ك', # Unify all Kafs
-        'ی': 'ي', # Farsi Yeh
-        'ھ': 'ه', # Heh
-        'پ': 'ب',
-        'چ': 'ج',
-        'گ': 'ك',  # Persian Gaf → Kaf (visual similarity)
-        'ڤ': 'ف'
-    }
-    for old, new in replacements.items():
+    for old, new in HOMOGLYPHS.items():
         text = text.replace(old, new)
     
     # 6. Remove specific decorative characters
@@ -82,6 +89,44 @@ def normalize_text(text: str) -> str:
     
     return text.strip()
 
+class _SkeletonTable(dict):
+    """str.translate table (ord -> folded string, None when dropped),
+    filled on first sight of each character; bounded by the alphabet."""
+
+    def __missing__(self, code: int):
+        char = chr(code)
+        if char.isspace() or char in SKELETON_SEPARATORS or char == 'ـ':
+            folded = None
+        elif unicodedata.category(char) in ('Mn', 'Cf'):
+            folded = None  # Diacritics, strike-through marks, zero-width characters
+        else:
+            folded = unicodedata.normalize('NFKC', char).lower()
+            folded = ''.join(SKELETON_FOLD.get(c, c) for c in folded if not c.isspace()) or None
+        self[code] = folded
+        return folded
+
+_SKELETON_TABLE = _SkeletonTable()
+
+def skeleton_stream(text: str) -> str:
+    """The skeleton string alone (one str.translate call); see skeleton()."""
+    return text.translate(_SKELETON_TABLE)
+
+def skeleton(text: str) -> tuple:
+    """Letters-only view of a text for evasion-tolerant matching.
+
+    Drops whitespace, separators, tatweel, zero-width characters and
+    combining marks, and folds each remaining character (NFKC, letter
+    unification, lowercase). Returns (skeleton, positions) where
+    positions[i] is the index in `text` that skeleton[i] came from, so a
+    match on the skeleton maps back to a span of the original.
+    """
+    positions = []
+    for index, char in enumerate(text):
+        folded = _SKELETON_TABLE[ord(char)]
+        if folded:
+            positions.extend([index] * len(folded))
+    return skeleton_stream(text), positions
+
 # Test
 if __name__ == "__main__":
     samples = [
@@ -0,0 +1,275 @@
+"""
+Webhook Mode - sharded multi-process update processing.
+One ingress process receives Telegram webhook POSTs and routes every update
+to one of BOT_WORKERS worker processes by chat ID. All updates of a chat go
+to the same worker, in arrival order. Each worker runs the full handler
+stack (create_app) and reads its updates from a queue (a pipe underneath).
+
+Enabled with BOT_MODE=webhook. Polling mode (the default) is unchanged.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Public URL passed to setWebhook (empty = don't register)
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", str(os.cpu_count() or 1)))
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY_SIZE = 1 << 20
+
+# Update fields whose object carries a "chat"
+_CHAT_FIELDS = (
+    "message", "edited_message", "channel_post", "edited_channel_post",
+    "business_message", "edited_business_message", "my_chat_member", "chat_member",
+    "chat_join_request", "message_reaction", "message_reaction_count",
+    "chat_boost", "removed_chat_boost",
+)
+# Update fields without a chat: route by the user instead
+_USER_FIELDS = ("inline_query", "chosen_inline_result", "shipping_query", "pre_checkout_query", "poll_answer")
+
+
+# ==================== Routing ====================
+
+def update_chat_id(data: dict):
+    """Chat ID an update belongs to (user ID for chat-less updates), or None."""
+    for field in _CHAT_FIELDS:
+        obj = data.get(field)
+        if obj and "chat" in obj:
+            return obj["chat"]["id"]
+    callback = data.get("callback_query")
+    if callback:
+        message = callback.get("message")
+        if message and "chat" in message:
+            return message["chat"]["id"]
+        return callback["from"]["id"]
+    for field in _USER_FIELDS:
+        obj = data.get(field)
+        if obj:
+            user = obj.get("from") or obj.get("user")
+            if user:
+                return user["id"]
+    return None
+
+
+def shard_for(chat_id, shards: int) -> int:
+    if chat_id is None:
+        return 0  # e.g. poll updates: no ordering constraint
+    return abs(chat_id) % shards
+
+
+def shard_owner(shard: int, shards: int):
+    """Predicate: does this shard own `chat_id`?"""
+    return lambda chat_id: shard_for(chat_id, shards) == shard
+
+
+# ==================== Workers ====================
+
+def _worker_main(shard: int, shards: int, queue):
+    logging.basicConfig(
+        format=f'%(asctime)s - shard {shard} - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    asyncio.run(_run_worker(shard, shards, queue))
+
+
+async def _run_worker(shard: int, shards: int, queue):
+    from telegram import Update
+    from .bot import create_app
+
+    app = create_app()
+    app.bot_data["shard"] = (shard, shards)
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+    logging.info(f"Shard {shard}/{shards} ready.")
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            data = await loop.run_in_executor(None, queue.get)
+            if data is None:
+                break
+            await app.update_queue.put(Update.de_json(data, app.bot))
+    finally:
+        await app.stop()
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+
+class ShardPool:
+    """N worker processes, each owning the chats that hash to it."""
+
+    def __init__(self, shards: int = BOT_WORKERS, target=_worker_main):
+        self.shards = max(1, shards)
+        self.target = target
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queues = [self._ctx.Queue() for _ in range(self.shards)]
+        self._processes = [None] * self.shards
+        self.stats = {"dispatched": 0, "restarts": 0}
+
+    def start(self):
+        for shard in range(self.shards):
+            self._spawn(shard)
+
+    def _spawn(self, shard: int):
+        process = self._ctx.Process(
+            target=self.target, args=(shard, self.shards, self._queues[shard]),
+            name=f"bot-shard-{shard}"
+        )
+        process.start()
+        self._processes[shard] = process
+
+    def dispatch(self, data: dict):
+        shard = shard_for(update_chat_id(data), self.shards)
+        process = self._processes[shard]
+        if process is not None and not process.is_alive():
+            # Queued updates stay in the queue and are picked up by the new process
+            logging.error(f"Shard {shard} died (exit code {process.exitcode}), restarting")
+            self.stats["restarts"] += 1
+            self._spawn(shard)
+        self._queues[shard].put(data)
+        self.stats["dispatched"] += 1
+
+    def stop(self, timeout: float = 30):
+        for queue in self._queues:
+            queue.put(None)
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+
+
+# ==================== HTTP Ingress ====================
+
+class WebhookServer:
+    """Minimal HTTP/1.1 endpoint for Telegram webhook POSTs.
+
+    Each JSON update is handed to `dispatch(data)`; requests on a connection
+    are handled one after another, so arrival order is kept.
+    """
+
+    def __init__(self, dispatch, listen: str = WEBHOOK_LISTEN, port: int = WEBHOOK_PORT,
+                 path: str = WEBHOOK_PATH, secret: str = WEBHOOK_SECRET):
+        self.dispatch = dispatch
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self._server = None
+        self.stats = {"accepted": 0, "rejected": 0}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.listen, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Webhook endpoint listening on {self.listen}:{self.port}{self.path}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, "413 Payload Too Large")
+                    break
+                body = await reader.readexactly(length) if length else b""
+                await self._respond(writer, self._route(method, target, headers, body))
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, method: str, target: str, headers: dict, body: bytes) -> str:
+        if method != "POST" or target != self.path:
+            self.stats["rejected"] += 1
+            return "404 Not Found"
+        if self.secret and headers.get(SECRET_HEADER) != self.secret:
+            self.stats["rejected"] += 1
+            return "403 Forbidden"
+        try:
+            data = json.loads(body)
+        except ValueError:
+            self.stats["rejected"] += 1
+            return "400 Bad Request"
+        self.dispatch(data)
+        self.stats["accepted"] += 1
+        return "200 OK"
+
+    @staticmethod
+    async def _respond(writer, status: str):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+
+
+async def replay_updates(url: str, updates, secret: str = WEBHOOK_SECRET) -> int:
+    """POST recorded update dicts to a webhook endpoint, in order.
+
+    Works against the real ingress or a stand-in WebhookServer in tests.
+    Returns the number of updates accepted.
+    """
+    import httpx
+
+    headers = {SECRET_HEADER: secret} if secret else {}
+    accepted = 0
+    async with httpx.AsyncClient() as client:
+        for data in updates:
+            response = await client.post(url, json=data, headers=headers)
+            if response.status_code == 200:
+                accepted += 1
+    return accepted
+
+
+def run_webhook(token: str):
+    """Run the ingress in this process and the handler stack in BOT_WORKERS processes."""
+    from telegram import Bot, Update
+
+    pool = ShardPool()
+    pool.start()
+
+    async def serve():
+        server = WebhookServer(pool.dispatch)
+        await server.start()
+        if WEBHOOK_URL:
+            async with Bot(token) as bot:
+                await bot.set_webhook(
+                    WEBHOOK_URL, secret_token=WEBHOOK_SECRET or None,
+                    allowed_updates=Update.ALL_TYPES
+                )
+            logging.info(f"Webhook registered at {WEBHOOK_URL}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
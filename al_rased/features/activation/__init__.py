@@ -19,6 +19,8 @@ from core.database import (
     set_group_active,
     remove_managed_group
 )
+from al_rased.core.admission import admission
+from al_rased.core.chat_cache import chat_metadata
 
 # Developer ID from environment
 DEVELOPER_ID = int(os.getenv("DEVELOPER_ID", "0"))
@@ -220,6 +222,7 @@ async def handle_group_control(update: Update, context: ContextTypes.DEFAULT_TYP
     
     if action == "vip":
         await set_group_vip(group_id, True)
+        admission.forget_vip()
         await query.answer("⭐ تم تفعيل VIP", show_alert=True)
         logging.info(f"Group {group_id} set as VIP")
         
@@ -307,11 +310,17 @@ async def on_bot_added_to_group(update: Update, context: ContextTypes.DEFAULT_TY
     elif old_is_member and not new_is_member:
         chat = my_chat_member.chat
         logging.info(f"Bot removed from group: {chat.title} ({chat.id})")
+        chat_metadata.invalidate(chat.id)
         await remove_managed_group(chat.id)
 
 async def process_new_group(chat, added_by, context: ContextTypes.DEFAULT_TYPE):
     """Process a new group the bot was added to."""
     
+    # Fetch full chat info once; shared with detection (linked channel, forum flag)
+    chat_metadata.invalidate(chat.id)
+    metadata = await chat_metadata.get(context.bot, chat.id)
+    chat_title = metadata.get("title") or chat.title
+    
     # Get group info
     try:
         member_count = await context.bot.get_chat_member_count(chat.id)
@@ -425,7 +434,7 @@ async def process_new_group(chat, added_by, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Success! Register group
-    await add_managed_group(chat.id, chat.title, member_count, added_by.id)
+    await add_managed_group(chat.id, chat_title, member_count, added_by.id)
     
     # Send success message to group
     try:
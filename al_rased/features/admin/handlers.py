@@ -6,11 +6,13 @@ Only the developer can use these commands.
 import os
 import logging
 from telegram import Update, ChatMember
+from telegram.helpers import escape_markdown
 from telegram.ext import ContextTypes, MessageHandler, filters, CommandHandler, CallbackQueryHandler, ConversationHandler
 from core.database import (
     set_group, get_group, get_system_flag, set_system_flag, 
     add_banned_name, remove_banned_name, get_banned_names, get_banned_names_count
 )
+from al_rased.core.outbox import outbox, PRIORITY_REPORT
 from features.admin.keyboards import (
     get_developer_menu, get_systems_menu, get_category_menu, 
     get_banned_names_menu, get_delete_banned_names_menu
@@ -301,13 +303,15 @@ async def send_violation_report(
     
     # Truncate message if too long
     text_preview = message_text[:500] + "..." if len(message_text) > 500 else message_text
+    # The preview goes in a code span; a backtick in it would close the span
+    text_preview = text_preview.replace("`", "'")
     
     report_text = (
         f"🚨 **تقرير مخالفة**\n\n"
-        f"📍 **المجموعة:** {source_chat_title}\n"
+        f"📍 **المجموعة:** {escape_markdown(source_chat_title or '')}\n"
         f"🆔 **معرف المجموعة:** `{source_chat_id}`\n\n"
-        f"👤 **المستخدم:** {user_name}\n"
-        f"🔗 **اليوزر:** @{username if username else 'N/A'}\n"
+        f"👤 **المستخدم:** {escape_markdown(user_name or '')}\n"
+        f"🔗 **اليوزر:** @{escape_markdown(username) if username else 'N/A'}\n"
         f"🆔 **معرف المستخدم:** `{user_id}`\n\n"
         f"🏷 **التصنيف:** {category}\n"
         f"📈 **الثقة:** {confidence:.0%}\n"
@@ -315,15 +319,15 @@ async def send_violation_report(
         f"📝 **النص:**\n`{text_preview}`"
     )
     
-    try:
-        await context.bot.send_message(
-            chat_id=reports_group_id,
-            text=report_text,
-            parse_mode="Markdown"
-        )
-        logging.info(f"Violation report sent to reports group: {category}")
-    except Exception as e:
-        logging.error(f"Failed to send violation report: {e}")
+    # Queued; bursts are coalesced into one digest message
+    outbox.send_digest(
+        context.bot,
+        reports_group_id,
+        report_text,
+        PRIORITY_REPORT,
+        parse_mode="Markdown"
+    )
+    logging.info(f"Violation report queued for reports group: {category}")
 
 
 def register_admin_handlers(app):
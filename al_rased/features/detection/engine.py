@@ -1,7 +1,17 @@
-import joblib
+import hashlib
+import json
 import os
 import logging
+import threading
+import time
 from al_rased.core.utils.text import normalize_text
+from al_rased.core.metrics import metrics
+from .prefilter import screen
+from .rules import RuleScanner, keyword_rules, load_rules
+
+# Imported on first model load: joblib pulls in numpy, and unpickling the
+# pipeline pulls in scikit-learn, which would otherwise slow every startup
+joblib = None
 
 # Locate model relative to this file (features/detection/engine.py)
 # Model is at features/model/classifier.joblib
@@ -10,78 +20,53 @@ from al_rased.core.utils.text import normalize_text
 # target: al_rased/features/model/classifier.joblib
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # al_rased/features
 MODEL_PATH = os.path.join(BASE_DIR, "model/classifier.joblib")
+WARM_UP_TEXT = "السلام عليكم، متى موعد تسليم الواجب؟"  # Must reach the model (not prefiltered)
 
-# Keyword-based override rules for sensitive categories
-# These patterns ALWAYS trigger detection, bypassing ML uncertainty
-KEYWORD_RULES = {
-    "احتيال مالي (عرض)": [
-        "استثمر معي", "ارباح مضمونه", "عوائد يومية", "فوركس", "تداول عملات",
-        "دخل اضافي", "فرصة ذهبية", "ارباح بدون مجهود", "استثمار مضمون"
-    ],
-    "سبام": [
-        "سيرفر ماينكرافت", "ريلم ماينكرافت", "سيرفر ماين كرافت", "سيرفر كرافت"
-    ],
-    "غير أخلاقي (عرض)": [
-        # Sexual content
-        "سكس", "porn", "xxx", "بورن", "نودز", "هيجانه",
-        "افلام للكبار", "+18", "18+", "فيديو كول", "سكس شات",
-        # Child exploitation
-        "سكس اطفال", "تحرش اطفال", "قاصر",
-        # Drugs
-        "حشيش للبيع", "شبو", "كبتاجون", "كريستال",
-    ],
-    "تهكير (عرض)": [
-        # Hacking services
-        "تهكير حساب", "اختراق حساب", "تهكير واتساب", "تهكير انستقرام",
-        "تهكير تيك توك", "تهكير سناب", "تهكير فيسبوك", "تهكير جوال",
-        "اختراق هاتف", "فريق هكرز", "خدمات الهكر", "سحب معلومات",
-        "فرمتة عن بعد", "متوفر تهكير", "يوجد لدينا اختراق",
-    ],
-    # ============================================================
-    # FROZEN CATEGORY keyword fallbacks (categories excluded from
-    # ML training due to insufficient samples)
-    # ============================================================
-    "احتيال طبي (طلب)": [
-        "ابي سكليف", "ابغي سكليف", "محتاج سكليف", "احتاج سكليف",
-        "ابي عذر طبي", "ابغي عذر طبي", "محتاج عذر طبي",
-        "من يسوي سكليف", "احد يسوي سكليف", "من يعرف سكليف",
-        "ابي اجازه مرضيه", "محتاجه سكليف",
-    ],
-    "تهكير (طلب)": [
-        "ابي هكر", "ابغي هكر", "محتاج هكر", "مطلوب هكر",
-        "ابي تهكير", "ابغي تهكير", "من يهكر لي", "احد يهكر",
-        "ابي اخترق", "كيف اهكر", "كيف اخترق",
-    ],
-    "غش أكاديمي (طلب)": [
-        "ابي احد يحل", "محتاج حل واجب", "من يحل واجب",
-        "ابي احد يسوي بحث", "محتاج بحث تخرج", "من يسوي مشروع",
-        "ابي حل اختبار", "محتاج حل كويز",
-    ],
-    "غير أخلاقي (طلب)": [
-        "ابي سكس", "ابغي سكس", "ابي نودز", "ابغي نودز",
-        "من عنده سكس", "مين هيجانه", "مين مشتهيه",
-    ],
-}
+# Keyword-based override rules for sensitive categories ("keywords" in
+# rules.json). These patterns ALWAYS trigger detection, bypassing ML
+# uncertainty. {label: [keywords]} in precedence order.
+RULES = load_rules()
+KEYWORD_RULES = keyword_rules(RULES)
 
 
 class DetectionEngine:
     _model = None
     _db_keywords = None  # Cache for database keywords
+    _scanner = None      # RuleScanner over KEYWORD_RULES + _db_keywords
+    _scanner_source = None  # The _db_keywords dict the scanner was built from
+    _load_lock = threading.Lock()  # Background warm-up and an early message may load at once
+    _version = None         # (model mtime, _db_keywords, tag) behind verdict_key
 
     @classmethod
     def load_model(cls):
-        if cls._model is None:
-            if os.path.exists(MODEL_PATH):
-                try:
-                    cls._model = joblib.load(MODEL_PATH)
-                    logging.info("AI Model loaded successfully.")
-                except Exception as e:
-                    logging.error(f"Failed to load AI model: {e}")
-            else:
-                logging.warning(f"Model file not found at {MODEL_PATH}")
-        
-        # Load keywords from database
-        cls._load_db_keywords()
+        global joblib
+        with cls._load_lock:
+            if cls._model is None:
+                if os.path.exists(MODEL_PATH):
+                    try:
+                        if joblib is None:
+                            import joblib
+                        cls._model = joblib.load(MODEL_PATH)
+                        logging.info("AI Model loaded successfully.")
+                    except Exception as e:
+                        logging.error(f"Failed to load AI model: {e}")
+                else:
+                    logging.warning(f"Model file not found at {MODEL_PATH}")
+            
+            # Load keywords from database
+            cls._load_db_keywords()
+
+    @classmethod
+    def warm_up(cls) -> dict:
+        """Load the model and run one dummy prediction (first-call costs).
+        Returns {"model_load": seconds, "warm_up_inference": seconds}.
+        """
+        start = time.perf_counter()
+        if not cls._model:
+            cls.load_model()
+        loaded = time.perf_counter()
+        cls.predict(WARM_UP_TEXT)
+        return {"model_load": loaded - start, "warm_up_inference": time.perf_counter() - loaded}
 
     @classmethod
     def _load_db_keywords(cls):
@@ -110,53 +95,86 @@ class DetectionEngine:
             logging.warning(f"Could not load keywords from database: {e}")
             cls._db_keywords = {}
 
+    @classmethod
+    def _keyword_scanner(cls) -> RuleScanner:
+        """Scanner for the rule file plus database keywords, rebuilt when
+        the database keywords are replaced."""
+        if cls._scanner is None or cls._scanner_source is not cls._db_keywords:
+            cls._scanner = RuleScanner(RULES, cls._db_keywords)
+            cls._scanner_source = cls._db_keywords
+        return cls._scanner
+
+    @classmethod
+    def verdict_version(cls) -> str:
+        """Tag of the model file, rule file and database keywords in use.
+        Verdicts cached under another tag (before a retrain or keyword change,
+        or by a process on other versions) are not reused."""
+        try:
+            mtime = os.path.getmtime(MODEL_PATH)
+        except OSError:
+            mtime = 0.0
+        version = cls._version
+        if version is None or version[0] != mtime or version[1] is not cls._db_keywords:
+            payload = json.dumps([mtime, RULES, cls._db_keywords or {}], sort_keys=True, ensure_ascii=False)
+            version = cls._version = (mtime, cls._db_keywords, hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12])
+        return version[2]
+
+    @classmethod
+    def verdict_key(cls, text: str) -> str:
+        """Verdict cache key: the text under the current verdict_version."""
+        return f"{cls.verdict_version()}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
     @classmethod
     def _check_keyword_rules(cls, text: str) -> dict | None:
         """Check if text matches any keyword rules (override ML).
         NOTE: text is expected to already be normalized via normalize_text().
-        Keywords are also normalized at check time for consistent matching.
+        Keywords are normalized once when the scanner is built.
         """
-        text_lower = text.lower()
-        
-        # Combine hardcoded + database keywords
-        all_keywords = {**KEYWORD_RULES}
-        if cls._db_keywords:
-            for label, kws in cls._db_keywords.items():
-                if label in all_keywords:
-                    all_keywords[label] = list(set(all_keywords[label] + kws))
-                else:
-                    all_keywords[label] = kws
-        
-        for label, keywords in all_keywords.items():
-            for keyword in keywords:
-                # Normalize keyword the same way we normalize input text
-                norm_keyword = normalize_text(keyword).lower()
-                if norm_keyword and norm_keyword in text_lower:
-                    logging.debug(f"Keyword match: '{keyword}' -> {label}")
-                    return {"label": label, "confidence": 0.95, "matched_keyword": keyword}
-        
+        match = cls._keyword_scanner().first_keyword(text.lower())
+        if match:
+            label, keyword = match
+            logging.debug(f"Keyword match: '{keyword}' -> {label}")
+            return {"label": label, "confidence": 0.95, "matched_keyword": keyword}
         return None
 
+    @classmethod
+    def predict_keywords(cls, text: str) -> dict:
+        """Keyword rules only, without the model (the verdict for messages
+        shed under load)."""
+        with metrics.timer("normalize"):
+            clean_text = normalize_text(text)
+        with metrics.timer("keyword"):
+            keyword_match = cls._check_keyword_rules(clean_text)
+        return keyword_match or {"label": "طبيعي", "confidence": 0.0}
+
     @classmethod
     def predict(cls, text: str) -> dict:
         if not cls._model:
             cls.load_model()
         
         # 1. Normalize
-        clean_text = normalize_text(text)
+        with metrics.timer("normalize"):
+            clean_text = normalize_text(text)
         
         # 2. Check keyword rules FIRST (for sensitive categories)
-        keyword_match = cls._check_keyword_rules(clean_text)
+        with metrics.timer("keyword"):
+            keyword_match = cls._check_keyword_rules(clean_text)
         if keyword_match:
             return keyword_match
+
+        # 3. Cheap first stage: obviously benign messages skip the model
+        skip_reason = screen(clean_text)
+        if skip_reason:
+            return {"label": "طبيعي", "confidence": 0.0, "prefilter": skip_reason}
         
-        # 3. Fall back to ML model
+        # 4. Fall back to ML model
         if not cls._model:
             return {"label": "طبيعي", "confidence": 0.0}
 
         try:
             # Model expects a list/iterable
-            probas = cls._model.predict_proba([clean_text])[0]
+            with metrics.timer("inference"):
+                probas = cls._model.predict_proba([clean_text])[0]
             max_index = probas.argmax()
             label = cls._model.classes_[max_index]
             confidence = float(probas[max_index])
@@ -166,3 +184,45 @@ class DetectionEngine:
             logging.error(f"Prediction error: {e}")
             return {"label": "طبيعي", "confidence": 0.0}
 
+    @classmethod
+    def predict_batch(cls, texts: list) -> list:
+        """Predict several texts with one predict_proba call.
+        Returns the same results as calling predict() on each text, in order.
+        """
+        if not cls._model:
+            cls.load_model()
+
+        results = [None] * len(texts)
+        ml_indices, ml_texts = [], []
+        for i, text in enumerate(texts):
+            with metrics.timer("normalize"):
+                clean_text = normalize_text(text)
+            with metrics.timer("keyword"):
+                keyword_match = cls._check_keyword_rules(clean_text)
+            skip_reason = None if keyword_match else screen(clean_text)
+            if keyword_match:
+                results[i] = keyword_match
+            elif skip_reason:
+                results[i] = {"label": "طبيعي", "confidence": 0.0, "prefilter": skip_reason}
+            else:
+                ml_indices.append(i)
+                ml_texts.append(clean_text)
+
+        if not ml_texts:
+            return results
+
+        try:
+            if not cls._model:
+                raise RuntimeError("model not loaded")
+            with metrics.timer("inference"):
+                probas = cls._model.predict_proba(ml_texts)
+            max_indices = probas.argmax(axis=1)
+            for i, row, max_index in zip(ml_indices, probas, max_indices):
+                results[i] = {"label": cls._model.classes_[max_index], "confidence": float(row[max_index])}
+        except Exception as e:
+            if cls._model:
+                logging.error(f"Prediction error: {e}")
+            for i in ml_indices:
+                results[i] = {"label": "طبيعي", "confidence": 0.0}
+        return results
+
@@ -0,0 +1,150 @@
+"""
+Flood Detector - per-(chat, user) message rate and repeated-content checks.
+Runs before model inference. A user sending FLOOD_MAX_MESSAGES messages
+within FLOOD_WINDOW seconds is flooding; the same text (compared on its
+skeleton, so spacing and separator tricks don't help) REPEAT_MAX times
+within REPEAT_WINDOW seconds is a repeat.
+
+State lives in preallocated slabs: every tracked (chat, user) owns one slot
+holding a ring of its last arrival times and a ring of recent content
+fingerprints, so memory is fixed at MAX_TRACKED_USERS slots and each
+message costs O(1). Slots are kept in least-recently-seen order; idle ones
+are freed, and the least recent one is reused when all are taken.
+"""
+import os
+import time
+from array import array
+from collections import OrderedDict
+
+from al_rased.core.utils.text import skeleton_stream
+
+FLOOD_MAX_MESSAGES = int(os.getenv("FLOOD_MAX_MESSAGES", "8"))  # Per user within FLOOD_WINDOW
+FLOOD_WINDOW = float(os.getenv("FLOOD_WINDOW", "10"))
+REPEAT_MAX = int(os.getenv("REPEAT_MAX", "3"))  # Same text within REPEAT_WINDOW
+REPEAT_WINDOW = float(os.getenv("REPEAT_WINDOW", "120"))
+MAX_TRACKED_USERS = int(os.getenv("FLOOD_MAX_TRACKED_USERS", "20000"))
+
+REPEAT_SLOTS = 8              # Recent fingerprints kept per user (>= REPEAT_MAX)
+REPEAT_MIN_LENGTH = 20        # Shorter texts ("شكرا", "تم") repeat innocently
+
+# Flagged messages map to this category in both services
+FLOOD_CATEGORY = "سبام"
+
+_EMPTY = float("-inf")
+
+
+class FloodDetector:
+    def __init__(self, max_users: int = MAX_TRACKED_USERS, max_messages: int = FLOOD_MAX_MESSAGES,
+                 window: float = FLOOD_WINDOW, repeat_max: int = REPEAT_MAX,
+                 repeat_window: float = REPEAT_WINDOW, repeat_slots: int = REPEAT_SLOTS):
+        self.max_users = max_users
+        self.max_messages = max_messages
+        self.window = window
+        self.repeat_max = repeat_max
+        self.repeat_window = repeat_window
+        self.repeat_slots = max(repeat_slots, repeat_max)
+        self.idle_seconds = max(window, repeat_window) * 2  # Slots unused this long are freed
+
+        # Slabs, indexed by slot (rings are contiguous per slot)
+        self._times = array("d", [_EMPTY]) * (max_users * max_messages)
+        self._time_head = array("l", [0]) * max_users
+        self._fingerprints = array("q", [0]) * (max_users * self.repeat_slots)
+        self._fingerprint_times = array("d", [_EMPTY]) * (max_users * self.repeat_slots)
+        self._fingerprint_head = array("l", [0]) * max_users
+        self._last_seen = array("d", [_EMPTY]) * max_users
+        self._last_flag = array("d", [_EMPTY]) * max_users
+
+        self._slots = OrderedDict()  # (chat_id, user_id) -> slot, least recently seen first
+        self._free = list(range(max_users - 1, -1, -1))
+        self.stats = {"floods": 0, "repeats": 0, "evicted_idle": 0, "evicted_full": 0}
+
+    # ==================== Slots ====================
+
+    def _slot(self, key) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+            return slot
+        if self._free:
+            slot = self._free.pop()
+        else:
+            _, slot = self._slots.popitem(last=False)
+            self.stats["evicted_full"] += 1
+            self._clear(slot)
+        self._slots[key] = slot
+        return slot
+
+    def _clear(self, slot: int):
+        start = slot * self.max_messages
+        for i in range(start, start + self.max_messages):
+            self._times[i] = _EMPTY
+        start = slot * self.repeat_slots
+        for i in range(start, start + self.repeat_slots):
+            self._fingerprints[i] = 0
+            self._fingerprint_times[i] = _EMPTY
+        self._time_head[slot] = self._fingerprint_head[slot] = 0
+        self._last_flag[slot] = _EMPTY
+
+    def _evict_idle(self, now: float):
+        """Free slots not seen for idle_seconds (they sit at the front)."""
+        while self._slots:
+            key = next(iter(self._slots))
+            slot = self._slots[key]
+            if now - self._last_seen[slot] < self.idle_seconds:
+                return
+            del self._slots[key]
+            self._clear(slot)
+            self._free.append(slot)
+            self.stats["evicted_idle"] += 1
+
+    # ==================== Checks ====================
+
+    def check(self, chat_id: int, user_id: int, text: str, now: float = None) -> dict | None:
+        """Record a message and judge it.
+
+        Returns None, or {"kind": "flood" | "repeat", "first": bool} where
+        first is False while the same burst is still going (the caller can
+        act once per burst).
+        """
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+        slot = self._slot((chat_id, user_id))
+        self._last_seen[slot] = now
+
+        # Flood: after the write, the ring's oldest arrival is max_messages - 1
+        # messages back, so the ring spans the last max_messages messages
+        start = slot * self.max_messages
+        head = self._time_head[slot]
+        self._times[start + head] = now
+        head = self._time_head[slot] = (head + 1) % self.max_messages
+        flooding = now - self._times[start + head] <= self.window
+
+        repeating = False
+        content = skeleton_stream(text)
+        if len(content) >= REPEAT_MIN_LENGTH:
+            fingerprint = hash(content)
+            start = slot * self.repeat_slots
+            seen = 1
+            for i in range(start, start + self.repeat_slots):
+                if self._fingerprints[i] == fingerprint and now - self._fingerprint_times[i] <= self.repeat_window:
+                    seen += 1
+            repeating = seen >= self.repeat_max
+            index = start + self._fingerprint_head[slot]
+            self._fingerprints[index] = fingerprint
+            self._fingerprint_times[index] = now
+            self._fingerprint_head[slot] = (self._fingerprint_head[slot] + 1) % self.repeat_slots
+
+        if not (flooding or repeating):
+            return None
+        kind = "repeat" if repeating else "flood"
+        self.stats[kind + "s"] += 1
+        first = now - self._last_flag[slot] > max(self.window, self.repeat_window)
+        self._last_flag[slot] = now
+        return {"kind": kind, "first": first}
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "tracked": len(self._slots), "capacity": self.max_users}
+
+
+# Singleton instance for the bot (the Telethon monitor keeps its own)
+flood_detector = FloodDetector()
@@ -3,8 +3,10 @@ Detection Handlers - Production Ready
 Monitors messages and detects violations based on enabled categories.
 """
 from telegram import Update, ChatMember
-from telegram.ext import ContextTypes, MessageHandler, filters
-from al_rased.features.detection.engine import DetectionEngine
+from telegram.ext import ContextTypes, MessageHandler, ChatMemberHandler, filters
+from telegram.helpers import escape_markdown
+from al_rased.features.detection.inference_pool import inference_pool
+from al_rased.features.detection.flood import flood_detector, FLOOD_CATEGORY
 from al_rased.core.database import (
     get_group,
     get_group_category_status,
@@ -14,6 +16,13 @@ from al_rased.core.database import (
     save_topic,
     get_topic
 )
+from al_rased.core.admin_cache import admin_directory, is_chat_admin
+from al_rased.core.admission import admission
+from al_rased.core.chat_cache import chat_metadata
+from al_rased.core.outbox import outbox, PRIORITY_WARNING, PRIORITY_GRAY
+from al_rased.core.cache import cache
+from al_rased.core.metrics import metrics
+from al_rased.core.startup import startup
 from al_rased.features.group_settings import schedule_message_delete
 import logging
 import json
@@ -24,10 +33,6 @@ THRESHOLDS_FILE = os.path.join(os.path.dirname(__file__), "thresholds.json")
 _thresholds_cache = None
 _thresholds_mtime = 0
 
-# Cache for admin status (chat_id_user_id -> (is_admin, timestamp))
-_admin_cache = {}
-_ADMIN_CACHE_TTL = 300  # 5 minutes
-
 # Cache for gray samples topic ID
 _gray_topic_id = None
 
@@ -75,28 +80,33 @@ async def send_gray_sample(context, text: str, label: str, confidence: float, so
     
     # Truncate if too long
     text_preview = text[:500] + "..." if len(text) > 500 else text
+    # The preview goes in a code span; a backtick in it would close the span
+    text_preview = text_preview.replace("`", "'")
     
     message = (
         f"🔘 **عينة رمادية للمراجعة**\n\n"
-        f"📍 المصدر: {source_chat}\n"
+        f"📍 المصدر: {escape_markdown(source_chat or '')}\n"
         f"🏷 التصنيف المتوقع: {label}\n"
         f"📈 الثقة: {confidence:.0%}\n\n"
         f"📝 النص:\n`{text_preview}`\n\n"
         f"⚡ يرجى التحقق وإعادة التوسيم إذا لزم الأمر."
     )
     
-    try:
-        await context.bot.send_message(
-            chat_id=training_group_id,
-            message_thread_id=topic_id,
-            text=message,
-            parse_mode="Markdown"
-        )
-        logging.info(f"Sent gray sample to training group: {label} ({confidence:.2f})")
-    except Exception as e:
-        logging.error(f"Failed to send gray sample: {e}")
+    # Queued; bursts are coalesced into one digest message per topic
+    outbox.send_digest(
+        context.bot,
+        training_group_id,
+        message,
+        PRIORITY_GRAY,
+        message_thread_id=topic_id,
+        parse_mode="Markdown"
+    )
+    logging.info(f"Queued gray sample for training group: {label} ({confidence:.2f})")
 
 # Category labels mapping (Already Arabic, just for formatting/emoji)
+# Suffix on the category name when a flood check (not the model or keywords) decided the verdict
+FLOOD_NAMES = {"flood": "إغراق رسائل", "repeat": "تكرار رسالة"}
+
 CATEGORY_NAMES = {
     "احتيال طبي (عرض)": "🏥 احتيال طبي",
     "احتيال طبي (طلب)": "🏥 احتيال طبي (طلب)",
@@ -111,6 +121,14 @@ CATEGORY_NAMES = {
     "غير أخلاقي (طلب)": "🔞 غير أخلاقي (طلب)",
 }
 
+# Gray zone: below a category's threshold by at most GRAY_ZONE_WIDTH (and above GRAY_ZONE_FLOOR)
+GRAY_ZONE_WIDTH = 0.15
+GRAY_ZONE_FLOOR = 0.20
+
+def is_gray_zone(confidence: float, threshold: float) -> bool:
+    """Uncertain verdicts worth a human label (and worth archiving)."""
+    return max(threshold - GRAY_ZONE_WIDTH, GRAY_ZONE_FLOOR) <= confidence < threshold
+
 def get_thresholds():
     """Get thresholds with auto-reload if file changed."""
     global _thresholds_cache, _thresholds_mtime
@@ -143,23 +161,20 @@ def get_thresholds():
     return _thresholds_cache
 
 async def is_user_admin(chat_id: int, user_id: int, context) -> bool:
-    """Check if user is admin in the group with TTL-based caching."""
-    import time
-    cache_key = f"{chat_id}_{user_id}"
-    
-    # Check cache first (with TTL)
-    if cache_key in _admin_cache:
-        cached_value, cached_time = _admin_cache[cache_key]
-        if time.time() - cached_time < _ADMIN_CACHE_TTL:
-            return cached_value
-    
-    try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        is_admin = member.status in [ChatMember.ADMINISTRATOR, ChatMember.OWNER]
-        _admin_cache[cache_key] = (is_admin, time.time())
-        return is_admin
-    except Exception:
-        return False
+    """Check if user is admin in the group (shared per-chat admin list)."""
+    return await is_chat_admin(context.bot, chat_id, user_id)
+
+async def track_admin_changes(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Keep the admin directory in sync with promotions/demotions."""
+    member_update = update.chat_member
+    if not member_update:
+        return
+    new_member = member_update.new_chat_member
+    admin_directory.update_member(
+        member_update.chat.id,
+        new_member.user.id,
+        new_member.status in [ChatMember.ADMINISTRATOR, ChatMember.OWNER]
+    )
 
 async def get_category_display_name(category: str) -> str:
     """Get display name for category (custom or default)."""
@@ -205,57 +220,98 @@ async def monitor_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     chat_id = chat.id
+    metrics.inc("messages", chat_id)
     
     # Skip messages from the LINKED channel only (not any channel)
     # When a channel is linked to a group, messages from that specific channel have sender_chat set
     if message.sender_chat and message.sender_chat.type == "channel":
-        # Get the linked channel ID for this group
-        try:
-            full_chat = await context.bot.get_chat(chat_id)
-            linked_channel_id = getattr(full_chat, 'linked_chat_id', None)
-            
-            # Only skip if this is the linked channel
-            if linked_channel_id and message.sender_chat.id == linked_channel_id:
-                return
-        except Exception:
-            pass  # If we can't get linked chat info, proceed with checking
+        # Get the linked channel ID for this group (cached per chat)
+        metadata = await chat_metadata.get(context.bot, chat_id)
+        linked_channel_id = metadata.get("linked_chat_id")
+        
+        # Only skip if this is the linked channel
+        if linked_channel_id and message.sender_chat.id == linked_channel_id:
+            return
     
     # Skip messages from admins - they are trusted
     if await is_user_admin(chat_id, user.id, context):
         return
     
     # Don't monitor in review group
-    review_group_id = await get_group("review")
+    with metrics.timer("db"):
+        review_group_id = await get_group("review")
     
     if review_group_id and chat_id == review_group_id:
         return
 
     text = update.message.text
     
-    # Detect violation
-    result = DetectionEngine.predict(text)
+    # Flood/repeat check per sender (O(1)); posts of a channel in the group
+    # share one user ID, so key those by the channel
+    sender_id = message.sender_chat.id if message.sender_chat else user.id
+    flood = flood_detector.check(chat_id, sender_id, text)
+    if flood:
+        metrics.inc("flood", flood["kind"])
+    
+    # Detect violation (repeated texts, e.g. spam waves, reuse the cached verdict)
+    verdict_key = inference_pool.verdict_key(text)
+    vip = await admission.is_vip(chat_id)
+    with metrics.timer("predict"):
+        result = await cache.get("verdict", verdict_key)
+        if result is None:
+            if admission.admit(chat_id, vip) is None:
+                async with admission.slot(vip):
+                    result = await inference_pool.predict(text)
+                await cache.set("verdict", verdict_key, result)
+            else:
+                # Shed under load: keyword rules only (not cached, the model may see it later)
+                result = inference_pool.predict_keywords(text)
+    startup.mark("first_verdict")
     label = result["label"]
     confidence = result["confidence"]
+    metrics.inc("detections", label)
+    if "prefilter" in result:
+        metrics.inc("prefilter", result["prefilter"])
+    
+    # Get threshold for this category
+    threshold = get_thresholds().get(label, 0.50)
+    model_violation = label != "طبيعي" and confidence >= threshold
+    admission.record(chat_id, model_violation or bool(flood))
+    
+    # A flood only decides the verdict when the model and keyword rules found
+    # no violation (their category, e.g. a hacking ad sent in a burst, wins)
+    # and flood detection (FLOOD_CATEGORY) is enabled for the group
+    if flood and not model_violation:
+        with metrics.timer("db"):
+            flood_enabled = await is_detection_enabled(chat_id, FLOOD_CATEGORY)
+        if not flood_enabled:
+            flood = None
+        elif not flood["first"]:
+            return  # One warning and report per flood burst (its first flagged message)
+        else:
+            label, confidence = FLOOD_CATEGORY, 1.0
+            threshold = get_thresholds().get(label, 0.50)
+    else:
+        flood = None
     
     # Skip normal messages
     if label == "طبيعي":
         return
     
     # Check if detection is enabled for this group/category FIRST
-    if not await is_detection_enabled(chat_id, label):
-        logging.debug(f"Detection disabled for {label} in chat {chat_id}")
-        return
-    
-    # Get threshold for this category
-    threshold = get_thresholds().get(label, 0.50)
-    
-    # Define gray zone: between (threshold - 0.15) and threshold
-    gray_lower = max(threshold - 0.15, 0.20)
+    # (a flood verdict was already checked above)
+    if not flood:
+        with metrics.timer("db"):
+            enabled = await is_detection_enabled(chat_id, label)
+        if not enabled:
+            logging.debug(f"Detection disabled for {label} in chat {chat_id}")
+            return
     
     # Check if this is a gray sample (uncertain)
-    if gray_lower <= confidence < threshold:
-        # Send to training group for relabeling
-        await send_gray_sample(context, text, label, confidence, chat.title or "Unknown")
+    if is_gray_zone(confidence, threshold):
+        # Send to training group for relabeling (dropped first under load)
+        if admission.forward_gray(vip):
+            await send_gray_sample(context, text, label, confidence, chat.title or "Unknown")
         return
     
     # Check if confidence meets threshold
@@ -263,11 +319,13 @@ async def monitor_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Violation Detected!
+    metrics.inc("violations", label)
     
     # Check bot mode
     # If dry_run, we ONLY send report, we do NOT warn or delete
     from al_rased.core.database import get_bot_mode
-    mode = await get_bot_mode()
+    with metrics.timer("db"):
+        mode = await get_bot_mode()
     is_active = mode == "active"
     
     action_taken = "⚠️ رسالة تحذير" if is_active else "🟡 وضع تجريبي (تقرير فقط)"
@@ -275,6 +333,8 @@ async def monitor_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Get localized category name
         category_name = await get_category_display_name(label)
+        if flood:
+            category_name = f"{category_name} ({FLOOD_NAMES[flood['kind']]})"
         
         # Only take action in active mode
         if is_active:
@@ -286,14 +346,21 @@ async def monitor_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"نرجو الالتزام بقوانين المجموعة."
             )
             
-            sent_msg = await update.message.reply_text(
-                warning_msg, 
-                quote=True, 
+            # Schedule auto-delete (if configured for VIP groups) once the warning is sent
+            async def on_warning_sent(sent_msg):
+                await schedule_message_delete(context, chat_id, sent_msg.message_id, label)
+            
+            # Highest-priority lane of the outbound queue (replies to the message)
+            outbox.send_message(
+                context.bot,
+                chat_id,
+                warning_msg,
+                PRIORITY_WARNING,
+                on_sent=on_warning_sent,
+                reply_to_message_id=message.message_id,
+                allow_sending_without_reply=True,
                 parse_mode='Markdown'
             )
-            
-            # Schedule auto-delete if configured for VIP groups
-            await schedule_message_delete(context, chat_id, sent_msg.message_id, label)
         else:
             logging.info(f"Dry Run: Violation detected but no action taken in chat {chat_id}")
         
@@ -320,6 +387,24 @@ async def monitor_messages(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logging.error(f"Failed to process violation: {e}")
 
+async def track_chat_changes(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Keep cached chat metadata fresh on migrations and title changes."""
+    message = update.message
+    if not message:
+        return
+    chat_id = message.chat.id
+    
+    if message.new_chat_title:
+        chat_metadata.update_title(chat_id, message.new_chat_title)
+    
+    # Group -> supergroup migration changes the chat ID
+    migrated_ids = (message.migrate_to_chat_id, message.migrate_from_chat_id)
+    if any(migrated_ids):
+        for cid in (chat_id, *migrated_ids):
+            if cid:
+                chat_metadata.invalidate(cid)
+                admin_directory.invalidate(cid)
+
 def register_detection_handlers(app):
     """Register detection message handler."""
     # Handle text messages in groups, excluding commands (low priority group=1)
@@ -330,4 +415,14 @@ def register_detection_handlers(app):
         ), 
         group=1
     )
+    # Chat title changes and group -> supergroup migrations
+    app.add_handler(
+        MessageHandler(
+            filters.StatusUpdate.NEW_CHAT_TITLE | filters.StatusUpdate.MIGRATE,
+            track_chat_changes
+        ),
+        group=1
+    )
+    # Admin promotions/demotions (requires chat_member in allowed_updates)
+    app.add_handler(ChatMemberHandler(track_admin_changes, ChatMemberHandler.CHAT_MEMBER))
     logging.info("Detection handlers registered.")
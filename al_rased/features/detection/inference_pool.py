@@ -0,0 +1,194 @@
+"""
+Inference Pool - DetectionEngine across worker processes.
+Normalization and keyword rules are pure Python and hold the GIL, so the
+default thread executor tops out at one core. With INFERENCE_WORKERS > 0,
+messages are collected into small batches and sent to N worker processes.
+
+Each worker memory-maps the model file read-only (joblib mmap_mode), so the
+large numpy arrays are shared page cache rather than N private copies.
+Results come back in submission order; a crashed worker pool is respawned
+and the batch retried.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from al_rased.core.startup import startup
+from .engine import DetectionEngine, MODEL_PATH, WARM_UP_TEXT
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))  # 0 = in-process thread pool
+MAX_BATCH_SIZE = 32
+MAX_BATCH_DELAY = 0.005  # Seconds to wait for more messages before dispatching
+MAX_RESTARTS_PER_BATCH = 2
+
+
+def _init_worker(model_path: str, db_keywords: dict):
+    """Worker initializer: map the model read-only and install keywords."""
+    import joblib
+    try:
+        DetectionEngine._model = joblib.load(model_path, mmap_mode="r")
+    except Exception as e:
+        logging.error(f"Inference worker failed to load model: {e}")
+    # Keywords come from the parent; workers never touch the database
+    DetectionEngine._db_keywords = db_keywords
+
+
+def _predict_batch(texts: list) -> list:
+    return DetectionEngine.predict_batch(texts)
+
+
+class InferencePool:
+    def __init__(self, workers: int = INFERENCE_WORKERS, model_path: str = MODEL_PATH,
+                 max_batch: int = MAX_BATCH_SIZE, max_delay: float = MAX_BATCH_DELAY):
+        self.workers = workers
+        self.model_path = model_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._executor = None
+        self._db_keywords = {}
+        self._pending = []  # [(text, future)] waiting to be batched
+        self._flush_handle = None
+        self._tasks = set()
+        self._slots = None  # Caps batches in flight (backpressure)
+        self.stats = {"batches": 0, "messages": 0, "restarts": 0, "fallbacks": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self):
+        """Spawn workers (no-op when workers is 0)."""
+        if self.workers <= 0 or self.running:
+            return
+        try:
+            from al_rased.core.database import get_all_prohibited_keywords_mapping
+            self._db_keywords = await get_all_prohibited_keywords_mapping()
+        except Exception as e:
+            logging.warning(f"Inference pool: could not load keywords from database: {e}")
+        DetectionEngine._db_keywords = self._db_keywords  # For predict_keywords in this process
+        self._slots = asyncio.Semaphore(self.workers * 2)
+        self._spawn()
+        logging.info(f"Inference pool started with {self.workers} worker processes.")
+
+    def _spawn(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_path, self._db_keywords)
+        )
+
+    async def warm_up(self):
+        """Load the model and run a dummy prediction off the event loop.
+        With workers, one dummy batch per worker so every process is spawned
+        and has mapped the model before the first real message. Timings go
+        to the startup timeline.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            if self.running:
+                start = loop.time()
+                await asyncio.gather(*(self._submit([WARM_UP_TEXT]) for _ in range(self.workers)))
+                steps = {"model_load": loop.time() - start}
+            else:
+                steps = await loop.run_in_executor(None, DetectionEngine.warm_up)
+        except Exception as e:
+            logging.error(f"Model warm-up failed: {e}")
+            return
+        for step, seconds in steps.items():
+            startup.record(step, seconds)
+        startup.mark("model_ready")
+        logging.info(f"Model warm-up done at {startup.marks['model_ready']:.2f}s after start.")
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def predict(self, text: str) -> dict:
+        """Predict one message; batched with concurrent callers when workers run."""
+        loop = asyncio.get_running_loop()
+        if not self.running:
+            return await loop.run_in_executor(None, DetectionEngine.predict, text)
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def predict_keywords(self, text: str) -> dict:
+        """Keyword rules only, in this process (cheap enough for the event
+        loop); used for messages shed by admission control."""
+        return DetectionEngine.predict_keywords(text)
+
+    def verdict_key(self, text: str) -> str:
+        """Verdict cache key for a text; changes when the model file or the
+        keywords change (see DetectionEngine.verdict_version)."""
+        return DetectionEngine.verdict_key(text)
+
+    async def predict_batch(self, texts: list) -> list:
+        """Predict a list of messages; results are in input order."""
+        if not self.running:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, DetectionEngine.predict_batch, texts)
+        return await self._submit(texts)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list):
+        try:
+            results = await self._submit([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _submit(self, texts: list) -> list:
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            for _ in range(MAX_RESTARTS_PER_BATCH):
+                executor = self._executor
+                if executor is None:
+                    break
+                try:
+                    results = await loop.run_in_executor(executor, _predict_batch, texts)
+                    self.stats["batches"] += 1
+                    self.stats["messages"] += len(texts)
+                    return results
+                except BrokenProcessPool:
+                    # A worker died (OOM, segfault); replace the whole pool once per failure
+                    if self._executor is executor:
+                        logging.error("Inference worker died, restarting pool")
+                        self.stats["restarts"] += 1
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self._spawn()
+
+        # Pool keeps failing (or is stopping): answer in-process rather than drop messages
+        self.stats["fallbacks"] += 1
+        return await loop.run_in_executor(None, DetectionEngine.predict_batch, texts)
+
+
+# Singleton instance (one per process: bot or monitor)
+inference_pool = InferencePool()
@@ -0,0 +1,323 @@
+"""
+Rule Scanner - one compiled pass over the shared rule file.
+rules.json declares, per category, literals and regexes for offers,
+requests or either, plus polarity cues and safe (question-like) patterns.
+"keywords" are override rules the detection engine acts on; "literals" and
+"regexes" are weaker signals used by the audit and mining scripts.
+
+Everything literal (keywords, literals, cues and one required literal per
+regex) goes into a single Aho-Corasick automaton, so a message is read
+once; a regex is only evaluated when its required literal was seen.
+Patterns are matched against normalize_text output. Literals are matched
+on its skeleton (whitespace, separators and tatweel removed), so "ح ل و ا ج ب"
+and "سك ليف" hit without a regex per spelling; a hit that is not a plain
+substring must start and end on word boundaries.
+"""
+import json
+import os
+import re
+
+from al_rased.core.utils.multi_match import MultiMatcher
+from al_rased.core.utils.text import normalize_text, skeleton, skeleton_stream
+
+try:
+    from re import _constants as _sre, _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_constants as _sre
+    import sre_parse as _sre_parse
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+POLARITIES = {"offer": "عرض", "request": "طلب"}
+BLOCK_KEYS = ("keywords", "literals", "regexes")
+MIN_ANCHOR_LENGTH = 2  # Shorter required literals match too often to be worth it
+
+# normalize_text unifies these; applied to regex sources so rules can be
+# written in plain spelling (regex metacharacters are untouched)
+_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي"})
+
+
+def label_for(category: str, polarity: str = None, polar: bool = True) -> str:
+    """Runtime label of a category: "تهكير" + "offer" -> "تهكير (عرض)"."""
+    if not polar or polarity not in POLARITIES:
+        return category
+    return f"{category} ({POLARITIES[polarity]})"
+
+
+def load_rules(path: str = RULES_FILE) -> dict:
+    """Read and validate a rule file; raises ValueError on a malformed rule."""
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    for category, entry in rules.get("categories", {}).items():
+        polar = entry.get("polar", True)
+        for key, block in entry.items():
+            if key == "polar":
+                continue
+            if key not in POLARITIES and key != "any":
+                raise ValueError(f"{category}: unknown block '{key}'")
+            unknown = set(block) - set(BLOCK_KEYS)
+            if unknown:
+                raise ValueError(f"{category}/{key}: unknown keys {sorted(unknown)}")
+            if block.get("keywords") and polar and key == "any":
+                raise ValueError(f"{category}: keywords need an offer or request block")
+            for pattern in block.get("regexes", []):
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"{category}/{key}: bad regex {pattern!r}: {e}") from e
+    return rules
+
+
+def keyword_rules(rules: dict) -> dict:
+    """{label: [keywords]} in precedence order: offers (and non-polar
+    categories) before requests, then file order."""
+    ordered = []
+    for polarities in (("offer", "any"), ("request",)):
+        for category, entry in rules.get("categories", {}).items():
+            for polarity in polarities:
+                keywords = entry.get(polarity, {}).get("keywords")
+                if keywords:
+                    ordered.append((label_for(category, polarity, entry.get("polar", True)), keywords))
+    return dict(ordered)
+
+
+# ==================== Regex Anchors ====================
+
+def _literal_string(items) -> str | None:
+    """The string a parsed (sub)pattern matches if it is a plain literal."""
+    chars = []
+    for op, av in items:
+        if op is not _sre.LITERAL:
+            return None
+        chars.append(chr(av))
+    return "".join(chars)
+
+
+def _alternatives(items) -> set | None:
+    """Strings matched by a pattern that is a literal or an alternation of literals."""
+    items = list(items)
+    if len(items) == 1 and items[0][0] is _sre.SUBPATTERN:
+        return _alternatives(items[0][1][-1])
+    if len(items) == 1 and items[0][0] is _sre.BRANCH:
+        options = set()
+        for branch in items[0][1][1]:
+            branch_options = _alternatives(branch)
+            if branch_options is None:
+                return None
+            options |= branch_options
+        return options
+    if len(items) == 1 and items[0][0] is _sre.IN:
+        chars = [av for op, av in items[0][1] if op is _sre.LITERAL]
+        return {chr(c) for c in chars} if len(chars) == len(items[0][1]) else None
+    string = _literal_string(items)
+    return {string} if string else None
+
+
+def _required_sets(items) -> list:
+    """Sets of strings of which at least one must occur for a match."""
+    factors = []
+    run = []
+    for op, av in list(items) + [(None, None)]:
+        if op is _sre.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            factors.append({"".join(run)})
+            run = []
+        if op is _sre.SUBPATTERN or op is _sre.BRANCH or op is _sre.IN:
+            options = _alternatives([(op, av)])
+            if options:
+                factors.append(options)
+            elif op is _sre.SUBPATTERN:
+                factors += _required_sets(av[-1])
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT) and av[0] >= 1:
+            factors += _required_sets(av[2])
+    return factors
+
+
+def regex_anchors(pattern: str) -> set | None:
+    """Literals of which one must appear in any text the regex matches,
+    choosing the most selective factor; None if there is no usable one."""
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    best = None
+    for options in _required_sets(parsed):
+        shortest = min(len(o) for o in options)
+        if shortest >= MIN_ANCHOR_LENGTH and (best is None or shortest > min(len(o) for o in best)):
+            best = options
+    return best
+
+
+# ==================== Scanner ====================
+
+class RuleScanner:
+    """Compiled form of a rule file plus optional extra keywords
+    ({label: [keywords]}, e.g. from the database, ranked after the file's)."""
+
+    def __init__(self, rules: dict, extra_keywords: dict = None):
+        entries = []        # literal automaton: (normalized literal, payload)
+        self._regexes = []  # (compiled, "signal" | "safe", (category, polarity) | None, source)
+        anchored = {}       # regex index -> anchor strings
+
+        keywords = keyword_rules(rules)
+        for label, kws in (extra_keywords or {}).items():
+            keywords[label] = keywords.get(label, []) + [k for k in kws if k not in keywords.get(label, [])]
+        for rank, (label, kws) in enumerate(keywords.items()):
+            for order, keyword in enumerate(kws):
+                entries.append(self._entry(keyword, "keyword", (rank, order), label, keyword))
+
+        for category, entry in rules.get("categories", {}).items():
+            for polarity, block in entry.items():
+                if polarity == "polar":
+                    continue
+                for literal in block.get("literals", []):
+                    entries.append(self._entry(literal, "signal", category, polarity, literal))
+                for pattern in block.get("regexes", []):
+                    self._add_regex(pattern, "signal", (category, polarity), entries, anchored)
+
+        for polarity, cues in rules.get("polarity", {}).items():
+            for cue in cues:
+                entries.append(self._entry(cue, "cue", polarity))
+        safe = rules.get("safe", {})
+        for literal in safe.get("literals", []):
+            entries.append(self._entry(literal, "safe", literal))
+        for pattern in safe.get("regexes", []):
+            self._add_regex(pattern, "safe", None, entries, anchored)
+
+        self._polar = {c: e.get("polar", True) for c, e in rules.get("categories", {}).items()}
+        self._always = [i for i in range(len(self._regexes)) if i not in anchored]
+        self.anchored = len(anchored)
+        self._matcher = MultiMatcher(entries)
+
+    @staticmethod
+    def _entry(literal: str, kind: str, *payload) -> tuple:
+        """Automaton entry: the literal's skeleton, with its normalized form
+        last in the payload for the word-boundary check."""
+        normalized = normalize_text(literal).lower()
+        return skeleton_stream(normalized), (kind, *payload, normalized)
+
+    @staticmethod
+    def _hits(matcher, clean_text: str):
+        """(payload, start, stop) per accepted automaton hit on the skeleton
+        of clean_text; start/stop index clean_text. Regex anchors are always
+        accepted (the regex itself decides)."""
+        positions = None  # Only built for texts with at least one hit
+        for end, literal, payload in matcher.finditer(skeleton_stream(clean_text)):
+            if positions is None:
+                positions = skeleton(clean_text)[1]
+            start, stop = positions[end - len(literal) + 1], positions[end] + 1
+            if payload[0] != "anchor" and clean_text[start:stop] != payload[-1]:
+                # Only in the skeleton: reject spans that start or end inside
+                # a word ("بيس كسر" must not read as a keyword)
+                if (start and clean_text[start - 1].isalnum()) or \
+                        (stop < len(clean_text) and clean_text[stop].isalnum()):
+                    continue
+            yield payload, start, stop
+
+    def _add_regex(self, pattern, kind, owner, entries, anchored):
+        source = pattern.translate(_FOLD)
+        index = len(self._regexes)
+        self._regexes.append((re.compile(source, re.IGNORECASE), kind, owner, pattern))
+        anchors = regex_anchors(source)
+        if anchors:
+            anchors = {skeleton_stream(anchor.lower()) for anchor in anchors}
+        if anchors and all(anchors):
+            anchored[index] = anchors
+            for anchor in anchors:
+                entries.append((anchor, ("anchor", index)))
+
+    def first_keyword(self, clean_text: str):
+        """(label, keyword) of the highest-precedence override keyword, or None."""
+        best = None
+        for payload, _, _ in self._hits(self._matcher, clean_text):
+            if payload[0] == "keyword" and (best is None or payload[1] < best[1]):
+                best = payload
+                if best[1] == (0, 0):
+                    break
+        return (best[2], best[3]) if best else None
+
+    def scan(self, clean_text: str) -> dict:
+        """Everything the rules say about a normalized message.
+
+        Returns {"keyword": (label, keyword) | None, "keyword_span": (start,
+        stop) in clean_text | None, "polarity": "offer" |
+        "request" | None, "safe": bool, "matches": [{"category", "label",
+        "pattern"}]}, one match per signal pattern (literal hits first), with
+        labels of "any" rules following the message's polarity cues.
+        """
+        best = None
+        span = None
+        signals = []
+        cues = set()
+        safe = False
+        candidates = set(self._always)
+        for payload, start, stop in self._hits(self._matcher, clean_text):
+            kind = payload[0]
+            if kind == "keyword":
+                if best is None or payload[1] < best[1]:
+                    best = payload
+                    span = (start, stop)
+            elif kind == "signal":
+                signals.append((payload[1], payload[2], payload[3]))
+            elif kind == "anchor":
+                candidates.add(payload[1])
+            elif kind == "cue":
+                cues.add(payload[1])
+            else:
+                safe = True
+
+        for index in sorted(candidates):
+            regex, kind, owner, source = self._regexes[index]
+            if kind == "safe" and safe:
+                continue
+            if regex.search(clean_text):
+                if kind == "safe":
+                    safe = True
+                else:
+                    signals.append((owner[0], owner[1], source))
+
+        polarity = None
+        if cues == {"request"}:
+            polarity = "request"
+        elif "offer" in cues:
+            polarity = "offer"
+        matches = []
+        seen = set()
+        for category, block, pattern in signals:
+            if (category, pattern) in seen:
+                continue
+            seen.add((category, pattern))
+            resolved = block if block in POLARITIES else (polarity or "offer")
+            matches.append({
+                "category": category,
+                "label": label_for(category, resolved, self._polar[category]),
+                "pattern": pattern,
+            })
+        return {
+            "keyword": (best[2], best[3]) if best else None,
+            "keyword_span": span,
+            "polarity": polarity,
+            "safe": safe,
+            "matches": matches,
+        }
+
+    def categories(self, clean_text: str) -> list:
+        """Labels with at least one signal or keyword match, keyword first."""
+        result = self.scan(clean_text)
+        labels = [result["keyword"][0]] if result["keyword"] else []
+        for match in result["matches"]:
+            if match["label"] not in labels:
+                labels.append(match["label"])
+        return labels
+
+
+_default_scanner = None
+
+
+def default_scanner() -> RuleScanner:
+    """Scanner over rules.json (compiled on first use)."""
+    global _default_scanner
+    if _default_scanner is None:
+        _default_scanner = RuleScanner(load_rules())
+    return _default_scanner
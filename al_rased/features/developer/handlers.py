@@ -155,6 +155,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
         [InlineKeyboardButton("🧠 الأنظمة الذكية", callback_data="smart_systems")],
         [InlineKeyboardButton("⚙️ وضع التشغيل", callback_data="bot_mode_menu")],
+        [InlineKeyboardButton("📈 أداء النظام", callback_data="metrics_menu")],
         [InlineKeyboardButton("⚡ نظام التفعيل", callback_data="activation_menu")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -891,6 +892,7 @@ async def back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
         [InlineKeyboardButton("🧠 الأنظمة الذكية", callback_data="smart_systems")],
         [InlineKeyboardButton("⚙️ وضع التشغيل", callback_data="bot_mode_menu")],
+        [InlineKeyboardButton("📈 أداء النظام", callback_data="metrics_menu")],
         [InlineKeyboardButton("⚡ نظام التفعيل", callback_data="activation_menu")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -1012,6 +1014,10 @@ def register_developer_handlers(app):
     # Mode settings handlers
     app.add_handler(CallbackQueryHandler(show_mode_settings, pattern="^bot_mode_menu$"))
     app.add_handler(CallbackQueryHandler(handle_mode_change, pattern="^set_mode_"))
+    app.add_handler(CallbackQueryHandler(start_profiling, pattern="^profile_start$"))
+    
+    # Performance metrics
+    app.add_handler(CallbackQueryHandler(show_metrics_screen, pattern="^metrics_menu$"))
 
     logging.info("Developer menu handlers registered.")
 
@@ -1060,6 +1066,7 @@ async def show_mode_settings(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 callback_data="set_mode_dryrun"
             )
         ],
+        [InlineKeyboardButton("🔬 تحليل الأداء (30 ثانية)", callback_data="profile_start")],
         [InlineKeyboardButton("🔙 رجوع", callback_data="developer_start")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -1089,3 +1096,117 @@ async def handle_mode_change(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Refresh view
     await show_mode_settings(update, context)
+
+async def start_profiling(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Profile the running bot for a short window and reply with the hottest functions."""
+    if not is_developer(update.effective_user.id):
+        return
+
+    query = update.callback_query
+    from al_rased.core.profiler import profile_for, is_profiling, DEFAULT_DURATION
+
+    if is_profiling():
+        await query.answer("⏳ يوجد تحليل قيد التشغيل بالفعل", show_alert=True)
+        return
+    await query.answer(f"🔬 بدأ التحليل لمدة {DEFAULT_DURATION} ثانية")
+
+    chat_id = query.message.chat_id
+
+    async def run_profile():
+        try:
+            report = await profile_for(DEFAULT_DURATION, top_n=10, label="bot")
+        except RuntimeError:
+            return
+        lines = [
+            f"🔬 نتيجة التحليل ({report['samples']} عينة خلال {report['duration']:.0f} ثانية)",
+            "",
+            "أعلى الدوال (تراكمي / ذاتي):",
+        ]
+        for name, cumulative, own in report["top"]:
+            lines.append(f"• {cumulative:.2f}s / {own:.2f}s  {name}")
+        lines += ["", f"📁 {report['path']}"]
+        # Plain text: function names contain Markdown characters
+        await context.bot.send_message(chat_id, "\n".join(lines)[:4096])
+
+    # Runs in the background so this chat's other updates aren't held up
+    context.application.create_task(run_profile(), update=update)
+
+# ==================== Metrics Screen ====================
+
+STAGE_NAMES = {
+    "normalize": "تنظيف النص",
+    "keyword": "الكلمات المفتاحية",
+    "inference": "النموذج",
+    "predict": "الكشف (كامل)",
+    "db": "قاعدة البيانات",
+    "telegram_api": "Telegram API",
+    "file_io": "الملفات",
+}
+
+async def show_metrics_screen(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show per-stage latency and per-category counters of this bot process."""
+    if not await check_developer_access(update):
+        return
+
+    query = update.callback_query
+    await query.answer()
+
+    from al_rased.core.metrics import metrics
+
+    lines = ["📈 **أداء النظام**", ""]
+    summary = metrics.summary()
+    if summary:
+        lines.append("⏱ **زمن المراحل** (عدد | متوسط | p95):")
+        for stage, label in STAGE_NAMES.items():
+            s = summary.get(stage)
+            if not s:
+                continue
+            lines.append(
+                f"• {label}: {s['count']} | {s['mean'] * 1000:.1f}ms | {s['p95'] * 1000:.1f}ms"
+            )
+    else:
+        lines.append("لا توجد قياسات بعد.")
+
+    messages = sum(metrics.counters.get("messages", {}).values())
+    violations = sum(metrics.counters.get("violations", {}).values())
+    prefiltered = sum(metrics.counters.get("prefilter", {}).values())
+    shed = sum(metrics.counters.get("shed", {}).values())
+    lines += ["", f"📨 الرسائل: {messages}", f"⏭ بدون النموذج: {prefiltered}", f"🚨 المخالفات: {violations}"]
+    flooded = sum(metrics.counters.get("flood", {}).values())
+    if flooded:
+        lines.append(f"🌊 إغراق/تكرار: {flooded}")
+    if shed:
+        from al_rased.core.admission import admission
+        stats = admission.get_stats()
+        lines.append(f"🪫 تخفيف الحمل: {shed} (المستوى الحالي: {stats['level']}، الانتظار: {stats['backlog']})")
+
+    top = metrics.top("violations", 5)
+    if top:
+        lines.append("")
+        lines.append("🏷 **أكثر الفئات:**")
+        lines += [f"• {category}: {count}" for category, count in top]
+
+    from al_rased.core.startup import startup
+    marks = startup.marks
+    if "model_ready" in marks or "first_verdict" in marks:
+        lines.append("")
+        lines.append("🚀 **الإقلاع:**")
+        if "model_ready" in marks:
+            lines.append(f"• جاهزية النموذج: {marks['model_ready']:.1f}s")
+        if "first_verdict" in marks:
+            lines.append(f"• أول حكم: {marks['first_verdict']:.1f}s")
+
+    keyboard = [
+        [InlineKeyboardButton("🔄 تحديث", callback_data="metrics_menu")],
+        [InlineKeyboardButton("🔙 رجوع", callback_data="back_to_main")]
+    ]
+
+    try:
+        await query.edit_message_text(
+            "\n".join(lines),
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode="Markdown"
+        )
+    except Exception as e:
+        # "Message is not modified" when refreshing with unchanged numbers
+        logging.debug(f"Metrics screen not updated: {e}")
@@ -3,7 +3,7 @@ Group Settings Handlers
 Settings menu for group admins to manage smart detection systems.
 """
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ChatMember
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     ContextTypes, 
     MessageHandler,
@@ -20,9 +20,11 @@ from al_rased.core.database import (
     get_notification_delete_time,
     set_notification_delete_time
 )
+from al_rased.core.admin_cache import is_chat_admin
+from al_rased.core.chat_cache import chat_metadata
+from al_rased.core.delete_scheduler import delete_scheduler
 
 import os
-import asyncio
 DEVELOPER_ID = int(os.getenv("DEVELOPER_ID", "0"))
 
 # ==================== Auto-Delete Helper ====================
@@ -34,15 +36,8 @@ async def schedule_message_delete(context, chat_id: int, message_id: int, catego
     if delete_time <= 0:
         return  # No auto-delete configured
     
-    async def delete_after_delay():
-        await asyncio.sleep(delete_time)
-        try:
-            await context.bot.delete_message(chat_id, message_id)
-        except Exception:
-            pass  # Message might already be deleted
-    
-    # Run in background
-    asyncio.create_task(delete_after_delay())
+    # Persisted and handled by the single background scheduler
+    await delete_scheduler.schedule(chat_id, message_id, delete_time)
 
 # Categories with Arabic names
 # Categories with Arabic names (Keys must match DetectionEngine output)
@@ -60,29 +55,9 @@ CATEGORIES = {
     "غير أخلاقي (طلب)": "🔞 غير أخلاقي (طلب)",
 }
 
-# Cache for admin status (group_id_user_id -> (is_admin, timestamp))
-import time as _time
-admin_cache = {}
-ADMIN_CACHE_TTL = 300  # 5 minutes
-
 async def is_admin(chat_id: int, user_id: int, context: ContextTypes.DEFAULT_TYPE) -> bool:
-    """Check if user is admin in the group with TTL-based caching."""
-    cache_key = f"{chat_id}_{user_id}"
-    
-    # Check cache first (with TTL)
-    if cache_key in admin_cache:
-        cached_value, cached_time = admin_cache[cache_key]
-        if _time.time() - cached_time < ADMIN_CACHE_TTL:
-            return cached_value
-    
-    try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        is_admin_result = member.status in [ChatMember.ADMINISTRATOR, ChatMember.OWNER]
-        admin_cache[cache_key] = (is_admin_result, _time.time())
-        return is_admin_result
-    except Exception as e:
-        logging.error(f"Failed to check admin status: {e}")
-        return False
+    """Check if user is admin in the group (shared per-chat admin list)."""
+    return await is_chat_admin(context.bot, chat_id, user_id)
 
 async def check_admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, group_id: int) -> bool:
     """Check admin access for callback queries. Returns True if allowed."""
@@ -322,11 +297,8 @@ async def back_to_group_settings(update: Update, context: ContextTypes.DEFAULT_T
     
     await query.answer()
     
-    try:
-        chat = await context.bot.get_chat(group_id)
-        chat_title = chat.title
-    except Exception:
-        chat_title = "القروب"
+    metadata = await chat_metadata.get(context.bot, group_id)
+    chat_title = metadata.get("title") or "القروب"
     
     text = f"""
 ⚙️ **إعدادات القروب**
@@ -0,0 +1,187 @@
+"""
+Threshold Calibration Engine
+Computes per-category precision/recall/F-beta curves over out-of-fold
+probabilities with sorted cumulative sums (NumPy, no per-sample loops) and
+picks the threshold that maximizes F-beta while keeping the false-positive
+rate on 'طبيعي' samples under a configured limit.
+
+A detection fires when the top class is the category AND its confidence is
+>= threshold (see detection/handlers.monitor_messages), so a sample only counts as a
+hit for the category it is predicted as.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .oof import NORMAL_LABEL
+
+# Defaults (overridable from scripts/calibrate_thresholds.py)
+DEFAULT_BETA = 1.0
+DEFAULT_MAX_NORMAL_FPR = 0.01
+MIN_THRESHOLD = 0.20
+FALLBACK_THRESHOLD = 0.50
+
+
+def pr_curve(scores: np.ndarray, positive: np.ndarray, negative: np.ndarray = None) -> dict:
+    """Precision/recall at every distinct score, as a threshold sweep.
+
+    scores:   detection score per sample (0 for samples that can never fire)
+    positive: bool mask of samples truly in the category
+    negative: bool mask of samples whose hits count as false positives for
+              the FPR constraint (defaults to ~positive)
+
+    Returns arrays aligned on `thresholds` (descending): for threshold t,
+    everything with score >= t is flagged.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    positive = np.asarray(positive, dtype=bool)
+    negative = ~positive if negative is None else np.asarray(negative, dtype=bool)
+
+    order = np.argsort(-scores, kind="stable")
+    s = scores[order]
+    tp = np.cumsum(positive[order])
+    fp = np.cumsum(~positive[order])
+    neg_hits = np.cumsum(negative[order])
+
+    # Keep the last index of each run of equal scores (ties flag together)
+    last = np.r_[np.flatnonzero(np.diff(s)), len(s) - 1] if len(s) else np.array([], dtype=int)
+    tp, fp, neg_hits, thresholds = tp[last], fp[last], neg_hits[last], s[last]
+
+    n_pos = max(int(positive.sum()), 1)
+    n_neg = max(int(negative.sum()), 1)
+    flagged = tp + fp
+    precision = np.divide(tp, flagged, out=np.zeros(len(tp)), where=flagged > 0)
+
+    return {
+        "thresholds": thresholds,
+        "precision": precision,
+        "recall": tp / n_pos,
+        "fpr": neg_hits / n_neg,
+        "tp": tp,
+        "fp": fp,
+    }
+
+
+def fbeta(precision: np.ndarray, recall: np.ndarray, beta: float = DEFAULT_BETA) -> np.ndarray:
+    """Vectorized F-beta score."""
+    b2 = beta * beta
+    denom = b2 * precision + recall
+    return np.divide((1 + b2) * precision * recall, denom, out=np.zeros(len(denom)), where=denom > 0)
+
+
+def category_scores(probas: np.ndarray, cat_idx: int) -> np.ndarray:
+    """Detection score for one category: its probability where it is the top class, else 0."""
+    pred_idx = probas.argmax(axis=1)
+    return np.where(pred_idx == cat_idx, probas[:, cat_idx], 0.0)
+
+
+def calibrate(
+    probas: np.ndarray,
+    classes: list,
+    true_idx: np.ndarray,
+    beta: float = DEFAULT_BETA,
+    max_normal_fpr: float = DEFAULT_MAX_NORMAL_FPR,
+    min_threshold: float = MIN_THRESHOLD,
+) -> dict:
+    """Pick a threshold per non-normal category.
+
+    Returns {category: {"threshold", "precision", "recall", "fbeta", "normal_fpr"}}.
+    Categories with no positives get FALLBACK_THRESHOLD.
+    """
+    probas = np.asarray(probas)
+    true_idx = np.asarray(true_idx)
+    normal_idx = classes.index(NORMAL_LABEL) if NORMAL_LABEL in classes else -1
+    is_normal = true_idx == normal_idx
+
+    results = {}
+    for cat_idx, cat in enumerate(classes):
+        if cat == NORMAL_LABEL:
+            continue
+
+        positive = true_idx == cat_idx
+        scores = category_scores(probas, cat_idx)
+        curve = pr_curve(scores, positive, is_normal)
+        f = fbeta(curve["precision"], curve["recall"], beta)
+
+        feasible = (
+            (curve["fpr"] <= max_normal_fpr)
+            & (curve["thresholds"] >= min_threshold)
+            & (curve["tp"] > 0)
+        )
+        if not positive.any() or not feasible.any():
+            results[cat] = {"threshold": FALLBACK_THRESHOLD, "precision": 0.0,
+                            "recall": 0.0, "fbeta": 0.0, "normal_fpr": 0.0}
+            continue
+
+        # Best F-beta among feasible points; ties go to the higher threshold (earlier index)
+        best = int(np.flatnonzero(feasible)[np.argmax(f[feasible])])
+        results[cat] = {
+            "threshold": float(curve["thresholds"][best]),
+            "precision": float(curve["precision"][best]),
+            "recall": float(curve["recall"][best]),
+            "fbeta": float(f[best]),
+            "normal_fpr": float(curve["fpr"][best]),
+        }
+    return results
+
+
+def live_flag_rates(labels: np.ndarray, confidences: np.ndarray, thresholds: dict) -> dict:
+    """Fraction of scored live messages each category's threshold would flag.
+
+    labels/confidences are the `prediction`/`confidence` columns from the
+    daily report logs. One sort + searchsorted per category.
+    """
+    labels = np.asarray(labels)
+    confidences = np.asarray(confidences, dtype=np.float64)
+    total = max(len(labels), 1)
+
+    rates = {}
+    for cat, threshold in thresholds.items():
+        conf = np.sort(confidences[labels == cat])
+        flagged = len(conf) - np.searchsorted(conf, threshold, side="left")
+        rates[cat] = flagged / total
+    return rates
+
+
+def load_report_scores(reports_dir: str) -> tuple:
+    """Load (labels, confidences) arrays from the monitor's daily report files."""
+    labels, confidences = [], []
+    if not os.path.isdir(reports_dir):
+        return np.array([], dtype=str), np.array([], dtype=np.float64)
+
+    for filename in sorted(os.listdir(reports_dir)):
+        if not (filename.startswith("report_") and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(reports_dir, filename), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for e in entries:
+            if e.get("prediction") is not None and e.get("confidence") is not None:
+                labels.append(e["prediction"])
+                confidences.append(e["confidence"])
+
+    return np.array(labels, dtype=str), np.array(confidences, dtype=np.float64)
+
+
+def write_thresholds(path: str, thresholds: dict):
+    """Write thresholds.json atomically (temp file + os.replace).
+
+    detection/handlers.get_thresholds() reloads on mtime change, so readers never see
+    a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".thresholds_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(thresholds, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,127 @@
+"""
+Out-of-Fold Probability Cache
+Stores the cross-validated (out-of-fold) probability matrix produced by
+train.py so calibration, mislabel ranking and gray-zone analysis can read it
+directly instead of reloading the model and rescoring the whole dataset.
+
+Sample IDs are the indices into training_data.json, the same IDs used by the
+fix_mislabels_r*.py scripts. A text hash is stored per sample so stale caches
+(dataset edited after training) can be detected.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # al_rased/features/model
+OOF_FILE = os.path.join(BASE_DIR, "oof_probas.npz")
+
+NORMAL_LABEL = "طبيعي"
+
+
+def text_hash(text: str) -> str:
+    """Short stable hash of a sample text (used to detect stale caches)."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()[:12]
+
+
+def save_oof(probas, classes, sample_ids, labels, texts, path: str = OOF_FILE):
+    """Save the out-of-fold matrix with its sample IDs and true labels."""
+    np.savez_compressed(
+        path,
+        probas=np.asarray(probas, dtype=np.float32),
+        classes=np.asarray(classes, dtype=str),
+        sample_ids=np.asarray(sample_ids, dtype=np.int64),
+        labels=np.asarray(labels, dtype=str),
+        text_hashes=np.asarray([text_hash(t) for t in texts], dtype=str),
+    )
+    return path
+
+
+def load_oof(path: str = OOF_FILE) -> dict:
+    """Load the cached OOF matrix. Returns None if it was never produced."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        return {
+            "probas": data["probas"],
+            "classes": [str(c) for c in data["classes"]],
+            "sample_ids": data["sample_ids"],
+            "labels": data["labels"],
+            "text_hashes": data["text_hashes"],
+        }
+
+
+def stale_ids(oof: dict, data: list) -> list:
+    """Return sample IDs whose text changed (or vanished) since the cache was built."""
+    stale = []
+    for sid, h in zip(oof["sample_ids"], oof["text_hashes"]):
+        sid = int(sid)
+        if sid >= len(data) or text_hash(data[sid]["text"]) != h:
+            stale.append(sid)
+    return stale
+
+
+def label_indices(oof: dict) -> np.ndarray:
+    """Column index of each sample's true label (-1 if the label is not a class)."""
+    lookup = {c: i for i, c in enumerate(oof["classes"])}
+    return np.array([lookup.get(str(label), -1) for label in oof["labels"]], dtype=np.int64)
+
+
+def rank_mislabels(oof: dict, min_margin: float = 0.0) -> list:
+    """Rank samples by how strongly the OOF prediction disagrees with the label.
+
+    margin = P(predicted class) - P(labeled class). Larger margins are the
+    most likely mislabels. Returns a list of dicts sorted by margin desc.
+    """
+    probas = oof["probas"]
+    rows = np.arange(len(probas))
+    true_idx = label_indices(oof)
+    pred_idx = probas.argmax(axis=1)
+
+    true_p = np.where(true_idx >= 0, probas[rows, np.maximum(true_idx, 0)], 0.0)
+    pred_p = probas[rows, pred_idx]
+    margin = pred_p - true_p
+
+    mask = (pred_idx != true_idx) & (margin > min_margin)
+    order = np.argsort(-margin[mask], kind="stable")
+    picked = rows[mask][order]
+
+    classes = oof["classes"]
+    return [
+        {
+            "sample_id": int(oof["sample_ids"][i]),
+            "label": str(oof["labels"][i]),
+            "predicted": classes[pred_idx[i]],
+            "confidence": float(pred_p[i]),
+            "margin": float(margin[i]),
+        }
+        for i in picked
+    ]
+
+
+def gray_zone(oof: dict, thresholds: dict, width: float = 0.15, floor: float = 0.20) -> list:
+    """Samples whose top non-normal prediction falls in the gray band.
+
+    Uses the same band as detection/handlers.monitor_messages:
+    max(threshold - width, floor) <= confidence < threshold.
+    """
+    probas = oof["probas"]
+    classes = oof["classes"]
+    pred_idx = probas.argmax(axis=1)
+    conf = probas[np.arange(len(probas)), pred_idx]
+
+    thr = np.array([thresholds.get(c, 0.50) for c in classes], dtype=np.float32)
+    upper = thr[pred_idx]
+    lower = np.maximum(upper - width, floor)
+    is_violation = np.array([c != NORMAL_LABEL for c in classes])[pred_idx]
+
+    mask = is_violation & (conf >= lower) & (conf < upper)
+    return [
+        {
+            "sample_id": int(oof["sample_ids"][i]),
+            "label": str(oof["labels"][i]),
+            "predicted": classes[pred_idx[i]],
+            "confidence": float(conf[i]),
+        }
+        for i in np.flatnonzero(mask)
+    ]
@@ -23,6 +23,7 @@ else:
     sys.path.append(os.getcwd())
 
 from core.utils.text import normalize_text
+from features.model.oof import save_oof, OOF_FILE
 
 
 # Define Base Dir based on script location
@@ -109,6 +110,10 @@ def train_and_evaluate():
     y_true_all = []
     y_pred_all = []
     
+    # Out-of-fold probabilities (row order = df order, columns = sorted classes)
+    all_classes = np.unique(y)
+    oof_probas = np.zeros((len(df), len(all_classes)), dtype=np.float32)
+    
     print("\nRunning Cross-Validation...")
     for train_index, test_index in skf.split(X, y):
         X_train, X_test = X.iloc[train_index], X.iloc[test_index]
@@ -117,6 +122,10 @@ def train_and_evaluate():
         text_clf.fit(X_train, y_train)
         predictions = text_clf.predict(X_test)
         
+        # Map fold classes onto the global class order
+        fold_cols = np.searchsorted(all_classes, text_clf.classes_)
+        oof_probas[np.ix_(test_index, fold_cols)] = text_clf.predict_proba(X_test)
+        
         y_true_all.extend(y_test)
         y_pred_all.extend(predictions)
 
@@ -124,6 +133,11 @@ def train_and_evaluate():
     text_clf.fit(X, y)
     joblib.dump(text_clf, MODEL_FILE)
     print(f"\nModel saved to {MODEL_FILE}")
+    
+    # 4.5 Cache OOF probabilities next to the model (sample IDs = training_data.json indices)
+    raw_texts = [raw_data[i]['text'] for i in df.index]
+    save_oof(oof_probas, all_classes, df.index.to_numpy(), y.to_numpy(), raw_texts)
+    print(f"OOF probabilities saved to {OOF_FILE}")
 
     # 5. Reporting
     report = classification_report(y_true_all, y_pred_all, zero_division=0)
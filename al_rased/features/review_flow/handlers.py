@@ -4,6 +4,7 @@ from telegram import Update
 from telegram.ext import ContextTypes, MessageHandler, filters
 from core.database import get_group, save_topic, get_topic
 from features.data_manager.manager import get_review_data
+from al_rased.core.outbox import outbox, PRIORITY_GRAY
 import logging
 
 DEVELOPER_ID = int(os.getenv("DEVELOPER_ID", "0"))
@@ -63,7 +64,9 @@ async def check_samples(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await status_msg.edit_text(f"✅ تم الانتهاء من هيكلة المواضيع. (تم إنشاء {created_topics} موضوع جديد).\nجاري توزيع العينات...")
 
     # 4. Distribute samples
-    sent_count = 0
+    # Samples go through the outbound queue (lowest priority), which paces
+    # them under the flood limits without holding up detection traffic.
+    pending = []
     for sample in samples:
         category = sample.get("category")
         text_content = sample.get("text")
@@ -78,21 +81,23 @@ async def check_samples(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if category and text_content:
             target_topic_id = await get_topic(category, "positive", review_group_id)
             if target_topic_id:
-                try:
-                    await context.bot.send_message(
-                        chat_id=review_group_id,
-                        message_thread_id=target_topic_id,
-                        text=f"🔍 عينة للمراجعة:\n\n{text_content}"
-                    )
-                    sent_count += 1
-                    await asyncio.sleep(0.5) # Avoid flood limits
-                except Exception as e:
-                     logging.error(f"Failed to send sample: {e}")
+                pending.append(outbox.send_message(
+                    context.bot,
+                    review_group_id,
+                    f"🔍 عينة للمراجعة:\n\n{text_content}",
+                    PRIORITY_GRAY,
+                    message_thread_id=target_topic_id
+                ))
 
-    await context.bot.send_message(
-        chat_id=review_group_id,
-        text=f"✅ تمت عملية الفحص وتوزيع {sent_count} عينة."
-    )
+    # Report once the queue has drained them, without blocking this handler
+    async def report_when_sent():
+        sent_count = sum(1 for result in await asyncio.gather(*pending) if result is not None)
+        await context.bot.send_message(
+            chat_id=review_group_id,
+            text=f"✅ تمت عملية الفحص وتوزيع {sent_count} عينة."
+        )
+
+    context.application.create_task(report_when_sent(), update=update)
 
 def register_review_handlers(app):
     app.add_handler(MessageHandler(filters.Regex(r"^فحص$"), check_samples))
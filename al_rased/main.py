@@ -1,11 +1,19 @@
 import logging
+import os
+
+# First import: start of the startup timeline
+from al_rased.core.startup import startup
 
 # Load environment variables FIRST before any imports
 from dotenv import load_dotenv
 load_dotenv()
 
 # Now import the rest
-from core.bot import create_app
+with startup.importing("telegram"):
+    from telegram import Update
+with startup.importing("core"):
+    from core.bot import create_app
+startup.mark("imports")
 
 # Configure logging
 logging.basicConfig(
@@ -15,8 +23,17 @@ logging.basicConfig(
 
 def main():
     try:
+        if os.getenv("BOT_MODE", "polling") == "webhook":
+            # Ingress here, handler stack sharded across worker processes
+            from core.webhook import run_webhook
+            token = os.getenv("BOT_TOKEN")
+            if not token:
+                raise ValueError("BOT_TOKEN environment variable is not set.")
+            run_webhook(token)
+            return
         app = create_app()
-        app.run_polling()
+        # ALL_TYPES so chat_member updates (admin promotions) reach the bot
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
     except Exception as e:
         logging.error(f"Failed to start bot: {e}")
 
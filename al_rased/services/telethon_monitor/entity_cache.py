@@ -0,0 +1,100 @@
+"""
+Entity Cache - chat and sender info for the Telethon monitor.
+Keeps only what _process_message needs (chat title/kind, sender name/bot
+flag), filled from entities embedded in updates and from the startup
+get_dialogs sweep, so event.get_chat()/get_sender() requests are only
+made on a cold miss.
+
+Memory is bounded (LRU per kind) and entries expire after a TTL.
+"""
+from collections import namedtuple
+
+from telethon.tl.types import Channel, Chat, User
+
+from al_rased.core.ttl_cache import TTLCache
+
+ENTITY_CACHE_TTL = 3600  # 1 hour (names/titles change rarely)
+ENTITY_CACHE_MAX_CHATS = 5000
+ENTITY_CACHE_MAX_USERS = 100000
+
+ChatInfo = namedtuple("ChatInfo", ["id", "title", "is_group"])
+SenderInfo = namedtuple("SenderInfo", ["id", "first_name", "last_name", "username", "bot"])
+
+
+def chat_info(chat_id: int, entity) -> ChatInfo:
+    return ChatInfo(
+        chat_id,
+        getattr(entity, "title", "Private"),
+        isinstance(entity, (Channel, Chat))
+    )
+
+
+def sender_info(entity) -> SenderInfo:
+    # Channels posting as themselves have a title instead of a first name
+    return SenderInfo(
+        entity.id,
+        getattr(entity, "first_name", None) or getattr(entity, "title", None),
+        getattr(entity, "last_name", None),
+        getattr(entity, "username", None),
+        bool(getattr(entity, "bot", False))
+    )
+
+
+class EntityCache:
+    def __init__(self, ttl: int = ENTITY_CACHE_TTL, max_chats: int = ENTITY_CACHE_MAX_CHATS,
+                 max_users: int = ENTITY_CACHE_MAX_USERS):
+        self.stats = {"hits": 0, "misses": 0, "embedded": 0, "evictions": 0}
+        self._chats = TTLCache(ttl, max_chats, self.stats)
+        self._senders = TTLCache(ttl, max_users, self.stats)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "chats": len(self._chats), "senders": len(self._senders)}
+
+    def add_chat(self, chat_id: int, entity) -> ChatInfo:
+        info = chat_info(chat_id, entity)
+        self._chats.set(chat_id, info)
+        return info
+
+    def add_sender(self, entity) -> SenderInfo:
+        info = sender_info(entity)
+        self._senders.set(info.id, info)
+        return info
+
+    def add_dialogs(self, dialogs):
+        """Seed chats from a get_dialogs() result."""
+        for dialog in dialogs:
+            self.add_chat(dialog.id, dialog.entity)
+
+    async def get_chat(self, event) -> ChatInfo:
+        # Entities embedded in the update are free and always fresh
+        entity = event.chat
+        if isinstance(entity, (Channel, Chat, User)):
+            self.stats["embedded"] += 1
+            return self.add_chat(event.chat_id, entity)
+
+        info = self._chats.get(event.chat_id)
+        if info is not None:
+            self.stats["hits"] += 1
+            return info
+
+        self.stats["misses"] += 1
+        entity = await event.get_chat()
+        return self.add_chat(event.chat_id, entity)
+
+    async def get_sender(self, event):
+        """Return SenderInfo for the event's sender, or None if unknown."""
+        entity = event.sender
+        if isinstance(entity, (User, Channel)):
+            self.stats["embedded"] += 1
+            return self.add_sender(entity)
+
+        info = self._senders.get(event.sender_id)
+        if info is not None:
+            self.stats["hits"] += 1
+            return info
+
+        self.stats["misses"] += 1
+        entity = await event.get_sender()
+        if not entity:
+            return None
+        return self.add_sender(entity)
@@ -6,6 +6,7 @@ Saves raw messages per group for future training data.
 """
 import asyncio
 import logging
+import signal
 import sys
 import os
 import time
@@ -13,16 +14,32 @@ import time
 # Add parent paths for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
-from telethon import TelegramClient, events
-from telethon.tl.types import Channel, Chat, ChannelParticipantAdmin, ChannelParticipantCreator
+from al_rased.core.startup import startup
+
+from telethon import TelegramClient, events, utils
+from telethon.tl.types import (
+    ChannelParticipantAdmin, ChannelParticipantCreator,
+    ChannelParticipantsAdmins, ChatParticipantAdmin, ChatParticipantCreator,
+    PeerChannel, UpdateChannelParticipant
+)
 
 from .config import API_ID, API_HASH, PHONE, SESSION_FILE
 from .reports import reports
 from .storage import message_storage
+from .name_filter import BannedNameFilter
+from .entity_cache import EntityCache
+from al_rased.core.admin_cache import AdminDirectory
+from al_rased.core.admission import admission
+from al_rased.core.cache import cache
+from al_rased.core.metrics import metrics, MetricsServer, METRICS_PORT
+from al_rased.core.profiler import profile_for
 
-# Import detection engine
-from features.detection.engine import DetectionEngine
-from features.detection.handlers import get_thresholds
+# Import detection (same package path as the bot handlers, so there is one
+# inference_pool module and singleton)
+from al_rased.features.detection.inference_pool import inference_pool
+from al_rased.features.detection.handlers import get_thresholds, is_gray_zone
+from al_rased.features.detection.flood import FloodDetector, FLOOD_CATEGORY
+startup.mark("imports")
 
 logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -30,6 +47,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Participant types of admins, in basic groups (Chat*) and supergroups (Channel*)
+ADMIN_PARTICIPANTS = (
+    ChatParticipantAdmin, ChatParticipantCreator,
+    ChannelParticipantAdmin, ChannelParticipantCreator,
+)
+
 class TelethonMonitor:
     def __init__(self):
         self.client = TelegramClient(SESSION_FILE, API_ID, API_HASH)
@@ -40,18 +63,30 @@ class TelethonMonitor:
             "skipped_admin": 0, 
             "skipped_bot": 0,
             "saved_messages": 0,
-            "limit_reached": 0
+            "not_sampled": 0
         }
-        self._admin_cache = {}  # Cache admins per chat
+        # Admin list per chat (bounded, TTL), shared with the bot through Redis
+        self._admin_directory = AdminDirectory(shared=cache)
         self._cache_lock = asyncio.Lock()  # Lock for cache updates to prevent race conditions
         self._cache_last_update = 0
-        self._banned_names_cache = {}
+        self._entities = EntityCache()  # Chat/sender info (bounded, TTL)
+        self._name_filter = BannedNameFilter()  # Compiled banned names + per-user verdicts
+        self._flood = FloodDetector()  # Per-(chat, user) rate and repeated-content windows
         self._system_flags_cache = {}
+        self._metrics_server = MetricsServer(metrics, port=METRICS_PORT + 1)
+        self._warm_up_task = None
     
     async def start(self):
         """Start the monitoring service."""
         logger.info("Starting Telethon Monitor...")
         
+        # Redis L2 shared with the bot (admin lists, verdicts); L1 only if unreachable
+        await cache.connect()
+        
+        # Model load + dummy inference in the background while the client connects
+        await inference_pool.start()
+        self._warm_up_task = asyncio.create_task(inference_pool.warm_up())
+        
         await self.client.start(phone=PHONE)
         
         me = await self.client.get_me()
@@ -60,6 +95,15 @@ class TelethonMonitor:
         # Get list of groups
         dialogs = await self.client.get_dialogs()
         groups = [d for d in dialogs if d.is_group or d.is_channel]
+        self._entities.add_dialogs(groups)
+        
+        await self._metrics_server.start()
+        
+        # `kill -USR1 <pid>` profiles the running monitor (see core/profiler.py)
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self._start_profile)
+        except (NotImplementedError, AttributeError):
+            pass  # Not supported on this platform
         logger.info(f"Monitoring {len(groups)} groups/channels")
         
         # Register message handler
@@ -67,14 +111,52 @@ class TelethonMonitor:
         async def handle_new_message(event):
             await self._process_message(event)
         
+        # Keep cached admin lists in sync with promotions/demotions
+        @self.client.on(events.Raw(UpdateChannelParticipant))
+        async def handle_participant_update(update):
+            self._on_participant_update(update)
+        
         self.running = True
         logger.info("Monitor is running. Press Ctrl+C to stop.")
         logger.info("Only processing messages from regular members (not admins/bots)")
-        logger.info("Saving raw messages per group (max 50,000 per group)")
+        logger.info("Archiving raw messages per group (flagged + gray always, the rest sampled)")
         
         # Keep running
         await self.client.run_until_disconnected()
     
+    async def _fetch_chat_admins(self, chat_id: int) -> set:
+        """Fetch the whole admin list of a chat in one request.
+        
+        Telethon ignores the filter for basic (non-super) groups and yields
+        every member, so admins are picked by their participant type.
+        """
+        return {
+            p.id async for p in self.client.iter_participants(
+                chat_id, filter=ChannelParticipantsAdmins
+            )
+            if isinstance(getattr(p, "participant", None), ADMIN_PARTICIPANTS)
+        }
+    
+    def _start_profile(self):
+        async def run():
+            try:
+                report = await profile_for(label="monitor")
+            except RuntimeError:
+                logger.info("Profile already running")
+                return
+            logger.info(f"🔬 Profile written to {report['path']} ({report['samples']} samples)")
+            for name, cumulative, own in report["top"]:
+                logger.info(f"   {cumulative:7.2f}s cum {own:7.2f}s own  {name}")
+        
+        logger.info("🔬 Profiling started")
+        asyncio.get_running_loop().create_task(run())
+    
+    def _on_participant_update(self, update):
+        """Apply an admin promotion/demotion to the cached admin list."""
+        chat_id = utils.get_peer_id(PeerChannel(update.channel_id))
+        is_admin = isinstance(update.new_participant, ADMIN_PARTICIPANTS)
+        self._admin_directory.update_member(chat_id, update.user_id, is_admin)
+    
     async def _is_admin_or_bot(self, chat_id: int, user_id: int, user) -> tuple:
         """Check if user is admin or bot. Returns (is_admin, is_bot)."""
         
@@ -82,25 +164,9 @@ class TelethonMonitor:
         if user and getattr(user, 'bot', False):
             return (False, True)
         
-        # Check admin status (with caching)
-        cache_key = f"{chat_id}_{user_id}"
-        
-        # Check cache with TTL (300 seconds)
-        if cache_key in self._admin_cache:
-            cached_value, cached_time = self._admin_cache[cache_key]
-            if time.time() - cached_time < 300:
-                return (cached_value, False)
-        
-        try:
-            # Get participant info
-            participant = await self.client.get_permissions(chat_id, user_id)
-            is_admin = participant.is_admin or participant.is_creator
-            self._admin_cache[cache_key] = (is_admin, time.time())
-        except Exception as e:
-            # If can't check, assume not admin
-            self._admin_cache[cache_key] = (False, time.time())
-        
-        return (self._admin_cache[cache_key][0], False)
+        # Set lookup in the chat's cached admin list
+        is_admin = await self._admin_directory.is_admin(chat_id, user_id, self._fetch_chat_admins)
+        return (is_admin, False)
     
     async def _process_message(self, event):
         """Process incoming message through AI model."""
@@ -110,17 +176,17 @@ class TelethonMonitor:
             if not text or len(text) < 10:
                 return
             
-            # Get chat info
-            chat = await event.get_chat()
-            chat_title = getattr(chat, 'title', 'Private')
+            # Get chat info (cached; API call only on a cold miss)
+            chat = await self._entities.get_chat(event)
+            chat_title = chat.title
             chat_id = event.chat_id
             
             # Skip private chats - only groups/channels
-            if not isinstance(chat, (Channel, Chat)):
+            if not chat.is_group:
                 return
             
             # Get sender info
-            sender = await event.get_sender()
+            sender = await self._entities.get_sender(event)
             if not sender:
                 return
             
@@ -139,21 +205,7 @@ class TelethonMonitor:
             
             # === ONLY REGULAR MEMBERS REACH HERE ===
             
-            # Save raw message to per-group file
-            saved = message_storage.save_message(
-                chat_id=chat_id,
-                chat_title=chat_title,
-                message_data={
-                    "message_id": event.message.id,
-                    "user_id": user_id,
-                    "text": text[:1000]  # Limit text length
-                }
-            )
-            
-            if saved:
-                self.stats["saved_messages"] += 1
-            else:
-                self.stats["limit_reached"] += 1
+            metrics.inc("messages", chat_id)
             
             # Refresh cache every 60s (with lock to prevent race condition)
             from al_rased.core.database import get_all_banned_names_mapping, get_all_system_flags_mapping
@@ -162,64 +214,117 @@ class TelethonMonitor:
                 async with self._cache_lock:
                     # Double-check after acquiring lock
                     if time.time() - self._cache_last_update > 60:
-                        self._banned_names_cache = await get_all_banned_names_mapping()
-                        self._system_flags_cache = await get_all_system_flags_mapping()
+                        with metrics.timer("db"):
+                            self._name_filter.update(await get_all_banned_names_mapping())
+                            self._system_flags_cache = await get_all_system_flags_mapping()
                         self._cache_last_update = time.time()
             
             # 1. Check Forbidden Names (Priority 1)
-            name_violation_category = None
-            user_full_name = f"{sender.first_name or ''} {sender.last_name or ''} {sender.username or ''}".lower()
+            name_violation_category = self._name_filter.check(
+                user_id, sender.first_name, sender.last_name, sender.username
+            )
             
-            for category, keywords in self._banned_names_cache.items():
-                for keyword in keywords:
-                    if keyword.lower() in user_full_name:
-                        name_violation_category = category
-                        break
-                if name_violation_category:
-                    break
+            # 2. Check Flooding / Repeated Messages (Priority 3, used when the model finds nothing)
+            flood = self._flood.check(chat_id, user_id, text)
+            if flood:
+                metrics.inc("flood", flood["kind"])
             
-            # 2. Run ML Prediction (Priority 2)
+            # 3. Run ML Prediction (Priority 2)
             ml_violation_category = None
             ml_confidence = 0.0
             
             # Only run ML if no name violation (or run both? Usually Name violation is instant ban)
             # Let's run ML anyway for data collection, but name violation takes precedence for action
             
-            # Run AI in executor to prevent blocking
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(None, DetectionEngine.predict, text)
+            # Run AI off the event loop (worker processes when INFERENCE_WORKERS > 0);
+            # under load, non-VIP groups may get the keyword rules only
+            # (repeated texts, e.g. spam waves, reuse the verdict cached by either service)
+            verdict_key = inference_pool.verdict_key(text)
+            vip = await admission.is_vip(chat_id)
+            with metrics.timer("predict"):
+                result = await cache.get("verdict", verdict_key)
+                if result is None:
+                    if admission.admit(chat_id, vip) is None:
+                        async with admission.slot(vip):
+                            result = await inference_pool.predict(text)
+                        await cache.set("verdict", verdict_key, result)
+                    else:
+                        result = inference_pool.predict_keywords(text)
+            startup.mark("first_verdict")
             label = result["label"]
             confidence = result["confidence"]
+            metrics.inc("detections", label)
+            if "prefilter" in result:
+                metrics.inc("prefilter", result["prefilter"])
             
             # Check threshold
             thresholds = get_thresholds()
             threshold = thresholds.get(label, 0.50)
             is_ml_violation = label != "طبيعي" and confidence >= threshold
+            admission.record(chat_id, is_ml_violation or bool(flood))
             
             if is_ml_violation:
                 ml_violation_category = label
                 ml_confidence = confidence
+            
+            # Like the bot: a flood counts once per burst (its first flagged message)
+            flood_violation_category = FLOOD_CATEGORY if flood and flood["first"] else None
 
             # Save prediction to daily report (stats)
-            reports.save_prediction({
-                "chat_id": chat_id,
-                "chat_title": chat_title,
-                "message_id": event.message.id,
-                "user_id": user_id,
-                "text": text[:500],
-                "prediction": label,
-                "confidence": confidence,
-                "above_threshold": is_ml_violation
-            })
+            with metrics.timer("file_io"):
+                reports.save_prediction({
+                    "chat_id": chat_id,
+                    "chat_title": chat_title,
+                    "message_id": event.message.id,
+                    "user_id": user_id,
+                    "text": text[:500],
+                    "prediction": label,
+                    "confidence": confidence,
+                    "above_threshold": is_ml_violation
+                })
             
             self.stats["processed"] += 1
 
             # Determine Final Violation
-            violation_category = name_violation_category or ml_violation_category
-            violation_source = "NAME" if name_violation_category else "AI"
+            violation_category = name_violation_category or ml_violation_category or flood_violation_category
+            if name_violation_category:
+                violation_source = "NAME"
+            elif ml_violation_category:
+                violation_source = "AI"
+            else:
+                violation_source = "FLOOD"
+            
+            # Archive the raw message: model violations and gray-zone messages
+            # always, the rest as a uniform sample per group. NAME/FLOOD hits
+            # are often ordinary text, so they are only sampled (tagged with
+            # their source) and don't skew the training archive
+            if is_ml_violation:
+                stratum = "flagged"
+            elif label != "طبيعي" and is_gray_zone(confidence, threshold):
+                stratum = "gray"
+            else:
+                stratum = "sample"
+            with metrics.timer("file_io"):
+                saved = message_storage.save_message(
+                    chat_id=chat_id,
+                    chat_title=chat_title,
+                    message_data={
+                        "message_id": event.message.id,
+                        "user_id": user_id,
+                        "text": text[:1000]  # Limit text length
+                    },
+                    stratum=stratum,
+                    source=violation_source if violation_category else None
+                )
+            
+            if saved:
+                self.stats["saved_messages"] += 1
+            else:
+                self.stats["not_sampled"] += 1
             
             if violation_category:
                 self.stats["violations"] += 1
+                metrics.inc("violations", violation_category)
                 
                 # Check Action Mode
                 # Default mode: 'publish' (Report Only)
@@ -229,6 +334,8 @@ class TelethonMonitor:
                 log_msg = f"🚨 VIOLATION ({violation_source}) [{violation_category}] in '{chat_title}'"
                 if violation_source == "AI":
                     log_msg += f" ({confidence:.0%})"
+                elif violation_source == "FLOOD":
+                    log_msg += f" ({flood['kind']})"
                 
                 logger.info(f"{log_msg}: {text[:50]}...")
                 
@@ -281,7 +388,10 @@ class TelethonMonitor:
         return {
             **self.stats,
             "report_stats": reports.get_stats(),
-            "storage_stats": message_storage.get_stats()
+            "storage_stats": message_storage.get_stats(),
+            "entity_cache": self._entities.get_stats(),
+            "admission": admission.get_stats(),
+            "flood": self._flood.get_stats()
         }
 
 async def main():
@@ -292,6 +402,9 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Stopping monitor...")
     finally:
+        await inference_pool.stop()
+        await cache.close()
+        message_storage.flush()
         stats = monitor.get_stats()
         logger.info(f"Final stats: {stats}")
 
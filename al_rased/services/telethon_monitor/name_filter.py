@@ -0,0 +1,60 @@
+"""
+Banned Name Filter - screens sender names against the banned-names list.
+All banned names are compiled into one automaton whenever the list changes,
+and each user's verdict is memoized per (user_id, name hash) so repeat
+posters cost a dictionary lookup.
+"""
+from collections import OrderedDict
+
+from al_rased.core.utils.multi_match import MultiMatcher
+
+NAME_VERDICT_CACHE_SIZE = 50000
+
+
+class BannedNameFilter:
+    def __init__(self, max_users: int = NAME_VERDICT_CACHE_SIZE):
+        self.max_users = max_users
+        self._mapping = {}
+        self._matcher = MultiMatcher()
+        self._verdicts = OrderedDict()  # (user_id, name_hash) -> category | None
+        self.stats = {"hits": 0, "misses": 0, "rebuilds": 0}
+
+    def update(self, mapping: dict):
+        """Recompile from {category: [names]} if the list changed."""
+        if mapping == self._mapping:
+            return
+        self._mapping = mapping
+        # Payload keeps category order so the first listed category still wins
+        self._matcher = MultiMatcher(
+            (name.lower(), (order, category))
+            for order, (category, names) in enumerate(mapping.items())
+            for name in names
+        )
+        self._verdicts.clear()
+        self.stats["rebuilds"] += 1
+
+    def match(self, full_name: str):
+        """Return the violated category for a lowercase full name, or None."""
+        best = None
+        for _, _, (order, category) in self._matcher.finditer(full_name):
+            if best is None or order < best[0]:
+                best = (order, category)
+                if order == 0:
+                    break
+        return best[1] if best else None
+
+    def check(self, user_id: int, first_name, last_name, username):
+        """Cached verdict for a sender; recomputed when the user's name changes."""
+        key = (user_id, hash((first_name, last_name, username)))
+        if key in self._verdicts:
+            self._verdicts.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._verdicts[key]
+
+        self.stats["misses"] += 1
+        full_name = f"{first_name or ''} {last_name or ''} {username or ''}".lower()
+        category = self.match(full_name)
+        self._verdicts[key] = category
+        while len(self._verdicts) > self.max_users:
+            self._verdicts.popitem(last=False)
+        return category
@@ -1,36 +1,66 @@
 """
-Message Storage Manager - Saves raw messages per group for future use
+Message Storage Manager - Saves raw messages per group for future use.
+The archive is split into time buckets (STORAGE_BUCKET_DAYS each, one JSON
+list file per group and bucket) and only the newest STORAGE_BUCKETS are
+kept, so it follows current traffic instead of a group's first weeks.
+
+Within a bucket, flagged (model verdict above threshold) and gray-zone
+messages are always kept; other messages go through a uniform reservoir of
+STORAGE_RESERVOIR_SIZE slots (Algorithm R). Files are append-only: a
+sampled entry carries its reservoir slot and supersedes earlier entries of
+that slot, and the file is compacted when the bucket rotates or once
+superseded entries outnumber the reservoir. Memory is a few counters per
+group.
 """
+import glob
 import json
 import os
+import random
 import re
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Storage directory
 MESSAGES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "group_messages")
-MAX_MESSAGES_PER_GROUP = 50000
+RESERVOIR_SIZE = int(os.getenv("STORAGE_RESERVOIR_SIZE", "5000"))  # Sampled messages per group and bucket
+BUCKET_DAYS = int(os.getenv("STORAGE_BUCKET_DAYS", "7"))
+BUCKETS_KEPT = int(os.getenv("STORAGE_BUCKETS", "8"))
+
+# Strata: these are always kept, everything else is sampled
+KEPT_STRATA = ("flagged", "gray")
+
+_BUCKET_FILE = re.compile(r"_(\d{4}-\d{2}-\d{2})\.json$")
 
 class MessageStorage:
-    def __init__(self):
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE, bucket_days: int = BUCKET_DAYS,
+                 buckets_kept: int = BUCKETS_KEPT, rng: random.Random = None):
         os.makedirs(MESSAGES_DIR, exist_ok=True)
-        self._file_cache = {}  # Cache file paths
-        self._count_cache = {}  # Cache message counts
-    
+        self.reservoir_size = reservoir_size
+        self.bucket_days = bucket_days
+        self.buckets_kept = buckets_kept
+        self._rng = rng or random.Random()
+        self._file_cache = {}  # Cache file name prefixes
+        self._buckets = {}  # chat_id -> state of the group's current bucket
+
     def _sanitize_filename(self, name: str) -> str:
         """Create safe filename from group name."""
         # Remove/replace unsafe characters
         safe = re.sub(r'[<>:"/\\|?*]', '_', name)
         safe = safe.strip()[:50]  # Limit length
         return safe if safe else "unknown"
-    
-    def _get_file_path(self, chat_id: int, chat_title: str) -> str:
-        """Get file path for a group."""
+
+    def _get_prefix(self, chat_id: int, chat_title: str) -> str:
+        """File path prefix for a group (bucket and extension are appended)."""
         if chat_id not in self._file_cache:
             safe_title = self._sanitize_filename(chat_title)
-            filename = f"{chat_id}_{safe_title}.json"
-            self._file_cache[chat_id] = os.path.join(MESSAGES_DIR, filename)
+            self._file_cache[chat_id] = os.path.join(MESSAGES_DIR, f"{chat_id}_{safe_title}")
         return self._file_cache[chat_id]
-    
+
+    def _bucket_of(self, now: datetime) -> str:
+        """Start date of the time bucket holding `now`."""
+        days = int(now.timestamp() // 86400)
+        start = days - days % self.bucket_days
+        return datetime.fromtimestamp(start * 86400, timezone.utc).strftime("%Y-%m-%d")
+
     def _load_messages(self, file_path: str) -> list:
         """Load existing messages from file."""
         if os.path.exists(file_path):
@@ -40,49 +70,122 @@ class MessageStorage:
             except:
                 return []
         return []
-    
-    def _get_count(self, chat_id: int, file_path: str) -> int:
-        """Get message count for a group (cached)."""
-        if chat_id not in self._count_cache:
-            messages = self._load_messages(file_path)
-            self._count_cache[chat_id] = len(messages)
-        return self._count_cache[chat_id]
-    
-    def save_message(self, chat_id: int, chat_title: str, message_data: dict) -> bool:
+
+    # ==================== Buckets ====================
+
+    def _open_bucket(self, prefix: str, bucket: str) -> dict:
+        """State of a group's bucket, recovered from its file after a restart."""
+        path = f"{prefix}_{bucket}.json"
+        messages = self._load_messages(path)
+        sampled = [m for m in messages if m.get("slot") is not None]
+        return {
+            "bucket": bucket,
+            "path": path,
+            # Messages offered to the reservoir (a lower bound after a restart)
+            "seen": max([m.get("seen", 0) for m in sampled] + [len({m["slot"] for m in sampled})]),
+            "written": len(sampled),  # Sampled entries in the file, superseded ones included
+        }
+
+    def _current_bucket(self, chat_id: int, chat_title: str, now: datetime) -> dict:
+        bucket = self._bucket_of(now)
+        state = self._buckets.get(chat_id)
+        if state is None or state["bucket"] != bucket:
+            if state is not None:
+                self._compact(state)
+            state = self._buckets[chat_id] = self._open_bucket(self._get_prefix(chat_id, chat_title), bucket)
+            self._rotate(chat_id, bucket)
+        return state
+
+    def _compact(self, state: dict):
+        """Rewrite a bucket file without superseded reservoir entries."""
+        messages = self._load_messages(state["path"])
+        latest = {}
+        for i, m in enumerate(messages):
+            if m.get("slot") is not None:
+                latest[m["slot"]] = i
+        keep = set(latest.values())
+        compacted = [m for i, m in enumerate(messages) if m.get("slot") is None or i in keep]
+        if len(compacted) == len(messages):
+            state["written"] = len(latest)
+            return
+        tmp_path = state["path"] + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("[\n")
+            f.write(",\n".join(json.dumps(m, ensure_ascii=False) for m in compacted))
+            f.write("\n]")
+        os.replace(tmp_path, state["path"])
+        state["written"] = len(latest)
+
+    def _rotate(self, chat_id: int, bucket: str):
+        """Delete bucket files of a group (under any title it had) older
+        than the newest buckets_kept buckets, counting `bucket`."""
+        if self.buckets_kept <= 0:
+            return
+        oldest = datetime.strptime(bucket, "%Y-%m-%d") - timedelta(days=self.bucket_days * (self.buckets_kept - 1))
+        oldest = oldest.strftime("%Y-%m-%d")
+        for path in glob.glob(os.path.join(glob.escape(MESSAGES_DIR), f"{chat_id}_*.json")):
+            match = _BUCKET_FILE.search(path)
+            if match and match.group(1) < oldest:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def flush(self):
+        """Compact every open bucket (call on shutdown)."""
+        for state in self._buckets.values():
+            if state["written"] > min(state["seen"], self.reservoir_size):
+                self._compact(state)
+
+    # ==================== Saving ====================
+
+    def save_message(self, chat_id: int, chat_title: str, message_data: dict,
+                     stratum: str = "sample", now: datetime = None, source: str = None) -> bool:
         """
         Save a message from a regular member.
-        Returns True if saved, False if limit reached.
+        stratum is "flagged" or "gray" (always kept) or "sample" (kept if the
+        reservoir picks it). source names what flagged the message as a
+        violation ("AI", "NAME", "FLOOD"), if anything; it is stored with the
+        entry. Returns True if written, False if not sampled.
         """
-        file_path = self._get_file_path(chat_id, chat_title)
-        
-        # Check limit (approximate, by line count or just skip check if too expensive)
-        # For performance, we can skip precise count check every time, or cache it.
-        # But since we append, we can check file size? 
-        # Let's keep using _get_count but optimize it to not load full JSON.
-        
-        current_count = self._get_count(chat_id, file_path)
-        if current_count >= MAX_MESSAGES_PER_GROUP:
-            return False
-            
+        now = now or datetime.now()
+        state = self._current_bucket(chat_id, chat_title, now)
+
         new_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "message_id": message_data.get("message_id"),
             "user_id": message_data.get("user_id"),
             "text": message_data.get("text"),
             "is_member": True
         }
-        
-        # Append as JSONL (line-delimited JSON) for performance/safety
-        # If file doesn't exist or is empty, start fresh.
-        # Note: Previous format was a JSON list []. Switching to JSONL is better for appending.
-        # But if we must maintain backward compatibility with [], we can't easily append.
-        # HYBRID APPROACH: If file ends with ']', seek back and overwrite ']' with ', entry]'
-        # BUT JSONL is standard for logs. Let's switch to JSONL for new files, 
-        # or just accept list appending overhead?
-        # The prompt implies "Fix logical issues". RMW is a logical performance issue.
-        # Let's stick to the current format but optimize: 
-        # Read file -> if empty "[\n", else seek(-1, 2) to remove ']', write ", \n", then entry, then "]"
-        
+        if source:
+            new_entry["source"] = source
+
+        if stratum in KEPT_STRATA:
+            new_entry["stratum"] = stratum
+        else:
+            # Algorithm R: the n-th message takes a uniformly chosen slot with probability size/n
+            state["seen"] += 1
+            slot = state["seen"] - 1
+            if slot >= self.reservoir_size:
+                slot = self._rng.randrange(state["seen"])
+                if slot >= self.reservoir_size:
+                    return False
+            new_entry["slot"] = slot
+            new_entry["seen"] = state["seen"]
+
+        self._append(state["path"], new_entry)
+
+        if "slot" in new_entry:
+            state["written"] += 1
+            if state["written"] >= 2 * self.reservoir_size:
+                self._compact(state)
+
+        return True
+
+    def _append(self, file_path: str, new_entry: dict):
+        """Append an entry to a JSON list file without rewriting it
+        (overwrite the closing ']' with ', entry]')."""
         mode = 'r+' if os.path.exists(file_path) else 'w'
         try:
             with open(file_path, mode, encoding='utf-8') as f:
@@ -110,12 +213,7 @@ class MessageStorage:
                 f.write("[\n")
                 json.dump(new_entry, f, ensure_ascii=False)
                 f.write("\n]")
-        
-        # Update cache
-        self._count_cache[chat_id] = current_count + 1
-        
-        return True
-    
+
     def get_stats(self) -> dict:
         """Get storage statistics."""
         stats = {}
@@ -0,0 +1 @@
+"""Performance benchmarks for the detection hot path (not run by pytest)."""
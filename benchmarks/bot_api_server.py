@@ -0,0 +1,379 @@
+"""
+Local Bot API Stand-in.
+An HTTP server answering the subset of Bot API methods the project calls
+(sendMessage, createForumTopic, getChat, getChatMember(s), deleteMessage(s),
+...), so a real telegram.Bot pointed at it with base_url can be exercised
+with no network. Like Telegram it enforces a global send rate and per-chat
+send rates (groups ~20/min, private chats ~1/s) and answers excess sends
+with 429 and `retry_after`. Every call is recorded, and latency can be added.
+
+Usage:
+    python -m benchmarks.bot_api_server --port 8081      # serve until Ctrl+C
+    python -m benchmarks.bot_api_server --drain 300 --chats 10 --latency 0.05
+
+--drain queues N messages through the outbound dispatcher against the
+stand-in and reports how long the backlog takes to drain under flood control.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import sys
+import time
+from collections import Counter
+from urllib.parse import parse_qsl
+
+from benchmarks.corpus import SEED
+from al_rased.core.outbox import TokenBucket
+
+BOT_ID = 100000001
+BOT_USER = {"id": BOT_ID, "is_bot": True, "first_name": "Rased", "username": "rased_local_bot"}
+ADMIN_ID = 777000  # Besides the bot, every chat has this admin
+
+GLOBAL_RATE = 30.0  # sends / second per bot
+GROUP_RATE = 20 / 60  # sends / second per group
+PRIVATE_RATE = 1.0  # sends / second per private chat
+CHAT_BURST = 3
+MAX_BODY_SIZE = 1 << 20
+
+# Methods that post into a chat and count against the flood limits
+SEND_METHODS = {"sendmessage", "copymessage", "forwardmessage", "editmessagetext", "createforumtopic"}
+
+_ADMIN_RIGHTS = {
+    "can_be_edited": False, "is_anonymous": False, "can_manage_chat": True,
+    "can_delete_messages": True, "can_manage_video_chats": True, "can_restrict_members": True,
+    "can_promote_members": False, "can_change_info": True, "can_invite_users": True,
+    "can_post_stories": False, "can_edit_stories": False, "can_delete_stories": False,
+    "can_pin_messages": True, "can_manage_topics": True,
+}
+
+
+class APIError(Exception):
+    def __init__(self, code: int, description: str, parameters: dict = None):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.parameters = parameters
+
+
+def _parse_params(headers: dict, body: bytes) -> dict:
+    """Form fields hold JSON-encoded values (strings are sent as-is)."""
+    if headers.get("content-type", "").startswith("application/json"):
+        return json.loads(body) if body else {}
+    params = {}
+    for name, value in parse_qsl(body.decode("utf-8"), keep_blank_values=True):
+        try:
+            params[name] = json.loads(value)
+        except ValueError:
+            params[name] = value
+    return params
+
+
+class BotAPIServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 global_rate: float = GLOBAL_RATE, group_rate: float = GROUP_RATE,
+                 private_rate: float = PRIVATE_RATE, chat_burst: float = CHAT_BURST):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.group_rate = group_rate
+        self.private_rate = private_rate
+        self.chat_burst = chat_burst
+        self.global_bucket = TokenBucket(global_rate, max(global_rate, 1))
+        self._chat_buckets = {}
+        self._message_ids = {}  # chat_id -> itertools.count
+        self._topic_ids = itertools.count(1000)
+        self._random = random.Random(SEED)
+        self._server = None
+        self.calls = Counter()       # method -> requests
+        self.rejected = Counter()    # method -> 429 answers
+        self.sent = []               # (chat_id, method, params) of accepted sends
+        self.deleted = []            # (chat_id, message_id)
+
+    @property
+    def base_url(self) -> str:
+        """For telegram.Bot(token, base_url=...)."""
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Bot API stand-in listening on {self.base_url}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ==================== HTTP ====================
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                verb, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._call(verb, target, headers, body)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _call(self, verb: str, target: str, headers: dict, body: bytes) -> tuple:
+        # /bot<token>/<method>
+        parts = target.split("?")[0].strip("/").split("/")
+        if verb not in ("GET", "POST") or len(parts) != 2 or not parts[0].startswith("bot"):
+            return "404 Not Found", {"ok": False, "error_code": 404, "description": "Not Found"}
+        method = parts[1].lower()
+        self.calls[parts[1]] += 1
+
+        if self.latency > 0:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-spread, spread)))
+        try:
+            handler = getattr(self, f"_api_{method}", None)
+            if handler is None:
+                raise APIError(404, "Not Found: method not found")
+            params = _parse_params(headers, body)
+            if method in SEND_METHODS:
+                self._admit(int(params.get("chat_id", 0)), parts[1])
+            return "200 OK", {"ok": True, "result": handler(params)}
+        except APIError as e:
+            payload = {"ok": False, "error_code": e.code, "description": e.description}
+            if e.parameters:
+                payload["parameters"] = e.parameters
+            return f"{e.code} Error", payload
+
+    # ==================== Flood control ====================
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if chat_id < 0 else self.private_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def _admit(self, chat_id: int, method: str):
+        """Consume send budget or raise 429 with the seconds until it refills."""
+        now = time.monotonic()
+        chat_bucket = self._chat_bucket(chat_id)
+        wait = max(self.global_bucket.wait_time(now), chat_bucket.wait_time(now))
+        if wait > 0:
+            self.rejected[method] += 1
+            retry_after = max(1, math.ceil(wait))
+            raise APIError(429, f"Too Many Requests: retry after {retry_after}", {"retry_after": retry_after})
+        self.global_bucket.consume(now)
+        chat_bucket.consume(now)
+
+    # ==================== Objects ====================
+
+    @staticmethod
+    def _chat(chat_id: int) -> dict:
+        if chat_id > 0:
+            return {"id": chat_id, "type": "private", "first_name": f"user {chat_id}"}
+        return {"id": chat_id, "type": "supergroup", "title": f"group {chat_id}", "is_forum": True}
+
+    def _message(self, chat_id: int, params: dict, message_id: int = None) -> dict:
+        if message_id is None:
+            counter = self._message_ids.setdefault(chat_id, itertools.count(1))
+            message_id = next(counter)
+        message = {"message_id": message_id, "date": int(time.time()), "chat": self._chat(chat_id),
+                   "from": BOT_USER}
+        if params.get("text") is not None:
+            message["text"] = params["text"]
+        if params.get("message_thread_id"):
+            message["message_thread_id"] = params["message_thread_id"]
+            message["is_topic_message"] = True
+        return message
+
+    @staticmethod
+    def _member(chat_id: int, user_id: int) -> dict:
+        user = BOT_USER if user_id == BOT_ID else {"id": user_id, "is_bot": False, "first_name": f"user {user_id}"}
+        if user_id in (BOT_ID, ADMIN_ID):
+            return {"status": "administrator", "user": user, **_ADMIN_RIGHTS}
+        return {"status": "member", "user": user}
+
+    # ==================== Methods ====================
+
+    def _api_getme(self, params):
+        return {**BOT_USER, "can_join_groups": True, "can_read_all_group_messages": False,
+                "supports_inline_queries": False}
+
+    def _api_sendmessage(self, params):
+        chat_id = int(params["chat_id"])
+        self.sent.append((chat_id, "sendMessage", params))
+        return self._message(chat_id, params)
+
+    def _api_copymessage(self, params):
+        chat_id = int(params["chat_id"])
+        self.sent.append((chat_id, "copyMessage", params))
+        return {"message_id": next(self._message_ids.setdefault(chat_id, itertools.count(1)))}
+
+    def _api_forwardmessage(self, params):
+        chat_id = int(params["chat_id"])
+        self.sent.append((chat_id, "forwardMessage", params))
+        return self._message(chat_id, params)
+
+    def _api_editmessagetext(self, params):
+        if "inline_message_id" in params:
+            return True
+        return self._message(int(params["chat_id"]), params, int(params["message_id"]))
+
+    def _api_createforumtopic(self, params):
+        chat_id = int(params["chat_id"])
+        self.sent.append((chat_id, "createForumTopic", params))
+        return {"message_thread_id": next(self._topic_ids), "name": params["name"], "icon_color": 7322096}
+
+    def _api_getchat(self, params):
+        return {
+            **self._chat(int(params["chat_id"])),
+            "accent_color_id": 0,
+            "max_reaction_count": 11,
+            "accepted_gift_types": {"unlimited_gifts": False, "limited_gifts": False, "unique_gifts": False,
+                                    "premium_subscription": False, "gifts_from_channels": False},
+        }
+
+    def _api_getchatmember(self, params):
+        return self._member(int(params["chat_id"]), int(params["user_id"]))
+
+    def _api_getchatadministrators(self, params):
+        chat_id = int(params["chat_id"])
+        return [self._member(chat_id, BOT_ID), self._member(chat_id, ADMIN_ID)]
+
+    def _api_getchatmembercount(self, params):
+        return 100
+
+    def _api_deletemessage(self, params):
+        self.deleted.append((int(params["chat_id"]), int(params["message_id"])))
+        return True
+
+    def _api_deletemessages(self, params):
+        message_ids = params["message_ids"]
+        if not 1 <= len(message_ids) <= 100:
+            raise APIError(400, "Bad Request: too many messages to delete")
+        self.deleted.extend((int(params["chat_id"]), int(m)) for m in message_ids)
+        return True
+
+    def _api_createchatinvitelink(self, params):
+        return {"invite_link": f"https://t.me/+local{abs(int(params['chat_id']))}", "creator": BOT_USER,
+                "creates_join_request": False, "is_primary": False, "is_revoked": False}
+
+    def _api_answercallbackquery(self, params):
+        return True
+
+    def _api_leavechat(self, params):
+        return True
+
+    def _api_setwebhook(self, params):
+        return True
+
+    def _api_deletewebhook(self, params):
+        return True
+
+    def _api_setmycommands(self, params):
+        return True
+
+
+# ==================== Drain benchmark ====================
+
+async def drain(messages: int, chats: int, server: BotAPIServer) -> dict:
+    """Push `messages` sends spread over `chats` groups through an OutboundDispatcher."""
+    from telegram import Bot
+    from telegram.request import HTTPXRequest
+    from al_rased.core.outbox import OutboundDispatcher, MAX_INFLIGHT
+
+    await server.start()
+    bot = Bot("0:local", base_url=server.base_url, request=HTTPXRequest(connection_pool_size=MAX_INFLIGHT))
+    dispatcher = OutboundDispatcher()
+    try:
+        await bot.initialize()
+        await dispatcher.start(bot)
+        start = time.perf_counter()
+        futures = [
+            dispatcher.send_message(bot, -1001000000000 - i % chats, f"backlog message {i}")
+            for i in range(messages)
+        ]
+        results = await asyncio.gather(*futures)
+        elapsed = time.perf_counter() - start
+    finally:
+        await dispatcher.stop(drain_timeout=0)
+        await bot.shutdown()
+        await server.stop()
+    return {
+        "messages": messages,
+        "delivered": sum(1 for r in results if r is not None),
+        "elapsed": elapsed,
+        "rate": messages / elapsed if elapsed else 0.0,
+        "rejected_429": sum(server.rejected.values()),
+        "dispatcher": dict(dispatcher.stats),
+    }
+
+
+async def serve(server: BotAPIServer):
+    await server.start()
+    print(f"Bot API stand-in on {server.base_url} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        print(f"Calls: {dict(server.calls)}  429s: {dict(server.rejected)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latency spread as a fraction")
+    parser.add_argument("--global-rate", type=float, default=GLOBAL_RATE)
+    parser.add_argument("--group-rate", type=float, default=GROUP_RATE)
+    parser.add_argument("--private-rate", type=float, default=PRIVATE_RATE)
+    parser.add_argument("--drain", type=int, metavar="N", help="Measure draining N queued messages")
+    parser.add_argument("--chats", type=int, default=10, help="Groups the drain backlog is spread over")
+    args = parser.parse_args()
+
+    server = BotAPIServer(args.host, 0 if args.drain else args.port, args.latency, args.jitter,
+                          args.global_rate, args.group_rate, args.private_rate)
+    if not args.drain:
+        try:
+            asyncio.run(serve(server))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    logging.getLogger().setLevel(logging.ERROR)  # One flood-control warning per 429 otherwise
+    report = asyncio.run(drain(args.drain, args.chats, server))
+    print(f"Drained {report['delivered']}/{report['messages']} messages over {args.chats} chats "
+          f"in {report['elapsed']:.1f}s ({report['rate']:.1f} msg/s), {report['rejected_429']} x 429")
+    print(f"Dispatcher: {report['dispatcher']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Fixed benchmark corpora.
+Deterministic samples from the labeled training set and the Telethon group
+dumps, so runs on different commits measure the same inputs.
+"""
+import glob
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "al_rased")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+TRAINING_FILE = os.path.join(ROOT, "al_rased", "data", "labeledSamples", "training_data.json")
+TELETHON_DIR = os.path.join(ROOT, "data", "telethonSamplesv2")
+SEED = 42
+
+
+def training_samples(limit: int = 1000) -> list:
+    """[(text, label)] drawn with a fixed seed."""
+    with open(TRAINING_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    samples = [(d["text"], d["label"]) for d in data if d.get("text") and d.get("label")]
+    random.Random(SEED).shuffle(samples)
+    return samples[:limit]
+
+
+def telethon_messages(limit: int = 2000, min_length: int = 10) -> list:
+    """Message dicts (id, text, date, sender_id, chat_id, group_name) from the dumps."""
+    messages = []
+    for path in sorted(glob.glob(os.path.join(TELETHON_DIR, "group_*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                group = json.load(f)
+        except ValueError:
+            continue  # Some dumps were truncated mid-write
+        for m in group.get("messages", []):
+            text = m.get("text") or ""
+            if len(text) >= min_length:
+                messages.append({
+                    **m,
+                    "chat_id": group.get("chat_id"),
+                    "group_name": group.get("group_name", ""),
+                })
+    random.Random(SEED).shuffle(messages)
+    return messages[:limit] if limit else messages
+
+
+def mixed_texts(limit: int = 2000) -> list:
+    """Half labeled samples, half live group traffic."""
+    half = limit // 2
+    texts = [t for t, _ in training_samples(half)]
+    texts += [m["text"] for m in telethon_messages(limit - len(texts))]
+    return texts
@@ -0,0 +1,113 @@
+"""
+Cascade Prefilter Report.
+Sweeps PREFILTER_MAX_LENGTH and reports, for each value:
+- recall cost: labeled violations (training set) the prefilter would answer
+  طبيعي, and how many of those the model alone catches above threshold,
+- skip rate: share of Telethon group messages that skip the model (all
+  messages, as the bot sees them, and 10+ chars, as the monitor does),
+- flagged skips: skipped group messages the model flags above threshold.
+
+Usage:
+    python -m benchmarks.prefilter
+    python -m benchmarks.prefilter --lengths 16 32 48 --no-model --json prefilter.json
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.corpus import telethon_messages, training_samples
+from al_rased.core.utils.text import normalize_text
+from al_rased.features.detection.engine import DetectionEngine
+from al_rased.features.detection.handlers import get_thresholds
+from al_rased.features.detection.prefilter import PREFILTER_MAX_LENGTH, screen
+
+DEFAULT_LENGTHS = (0, 16, 24, 32, 40, 48, 64, 96)
+MONITOR_MIN_LENGTH = 10
+EXAMPLES = 5
+
+
+def model_flags(texts: list) -> list:
+    """Whether the model alone (no keyword rules, no prefilter) flags each text."""
+    DetectionEngine.load_model()
+    model = DetectionEngine._model
+    if model is None or not texts:
+        return [False] * len(texts)
+    thresholds = get_thresholds()
+    probas = model.predict_proba([normalize_text(t) for t in texts])
+    flags = []
+    for row in probas:
+        index = row.argmax()
+        label = model.classes_[index]
+        flags.append(label != "طبيعي" and row[index] >= thresholds.get(label, 0.50))
+    return flags
+
+
+def sweep(lengths, use_model: bool = True) -> dict:
+    violations = [t for t, label in training_samples(None) if label != "طبيعي"]
+    messages = [m["text"] for m in telethon_messages(0, min_length=1)]
+    clean_violations = [normalize_text(t) for t in violations]
+    clean_messages = [normalize_text(t) for t in messages]
+
+    # The model is only needed for texts skipped at the largest length
+    longest = max(lengths)
+    flagged = {}
+    if use_model:
+        for texts, cleaned in ((violations, clean_violations), (messages, clean_messages)):
+            candidates = [t for t, c in zip(texts, cleaned) if screen(c, longest)]
+            flagged.update(zip(candidates, model_flags(candidates)))
+
+    monitor_total = sum(1 for t in messages if len(t) >= MONITOR_MIN_LENGTH)
+    rows = []
+    for length in lengths:
+        missed = [t for t, c in zip(violations, clean_violations) if screen(c, length)]
+        skipped = [t for t, c in zip(messages, clean_messages) if screen(c, length)]
+        row = {
+            "max_length": length,
+            "violations": len(violations),
+            "missed": len(missed),
+            "recall_cost": len(missed) / len(violations),
+            "skip_rate": len(skipped) / len(messages),
+            "monitor_skip_rate": sum(1 for t in skipped if len(t) >= MONITOR_MIN_LENGTH) / monitor_total,
+            "examples": missed[:EXAMPLES],
+        }
+        if use_model:
+            row["missed_model_caught"] = sum(1 for t in missed if flagged[t])
+            row["skipped_model_flagged"] = sum(1 for t in skipped if flagged[t])
+        rows.append(row)
+    return {"messages": len(messages), "default": PREFILTER_MAX_LENGTH, "rows": rows}
+
+
+def print_report(report: dict):
+    print(f"{report['rows'][0]['violations']} labeled violations, {report['messages']:,} group messages "
+          f"(default PREFILTER_MAX_LENGTH={report['default']})")
+    print(f"{'max_len':>7} {'missed':>7} {'recall cost':>11} {'model caught':>12} "
+          f"{'skip all':>8} {'skip 10+':>8} {'skip flagged':>12}")
+    for row in report["rows"]:
+        print(f"{row['max_length']:>7} {row['missed']:>7} {row['recall_cost']:>11.2%} "
+              f"{row.get('missed_model_caught', '-'):>12} {row['skip_rate']:>8.1%} "
+              f"{row['monitor_skip_rate']:>8.1%} {row.get('skipped_model_flagged', '-'):>12}")
+    shown = set()
+    for row in report["rows"]:
+        for text in row["examples"]:
+            if text not in shown:
+                shown.add(text)
+                print(f"   first missed at {row['max_length']}: {text[:80]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=DEFAULT_LENGTHS)
+    parser.add_argument("--no-model", action="store_true", help="Skip the model columns")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = sweep(sorted(args.lengths), use_model=not args.no_model)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+End-to-End Replay Harness.
+Replays recorded group traffic (data/telethonSamplesv2) through the bot's
+monitor_messages handler or the Telethon monitor's _process_message, with
+in-process fakes standing in for Telegram. The fakes record every API call
+and can add latency, so handler throughput, per-stage latency and API calls
+per message can be measured without an account or network.
+
+Messages keep their recorded order and spacing: --speed 1 replays in real
+time, --speed N compresses time N-fold, and the default replays at max
+speed. Idle gaps longer than --max-gap (recorded seconds) are shortened.
+
+Usage:
+    python -m benchmarks.replay                               # bot handler, max speed
+    python -m benchmarks.replay --target monitor --limit 5000
+    python -m benchmarks.replay --speed 60 --latency 0.05 --jitter 0.5
+    python -m benchmarks.replay --target monitor --vip 3 --no-shed
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from telegram import Update
+from telethon.tl.types import Channel, ChatPhotoEmpty, User
+
+from benchmarks.corpus import SEED, telethon_messages
+
+DEFAULT_LIMIT = 2000
+DEFAULT_MAX_GAP = 300.0  # Recorded seconds
+ADMIN_ID = 777000  # Every replayed chat has this single admin
+REVIEW_GROUP_ID = -1009000000001
+REPORTS_GROUP_ID = -1009000000002
+TRAINING_GROUP_ID = -1009000000003
+
+
+# ==================== Fakes ====================
+
+class RecordingAPI:
+    """Counts calls per method and sleeps `latency` (± jitter fraction) in each."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = Counter()
+        self._ids = itertools.count(1)
+        self._random = random.Random(SEED)
+
+    async def _call(self, method: str):
+        self.calls[method] += 1
+        if self.latency > 0:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-spread, spread)))
+
+
+class FakeBot(RecordingAPI):
+    """The subset of telegram.Bot the detection path uses; other methods just succeed."""
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._call("send_message")
+        return SimpleNamespace(message_id=next(self._ids), chat_id=chat_id, text=text)
+
+    async def create_forum_topic(self, chat_id, name, **kwargs):
+        await self._call("create_forum_topic")
+        return SimpleNamespace(message_thread_id=next(self._ids), name=name)
+
+    async def get_chat(self, chat_id, **kwargs):
+        await self._call("get_chat")
+        return SimpleNamespace(id=chat_id, title=None, type="supergroup", linked_chat_id=None, is_forum=False)
+
+    async def get_chat_administrators(self, chat_id, **kwargs):
+        await self._call("get_chat_administrators")
+        return [SimpleNamespace(user=SimpleNamespace(id=ADMIN_ID))]
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        async def call(*args, **kwargs):
+            await self._call(method)
+            return True
+        return call
+
+
+class FakeTelegramClient(RecordingAPI):
+    """Stands in for telethon.TelegramClient (accepts and ignores its arguments)."""
+
+    def __init__(self, *args, latency: float = 0.0, jitter: float = 0.0, **kwargs):
+        super().__init__(latency, jitter)
+        self.entities = {}
+
+    async def iter_participants(self, chat_id, filter=None, **kwargs):
+        await self._call("iter_participants")
+        yield SimpleNamespace(id=ADMIN_ID)
+
+    async def get_entity(self, peer):
+        await self._call("get_entity")
+        return self.entities.get(peer)
+
+    async def delete_messages(self, chat_id, message_ids, **kwargs):
+        await self._call("delete_messages")
+
+    async def edit_permissions(self, chat_id, user_id, **kwargs):
+        await self._call("edit_permissions")
+
+
+class FakeEvent:
+    """A NewMessage event with its chat and sender entities embedded."""
+
+    def __init__(self, client: FakeTelegramClient, chat: Channel, sender: User, message_id: int, text: str):
+        self.client = client
+        self.chat = chat
+        self.sender = sender
+        self.chat_id = int(f"-100{chat.id}")
+        self.sender_id = sender.id
+        self.message = SimpleNamespace(id=message_id, text=text)
+
+    async def get_chat(self):
+        return await self.client.get_entity(self.chat_id)
+
+    async def get_sender(self):
+        return await self.client.get_entity(self.sender_id)
+
+    async def delete(self):
+        await self.client.delete_messages(self.chat_id, [self.message.id])
+
+
+# ==================== Synthetic inputs ====================
+
+def load_stream(limit: int = DEFAULT_LIMIT) -> list:
+    """The most recent `limit` messages across all dumps, in recorded order."""
+    messages = [m for m in telethon_messages(0, min_length=1) if m.get("date") and m.get("chat_id")]
+    for m in messages:
+        m["timestamp"] = datetime.fromisoformat(m["date"]).timestamp()
+    messages.sort(key=lambda m: m["timestamp"])
+    return messages[-limit:] if limit else messages
+
+
+def arrival_offsets(messages: list, speed: float = None, max_gap: float = DEFAULT_MAX_GAP) -> list:
+    """Seconds after start at which each message is delivered (all 0 at max speed)."""
+    if not speed:
+        return [0.0] * len(messages)
+    offsets, offset = [], 0.0
+    for previous, current in zip([None] + messages[:-1], messages):
+        if previous is not None:
+            offset += min(current["timestamp"] - previous["timestamp"], max_gap) / speed
+        offsets.append(offset)
+    return offsets
+
+
+def bot_update(message: dict, update_id: int) -> Update:
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": message["id"],
+            "date": int(message["timestamp"]),
+            "text": message["text"],
+            "chat": {"id": int(f"-100{message['chat_id']}"), "type": "supergroup",
+                     "title": message.get("group_name") or None},
+            "from": {"id": message.get("sender_id") or 1, "is_bot": False,
+                     "first_name": message.get("sender_name") or "Unknown"},
+        },
+    }, None)
+
+
+def telethon_event(message: dict, client: FakeTelegramClient) -> FakeEvent:
+    chat = Channel(id=message["chat_id"], title=message.get("group_name") or "", photo=ChatPhotoEmpty(),
+                   date=None, megagroup=True)
+    sender = User(id=message.get("sender_id") or 1, first_name=message.get("sender_name"))
+    return FakeEvent(client, chat, sender, message["id"], message["text"])
+
+
+# ==================== Replay ====================
+
+async def replay(items: list, offsets: list, handler, dispatch=None) -> dict:
+    """Deliver items at their offsets and run `handler(item)` for each.
+
+    `dispatch(item, coroutine)` decides how the handler coroutine is run
+    (default: its own task). Latency is measured from scheduled arrival to
+    handler completion, so it includes any queueing behind earlier messages.
+    """
+    from al_rased.core.metrics import Histogram
+    latencies = Histogram()
+    tasks = []
+    start = time.perf_counter()
+
+    async def measured(item, arrival):
+        await handler(item)
+        latencies.observe(time.perf_counter() - arrival)
+
+    for item, offset in zip(items, offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        coroutine = measured(item, start + offset)
+        tasks.append(asyncio.create_task(dispatch(item, coroutine) if dispatch else coroutine))
+    await asyncio.gather(*tasks)
+    return {"elapsed": time.perf_counter() - start, "latency": latencies}
+
+
+def _unthrottle(dispatcher):
+    """Lift the outbox rate limits (the fakes have no flood control)."""
+    from al_rased.core.outbox import TokenBucket
+    dispatcher.global_bucket = TokenBucket(1e9, 1e9)
+    dispatcher.chat_rate = dispatcher.chat_burst = 1e9
+    dispatcher._chat_buckets.clear()
+
+
+async def _seed_database(chat_ids: list, mode: str, stop_mode: bool, vip_ids=()):
+    from al_rased.core import database
+    from al_rased.features.detection.handlers import CATEGORY_NAMES
+    await database.init_db()
+    await database.set_group("review", REVIEW_GROUP_ID)
+    await database.set_group("reports", REPORTS_GROUP_ID)
+    await database.set_group("training", TRAINING_GROUP_ID)
+    for chat_id in chat_ids:
+        await database.add_managed_group(chat_id, f"group {chat_id}", 100)
+        if chat_id in vip_ids:
+            await database.set_group_vip(chat_id, True)
+    await database.set_bot_mode(mode)
+    if stop_mode:
+        for category in CATEGORY_NAMES:
+            await database.set_system_flag(f"action_mode:{category}", "stop")
+
+
+def _load_models():
+    """Load the model up front so the first messages don't pay for it."""
+    from al_rased.features.detection.engine import DetectionEngine
+    from features.detection.engine import DetectionEngine as MonitorEngine
+    DetectionEngine.load_model()
+    MonitorEngine.load_model()
+
+
+async def replay_bot(messages: list, offsets: list, args) -> tuple:
+    from al_rased.core.outbox import outbox
+    from al_rased.core.update_processor import ChatOrderedUpdateProcessor
+    from al_rased.features.detection.handlers import monitor_messages
+
+    bot = FakeBot(args.latency, args.jitter)
+    context = SimpleNamespace(bot=bot)
+    processor = ChatOrderedUpdateProcessor(args.concurrency)
+    if not args.real_limits:
+        _unthrottle(outbox)
+    await outbox.start(bot)
+    updates = [bot_update(m, i) for i, m in enumerate(messages, 1)]
+    try:
+        # Same per-chat ordering and concurrency as the running bot
+        result = await replay(
+            updates, offsets, lambda u: monitor_messages(u, context), processor.process_update
+        )
+    finally:
+        await outbox.stop(drain_timeout=args.drain)
+    return result, bot.calls
+
+
+async def replay_monitor(messages: list, offsets: list, args) -> tuple:
+    from al_rased.services.telethon_monitor import monitor as monitor_module
+
+    with patch.object(monitor_module, "TelegramClient", FakeTelegramClient):
+        monitor = monitor_module.TelethonMonitor()
+    client = monitor.client = FakeTelegramClient(latency=args.latency, jitter=args.jitter)
+    # Telethon runs each event handler in its own task, without per-chat ordering
+    events = [telethon_event(m, client) for m in messages]
+    result = await replay(events, offsets, monitor._process_message)
+    return result, client.calls
+
+
+def run(args) -> dict:
+    from al_rased.core.admission import AdmissionController, SHED_BACKLOG
+    from al_rased.core.metrics import metrics
+    from al_rased.features.detection import handlers as handlers_module
+    from al_rased.services.telethon_monitor import monitor as monitor_module, reports as reports_module, storage
+
+    # The monitor module configures INFO logging on import; per-message logs would dominate
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    messages = load_stream(args.limit)
+    offsets = arrival_offsets(messages, args.speed, args.max_gap)
+    chat_ids = sorted({int(f"-100{m['chat_id']}") for m in messages})
+    # --vip N: the N busiest groups get full processing under load
+    volume = Counter(int(f"-100{m['chat_id']}") for m in messages)
+    vip_ids = {chat_id for chat_id, _ in volume.most_common(args.vip)}
+
+    # Feature modules import the database as both al_rased.core.database and core.database
+    import core.database
+    from al_rased.core import database
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            patch.object(database, "DB_PATH", os.path.join(tmp, "replay.db")), \
+            patch.object(core.database, "DB_PATH", database.DB_PATH), \
+            patch.object(storage, "MESSAGES_DIR", os.path.join(tmp, "group_messages")), \
+            patch.object(reports_module, "REPORTS_DIR", os.path.join(tmp, "live_reports")), \
+            patch.object(monitor_module, "message_storage", storage.MessageStorage()), \
+            patch.object(monitor_module, "reports", reports_module.ReportsManager()):
+        asyncio.run(_seed_database(chat_ids, args.mode, args.stop_mode, vip_ids))
+        _load_models()
+        metrics.reset()
+        admission = AdmissionController(shed_backlog=0 if args.no_shed else SHED_BACKLOG)
+
+        target = replay_bot if args.target == "bot" else replay_monitor
+        with patch.object(handlers_module, "admission", admission), \
+                patch.object(monitor_module, "admission", admission):
+            result, calls = asyncio.run(target(messages, offsets, args))
+
+    n = len(messages)
+    latency = result["latency"]
+    total_calls = sum(calls.values())
+    return {
+        "target": args.target,
+        "messages": n,
+        "speed": args.speed or "max",
+        "elapsed": result["elapsed"],
+        "messages_per_second": n / result["elapsed"] if result["elapsed"] else 0.0,
+        "latency": {q: latency.quantile(v) for q, v in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))},
+        "stages": metrics.summary(),
+        "api_calls": dict(calls),
+        "api_calls_per_message": total_calls / n if n else 0.0,
+        "detections": dict(metrics.counters.get("detections", {})),
+        "shed": dict(metrics.counters.get("shed", {})),
+        "admission": admission.get_stats(),
+    }
+
+
+def _ms(seconds: float) -> str:
+    return "inf" if seconds == float("inf") else f"{seconds * 1000:.1f}ms"
+
+
+def print_report(report: dict):
+    print(f"Replayed {report['messages']} messages through {report['target']} "
+          f"at speed {report['speed']} in {report['elapsed']:.2f}s "
+          f"({report['messages_per_second']:,.0f} msg/s)")
+    latency = report["latency"]
+    print(f"Message latency (arrival -> done): p50 {_ms(latency['p50'])}  "
+          f"p95 {_ms(latency['p95'])}  p99 {_ms(latency['p99'])}")
+    print("\nStage            count      p50      p95      p99")
+    for stage, s in sorted(report["stages"].items()):
+        print(f"{stage:<14} {s['count']:>7} {_ms(s['p50']):>8} {_ms(s['p95']):>8} {_ms(s['p99']):>8}")
+    if report["shed"]:
+        admission = report["admission"]
+        print(f"\nShed (admission control, max backlog {admission['max_backlog']}): "
+              + "  ".join(f"{stage} {count}" for stage, count in sorted(report["shed"].items())))
+    print(f"\nAPI calls: {sum(report['api_calls'].values())} "
+          f"({report['api_calls_per_message']:.3f} per message)")
+    for method, count in sorted(report["api_calls"].items(), key=lambda item: -item[1]):
+        print(f"   {method:<26} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("bot", "monitor"), default="bot")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Most recent N messages (0 = all)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Time compression (1 = real time); omit for max speed")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP,
+                        help="Cap on a recorded idle gap, in seconds")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latency spread as a fraction (0.5 = ±50%%)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Bot: concurrent updates")
+    parser.add_argument("--mode", choices=("active", "dry_run"), default="active", help="Bot mode")
+    parser.add_argument("--vip", type=int, default=0, help="Mark the N busiest groups VIP")
+    parser.add_argument("--no-shed", action="store_true", help="Disable admission control load shedding")
+    parser.add_argument("--stop-mode", action="store_true", help="Monitor: delete violations (stop mode)")
+    parser.add_argument("--real-limits", action="store_true", help="Bot: keep the outbox rate limits")
+    parser.add_argument("--drain", type=float, default=30.0, help="Bot: seconds to flush the outbox")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-message INFO logs")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    # Services read credentials at import time; benchmarks never connect
+    for var in ("TELETHON_API_ID", "TELETHON_API_HASH", "TELETHON_PHONE"):
+        os.environ.setdefault(var, "0")
+    sys.exit(main())
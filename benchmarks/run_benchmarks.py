@@ -0,0 +1,254 @@
+"""
+Detection Hot-Path Benchmarks.
+Times normalization, keyword rules, model prediction (single and batch),
+the database gating queries and the monitor's file writers on fixed
+corpora, and compares throughput with a stored JSON baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks                  # run and compare with baseline
+    python -m benchmarks.run_benchmarks --save-baseline  # run and store as the new baseline
+    python -m benchmarks.run_benchmarks --only normalize_text keyword_rules --tolerance 0.3
+
+Exits with status 1 when any benchmark is slower than the baseline by more
+than the tolerance (default 20%). Baselines are machine-specific: record one
+on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from benchmarks.corpus import ROOT, mixed_texts
+
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_TOLERANCE = 0.20
+REPEAT = 3
+CORPUS_SIZE = 2000
+BATCH_SIZE = 32
+
+
+def _best_rate(func, n: int, repeat: int = REPEAT) -> float:
+    """Operations per second of the fastest of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return n / best if best > 0 else float("inf")
+
+
+# ==================== Benchmarks ====================
+
+def bench_normalize_text(ctx):
+    from al_rased.core.utils.text import normalize_text
+    texts = ctx["texts"]
+    return _best_rate(lambda: [normalize_text(t) for t in texts], len(texts))
+
+
+def bench_keyword_rules(ctx):
+    from al_rased.features.detection.engine import DetectionEngine
+    normalized = ctx["normalized"]
+    return _best_rate(lambda: [DetectionEngine._check_keyword_rules(t) for t in normalized], len(normalized))
+
+
+def bench_predict(ctx):
+    from al_rased.features.detection.engine import DetectionEngine
+    if not ctx["model"]:
+        return None
+    texts = ctx["texts"][:500]
+    return _best_rate(lambda: [DetectionEngine.predict(t) for t in texts], len(texts))
+
+
+def bench_predict_batch(ctx):
+    from al_rased.features.detection.engine import DetectionEngine
+    if not ctx["model"]:
+        return None
+    texts = ctx["texts"]
+    batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+    return _best_rate(lambda: [DetectionEngine.predict_batch(b) for b in batches], len(texts))
+
+
+def bench_db_gating(ctx):
+    """The per-message database reads of monitor_messages (review group, gating, mode)."""
+    from al_rased.core import database
+    chat_ids = [-1000 - i for i in range(20)]
+    category = "سبام"
+    n = 300
+
+    async def setup():
+        await database.init_db()
+        await database.set_group("review", -999)
+        for chat_id in chat_ids:
+            await database.add_managed_group(chat_id, f"group {chat_id}", 100)
+        await database.set_group_category_status(chat_ids[0], category, False)
+
+    async def run():
+        for i in range(n):
+            chat_id = chat_ids[i % len(chat_ids)]
+            await database.get_group("review")
+            await database.get_category_status(category)
+            await database.get_managed_group(chat_id)
+            await database.get_group_category_status(chat_id, category)
+            await database.get_bot_mode()
+
+    with patch("al_rased.core.database.DB_PATH", os.path.join(ctx["tmp"], "bench.db")):
+        asyncio.run(setup())
+        return _best_rate(lambda: asyncio.run(run()), n)
+
+
+def bench_save_message(ctx):
+    from al_rased.services.telethon_monitor import storage
+    messages = ctx["messages"]
+    directory = os.path.join(ctx["tmp"], "group_messages")
+
+    def run():
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        with patch.object(storage, "MESSAGES_DIR", directory):
+            store = storage.MessageStorage()
+            for m in messages:
+                store.save_message(m["chat_id"], m["group_name"], {
+                    "message_id": m["id"], "user_id": m.get("sender_id"), "text": m["text"][:1000]
+                })
+
+    return _best_rate(run, len(messages))
+
+
+def bench_save_prediction(ctx):
+    from al_rased.services.telethon_monitor import reports as reports_module
+    messages = ctx["messages"]
+    directory = os.path.join(ctx["tmp"], "live_reports")
+
+    def run():
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        with patch.object(reports_module, "REPORTS_DIR", directory):
+            manager = reports_module.ReportsManager()
+            for m in messages:
+                manager.save_prediction({
+                    "chat_id": m["chat_id"], "chat_title": m["group_name"], "message_id": m["id"],
+                    "user_id": m.get("sender_id"), "text": m["text"][:500],
+                    "prediction": "طبيعي", "confidence": 0.1, "above_threshold": False,
+                })
+
+    return _best_rate(run, len(messages))
+
+
+BENCHMARKS = {
+    "normalize_text": bench_normalize_text,
+    "keyword_rules": bench_keyword_rules,
+    "predict": bench_predict,
+    "predict_batch": bench_predict_batch,
+    "db_gating": bench_db_gating,
+    "save_message": bench_save_message,
+    "save_prediction": bench_save_prediction,
+}
+
+
+# ==================== Baselines ====================
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return [(name, current, baseline, change)] for regressions beyond tolerance."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if current is None or not previous:
+            continue
+        change = current / previous - 1
+        if change < -tolerance:
+            regressions.append((name, current, previous, change))
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_FILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results: dict, path: str = BASELINE_FILE):
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+
+def build_context(tmp: str) -> dict:
+    from al_rased.core.utils.text import normalize_text
+    from al_rased.features.detection.engine import DetectionEngine, MODEL_PATH
+    from benchmarks.corpus import telethon_messages
+    import joblib
+
+    texts = mixed_texts(CORPUS_SIZE)
+    # Hardcoded rules only, so results don't depend on the local database
+    DetectionEngine._db_keywords = {}
+    DetectionEngine._model = joblib.load(MODEL_PATH) if os.path.exists(MODEL_PATH) else None
+    return {
+        "tmp": tmp,
+        "texts": texts,
+        "normalized": [normalize_text(t) for t in texts],
+        "messages": telethon_messages(1000),
+        "model": DetectionEngine._model is not None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run a subset")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed throughput drop vs baseline (0.2 = 20%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = build_context(tmp)
+        for name in names:
+            rate = BENCHMARKS[name](ctx)
+            results[name] = rate
+            shown = "skipped (no model)" if rate is None else f"{rate:,.0f} ops/s"
+            print(f"{name:<18} {shown}")
+
+    if args.output:
+        save_baseline(results, args.output)
+
+    if args.save_baseline:
+        merged = {**load_baseline(args.baseline), **results}
+        save_baseline(merged, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print("No baseline found; run with --save-baseline first.")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, current, previous, change in regressions:
+        print(f"REGRESSION {name}: {current:,.0f} ops/s vs baseline {previous:,.0f} ({change:+.0%})")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.tolerance:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Services read credentials at import time; benchmarks never connect
+    for var in ("TELETHON_API_ID", "TELETHON_API_HASH", "TELETHON_PHONE"):
+        os.environ.setdefault(var, "0")
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Obfuscation-Tolerant Keyword Matching Benchmark.
+Compares two ways of catching keywords split by spaces, separators or
+tatweel ("ح ل و ا ج ب", "س.ك.ل.ي.ف") over the Telethon group dumps:
+- interleaved regexes, as scripts/stress_test.py wrote them: one regex per
+  keyword with a separator class between letters, searched one by one,
+- the skeleton stream: drop separators once, keep a position map, and run
+  one Aho-Corasick pass for all keywords.
+
+Both use the engine's keywords (--literals adds the rule file's signal
+literals) and the same separator set, and report throughput and whether
+they found the same (message, keyword) pairs.
+
+Usage:
+    python -m benchmarks.skeleton_match
+    python -m benchmarks.skeleton_match --limit 20000 --literals --json skeleton.json
+"""
+import argparse
+import json
+import re
+import sys
+import time
+
+from benchmarks.corpus import telethon_messages
+from al_rased.core.utils.multi_match import MultiMatcher
+from al_rased.core.utils.text import SKELETON_SEPARATORS, normalize_text, skeleton_stream
+from al_rased.features.detection.rules import keyword_rules, load_rules
+
+# Everything skeleton() drops, as a regex class (tatweel, zero-width,
+# combining marks and the separator set)
+GAP = "[\\s" + re.escape("".join(sorted(SKELETON_SEPARATORS))) + "\\u0640\\u200b-\\u200f\\u2060\\ufeff\\u0300-\\u036f\\u064b-\\u065f\\u0670]*"
+
+
+def keywords(literals: bool = False) -> list:
+    """[(keyword, skeleton)] for every engine keyword, plus the rule file's
+    signal literals when asked (to show how each approach scales)."""
+    rules = load_rules()
+    words = [k for kws in keyword_rules(rules).values() for k in kws]
+    if literals:
+        for entry in rules["categories"].values():
+            for key, block in entry.items():
+                if key != "polar":
+                    words += block.get("literals", [])
+    pairs = {}
+    for keyword in words:
+        skel = skeleton_stream(normalize_text(keyword).lower())
+        if skel:
+            pairs.setdefault(keyword, skel)
+    return list(pairs.items())
+
+
+def interleaved_regexes(pairs) -> list:
+    return [(keyword, re.compile(GAP.join(re.escape(c) for c in skel))) for keyword, skel in pairs]
+
+
+def run_regexes(texts, regexes) -> set:
+    return {(i, keyword) for i, text in enumerate(texts) for keyword, regex in regexes if regex.search(text)}
+
+
+def run_skeleton(texts, matcher) -> set:
+    hits = set()
+    for i, text in enumerate(texts):
+        for _, _, keyword in matcher.finditer(skeleton_stream(text)):
+            hits.add((i, keyword))
+    return hits
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=0, help="Messages from the dumps (0 = all)")
+    parser.add_argument("--literals", action="store_true", help="Also match the rule file's signal literals")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    texts = [normalize_text(m["text"]) for m in telethon_messages(args.limit, min_length=1)]
+    pairs = keywords(args.literals)
+    (regexes, compile_regex) = timed(interleaved_regexes, pairs)
+    (matcher, compile_matcher) = timed(MultiMatcher, [(skel, keyword) for keyword, skel in pairs])
+    regex_hits, regex_time = timed(run_regexes, texts, regexes)
+    skeleton_hits, skeleton_time = timed(run_skeleton, texts, matcher)
+
+    report = {
+        "messages": len(texts),
+        "keywords": len(pairs),
+        "interleaved_regex": {"seconds": regex_time, "compile": compile_regex, "hits": len(regex_hits),
+                              "messages_per_second": len(texts) / regex_time},
+        "skeleton_automaton": {"seconds": skeleton_time, "compile": compile_matcher, "hits": len(skeleton_hits),
+                               "messages_per_second": len(texts) / skeleton_time},
+        "only_regex": sorted(texts[i][:80] for i, _ in regex_hits - skeleton_hits)[:10],
+        "only_skeleton": sorted(texts[i][:80] for i, _ in skeleton_hits - regex_hits)[:10],
+    }
+
+    print(f"{report['messages']:,} messages, {report['keywords']} keywords")
+    for name in ("interleaved_regex", "skeleton_automaton"):
+        entry = report[name]
+        print(f"   {name:<20} {entry['seconds']:7.2f}s  {entry['messages_per_second']:>9,.0f} msg/s  "
+              f"{entry['hits']} hits  (compile {entry['compile'] * 1000:.1f}ms)")
+    print(f"   speed-up: {regex_time / skeleton_time:.1f}x")
+    print(f"   only regex: {len(regex_hits - skeleton_hits)}  only skeleton: {len(skeleton_hits - regex_hits)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
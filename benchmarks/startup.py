@@ -0,0 +1,108 @@
+"""
+Startup-Time Report.
+Measures, each in a fresh interpreter:
+- the import cost of the bot (core.bot) and of the Telethon monitor, broken
+  down by top-level package (python -X importtime),
+- time to first verdict from a cold process: import the engine, load the
+  model, predict one message.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.corpus import ROOT
+
+APP_DIR = os.path.join(ROOT, "al_rased")
+TARGETS = {
+    "bot": "import core.bot",
+    "monitor": "import services.telethon_monitor.monitor",
+}
+FIRST_VERDICT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from features.detection.engine import DetectionEngine, WARM_UP_TEXT
+imported = time.perf_counter()
+DetectionEngine.load_model()
+loaded = time.perf_counter()
+DetectionEngine.predict(WARM_UP_TEXT)
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "model_load": loaded - imported,
+                  "first_predict": done - loaded, "first_verdict": done - start}))
+"""
+
+
+def _env() -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([ROOT, APP_DIR])}
+    for var, value in (("BOT_TOKEN", "0:startup"), ("TELETHON_API_ID", "0"),
+                       ("TELETHON_API_HASH", "0"), ("TELETHON_PHONE", "0")):
+        env.setdefault(var, value)
+    return env
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Seconds per top-level package, from -X importtime output.
+
+    Each module's own (self) time goes to its top-level package, so a
+    package is charged for its modules but not for what they import.
+    """
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue  # Header line
+        packages[name.strip().split(".")[0]] += int(own) / 1e6
+    return dict(packages)
+
+
+def import_breakdown(statement: str) -> dict:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=APP_DIR, env=_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    packages = parse_importtime(result.stderr)
+    return {"total": sum(packages.values()), "packages": packages}
+
+
+def first_verdict() -> dict:
+    result = subprocess.run([sys.executable, "-c", FIRST_VERDICT_SCRIPT],
+                            cwd=APP_DIR, env=_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=8, help="Packages shown per target")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = {name: import_breakdown(statement) for name, statement in TARGETS.items()}
+    report["first_verdict"] = first_verdict()
+
+    for name in TARGETS:
+        entry = report[name]
+        print(f"{name}: imports {entry['total']:.3f}s")
+        for package, seconds in sorted(entry["packages"].items(), key=lambda i: -i[1])[:args.top]:
+            print(f"   {package:<24} {seconds:.3f}s")
+    fv = report["first_verdict"]
+    print(f"first verdict (cold): {fv['first_verdict']:.3f}s = engine import {fv['import']:.3f}s "
+          f"+ model load {fv['model_load']:.3f}s + first predict {fv['first_predict']:.3f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Differential Verdict Harness.
+Runs a reference and a candidate detection engine over the labeled training
+set and the Telethon dumps, and reports every text where they disagree on
+the label or where confidences differ by more than a tolerance. Each
+disagreement kind comes with a few minimal counterexamples: the shortest
+such texts, then shrunk word by word while the engines still disagree.
+
+An engine is a source tree plus a predict callable. The default compares
+the committed code (git:HEAD, checked out in a temporary worktree) with the
+working tree, both using the working tree's model file, so only code
+changes show up. Each side runs in its own pool of worker processes.
+
+Usage:
+    python -m benchmarks.verdict_diff                          # working tree vs HEAD
+    python -m benchmarks.verdict_diff --reference git:main --workers 8
+    python -m benchmarks.verdict_diff --candidate-function \\
+        al_rased.features.detection.engine:DetectionEngine.predict_batch
+    python -m benchmarks.verdict_diff --limit 5000 --tolerance 1e-3 --output diff.json
+
+Callables whose name ends in "_batch" are given a list of texts. Exits with
+status 1 when any label differs.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.corpus import ROOT, telethon_messages, training_samples
+
+DEFAULT_FUNCTION = "al_rased.features.detection.engine:DetectionEngine.predict"
+DEFAULT_MODEL = os.path.join(ROOT, "al_rased", "features", "model", "classifier.joblib")
+DEFAULT_TOLERANCE = 1e-6
+CHUNK_SIZE = 256
+MAX_EXAMPLES = 3  # Counterexamples kept per disagreement kind
+MAX_SHRINK_ROUNDS = 50
+
+
+# ==================== Workers ====================
+
+_predict = None
+_batched = False
+
+
+def _init_worker(tree: str, function: str, model_path: str, db_keywords: bool):
+    """Import `function` from `tree` (in place of the repository checkout) and load its model."""
+    global _predict, _batched
+    for path in ("", ROOT, os.path.join(ROOT, "al_rased")):
+        while path in sys.path:
+            sys.path.remove(path)
+    sys.path[:0] = [tree, os.path.join(tree, "al_rased")]
+    os.environ.setdefault("TELETHON_API_ID", "0")
+    if not db_keywords:
+        logging.disable(logging.WARNING)  # "Could not load keywords" from trees without a DB
+
+    module_name, _, qualname = function.partition(":")
+    module = importlib.import_module(module_name)
+    if model_path and hasattr(module, "MODEL_PATH"):
+        module.MODEL_PATH = model_path
+    owner, obj = None, module
+    for part in qualname.split("."):
+        owner, obj = obj, getattr(obj, part)
+    if hasattr(owner, "load_model"):
+        owner.load_model()
+    if hasattr(owner, "_db_keywords") and not db_keywords:
+        owner._db_keywords = {}  # Same (hardcoded) rules on both sides
+    _predict = obj
+    _batched = qualname.endswith("_batch")
+
+
+def _predict_chunk(texts: list) -> list:
+    results = _predict(texts) if _batched else [_predict(t) for t in texts]
+    return [(r["label"], float(r["confidence"])) for r in results]
+
+
+class Engine:
+    """One side of the comparison: a pool of workers running one predict callable."""
+
+    def __init__(self, name: str, tree: str, function: str, model_path: str,
+                 workers: int, db_keywords: bool = False):
+        self.name = name
+        self.tree = tree
+        self.function = function
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(tree, function, model_path, db_keywords),
+        )
+
+    async def predict(self, texts: list) -> list:
+        loop = asyncio.get_running_loop()
+        chunks = [texts[i:i + CHUNK_SIZE] for i in range(0, len(texts), CHUNK_SIZE)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _predict_chunk, chunk) for chunk in chunks
+        ))
+        return [r for chunk in results for r in chunk]
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+# ==================== Comparison ====================
+
+def differs(reference: tuple, candidate: tuple, tolerance: float) -> bool:
+    return reference[0] != candidate[0] or abs(reference[1] - candidate[1]) > tolerance
+
+
+def diff_kind(reference: tuple, candidate: tuple) -> str:
+    if reference[0] != candidate[0]:
+        return f"{reference[0]} -> {candidate[0]}"
+    return f"confidence ({reference[0]})"
+
+
+def compare_results(texts: list, reference: list, candidate: list, tolerance: float) -> dict:
+    """Group disagreements by kind; each kind keeps its shortest texts first."""
+    kinds = defaultdict(list)
+    max_delta = 0.0
+    for text, ref, cand in zip(texts, reference, candidate):
+        max_delta = max(max_delta, abs(ref[1] - cand[1]))
+        if differs(ref, cand, tolerance):
+            kinds[diff_kind(ref, cand)].append((text, ref, cand))
+    for entries in kinds.values():
+        entries.sort(key=lambda e: len(e[0]))
+    label_diffs = sum(len(v) for k, v in kinds.items() if not k.startswith("confidence"))
+    return {
+        "compared": len(texts),
+        "label_diffs": label_diffs,
+        "confidence_diffs": sum(len(v) for v in kinds.values()) - label_diffs,
+        "max_confidence_delta": max_delta,
+        "kinds": dict(kinds),
+    }
+
+
+async def shrink(text: str, still_differs, max_rounds: int = MAX_SHRINK_ROUNDS) -> str:
+    """Greedy one-word deletion while the engines still disagree.
+
+    `still_differs(texts)` is awaited with every deletion of a round and
+    returns a bool per text, so each round is one parallel batch.
+    """
+    words = text.split()
+    for _ in range(max_rounds):
+        if len(words) <= 1:
+            break
+        variants = [words[:i] + words[i + 1:] for i in range(len(words))]
+        verdicts = await still_differs([" ".join(v) for v in variants])
+        chosen = next((v for v, d in zip(variants, verdicts) if d), None)
+        if chosen is None:
+            break
+        words = chosen
+    return " ".join(words)
+
+
+# ==================== Inputs ====================
+
+def load_texts(limit: int = 0) -> tuple:
+    """Unique texts from the training set and the dumps; returns (texts, source counts)."""
+    seen = set()
+    texts = []
+    sources = (("training", (t for t, _ in training_samples(None))),
+               ("telethon", (m["text"] for m in telethon_messages(0, min_length=1))))
+    for source, items in sources:
+        for text in items:
+            if text and text not in seen:
+                seen.add(text)
+                texts.append((source, text))
+    if limit:
+        texts = texts[:limit]
+    return [t for _, t in texts], dict(Counter(s for s, _ in texts))
+
+
+def checkout(spec: str, stack: list) -> str:
+    """Resolve a tree spec ("." / a directory / "git:REV") to a directory."""
+    if not spec.startswith("git:"):
+        return os.path.abspath(spec)
+    directory = tempfile.mkdtemp(prefix="verdict_diff_")
+    subprocess.run(["git", "-C", ROOT, "worktree", "add", "--detach", "--quiet", directory, spec[4:]],
+                   check=True)
+    stack.append(directory)
+    return directory
+
+
+def remove_checkouts(stack: list):
+    for directory in stack:
+        subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", directory], check=False)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# ==================== Run ====================
+
+async def run(args) -> dict:
+    texts, sources = load_texts(args.limit)
+    checkouts = []
+    engines = []
+    try:
+        reference = Engine("reference", checkout(args.reference, checkouts),
+                           args.reference_function or args.function,
+                           args.reference_model or args.model, args.workers, args.db_keywords)
+        engines.append(reference)
+        candidate = Engine("candidate", checkout(args.candidate, checkouts),
+                           args.candidate_function or args.function,
+                           args.candidate_model or args.model, args.workers, args.db_keywords)
+        engines.append(candidate)
+
+        start = time.perf_counter()
+        ref_results, cand_results = await asyncio.gather(reference.predict(texts), candidate.predict(texts))
+        elapsed = time.perf_counter() - start
+        report = compare_results(texts, ref_results, cand_results, args.tolerance)
+
+        async def still_differs(variants):
+            refs, cands = await asyncio.gather(reference.predict(variants), candidate.predict(variants))
+            return [differs(r, c, args.tolerance) for r, c in zip(refs, cands)]
+
+        examples = {}
+        for kind, entries in report.pop("kinds").items():
+            kept = []
+            for text, ref, cand in entries[:MAX_EXAMPLES]:
+                minimal = text
+                if not args.no_shrink:
+                    minimal = await shrink(text, still_differs)
+                kept.append({"text": text, "minimal": minimal, "reference": ref, "candidate": cand})
+            examples[kind] = {"count": len(entries), "examples": kept}
+    finally:
+        for engine in engines:
+            engine.close()
+        remove_checkouts(checkouts)
+
+    return {
+        "reference": f"{args.reference} {args.reference_function or args.function}",
+        "candidate": f"{args.candidate} {args.candidate_function or args.function}",
+        "sources": sources,
+        "elapsed": elapsed,
+        "tolerance": args.tolerance,
+        **report,
+        "disagreements": examples,
+    }
+
+
+def print_report(report: dict):
+    print(f"Reference: {report['reference']}")
+    print(f"Candidate: {report['candidate']}")
+    print(f"Compared {report['compared']:,} unique texts {report['sources']} in {report['elapsed']:.1f}s")
+    print(f"Label diffs: {report['label_diffs']}  Confidence diffs (> {report['tolerance']:g}): "
+          f"{report['confidence_diffs']}  Max confidence delta: {report['max_confidence_delta']:.3g}")
+    for kind, entry in sorted(report["disagreements"].items(), key=lambda item: -item[1]["count"]):
+        print(f"\n[{entry['count']}] {kind}")
+        for example in entry["examples"]:
+            ref, cand = example["reference"], example["candidate"]
+            print(f"   {ref[1]:.4f} vs {cand[1]:.4f}  minimal: {example['minimal'][:120]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reference", default="git:HEAD", help='Source tree: ".", a directory or git:REV')
+    parser.add_argument("--candidate", default=ROOT, help="Source tree (default: the working tree)")
+    parser.add_argument("--function", default=DEFAULT_FUNCTION, help="module:qualname of predict")
+    parser.add_argument("--reference-function")
+    parser.add_argument("--candidate-function")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model file used by both sides")
+    parser.add_argument("--reference-model")
+    parser.add_argument("--candidate-model")
+    parser.add_argument("--db-keywords", action="store_true", help="Also apply keywords from the local DB")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes per side")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--limit", type=int, default=0, help="Compare only the first N texts")
+    parser.add_argument("--no-shrink", action="store_true", help="Skip minimizing counterexamples")
+    parser.add_argument("--output", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 1 if report["label_diffs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,6 @@ import json
 import glob
 import re
 import joblib
-import pandas as pd
-import numpy as np
 
 # Setup paths
 sys.path.append(os.path.join(os.getcwd(), 'al_rased'))
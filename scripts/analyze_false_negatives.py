@@ -2,7 +2,6 @@
 import json
 import os
 import sys
-import joblib
 
 # Add parent path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -1,6 +1,5 @@
 
 import json
-import re
 import os
 import sys
 from collections import Counter, defaultdict
@@ -8,42 +7,17 @@ from collections import Counter, defaultdict
 # Add parent path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Define the keywords we are using (merged from previous steps)
-KEYWORDS = {
-    'Academic Cheating': [
-        'حل واجب', 'حل اختبار', 'مشاريع تخرج', 'رسائل ماجستير', 
-        'اعداد بحوث', 'خدمات طلابية', 'اسايمنت', 'كويزات', 'تسميع',
-        'مساعدة في الاختبار', 'أبحاث جامعية', 'امتحانت', 'اساينمنت', 'بروجكت'
-    ],
-    'Medical Fraud': [
-        'سكليف', 'اجازة مرضية', 'تقرير طبي', 'عذر طبي', 'مشهد مرافقة',
-        'مستشفى حكومي', 'منصة صحتي', 'مرضيه معتمده', 'اجازه مرضيه', 'سك ليف'
-    ],
-    'Financial Scams': [
-        'ارباح مضمونة', 'تداول', 'فوركس', 'عملات رقمية', 'ادارة محافظ', 
-        'ربح يومي', 'دخل اضافي', 'توصيات ذهب', 'crypto', 'bitcoin', 'usdt', 
-        'binance', 'investment', 'profit', 'بيتكوين'
-    ],
-    'Hacking': [
-        'تهكير', 'اختراق', 'تجسس', 'سحب صور', 'استرداد حساب',
-        'زيادة متابعين', 'توثيق حساب', 'رشق'
-    ],
-    'Unethical': [
-        'سكس', 'ممحون', 'ديوث', 'قحبة', 'سهرات', 'مساج', 'حشيش', 
-        'مخدرات', 'كبتاجون', 'شبو', 'نودز', 'افلام اباحية'
-    ],
-    'Spam': [
-        'سيرفر ماينكرافت', 'تبادل نشر', 'اشترك في قناتنا', 'ارقام وهمية', 'تفعيل تليجرام'
-    ]
-}
+from al_rased.core.utils.text import normalize_text
+from al_rased.features.detection.rules import default_scanner
+
+# Keywords come from the shared rule file (features/detection/rules.json)
+scanner = default_scanner()
 
 def check_keywords(text):
-    text = text.lower()
-    found = []
-    for cat, kws in KEYWORDS.items():
-        for kw in kws:
-            if kw in text:
-                found.append((cat, kw))
+    """[(label, keyword or pattern)] for every rule the text matches."""
+    result = scanner.scan(normalize_text(text))
+    found = [result['keyword']] if result['keyword'] else []
+    found += [(m['label'], m['pattern']) for m in result['matches']]
     return found
 
 def main():
@@ -77,7 +51,7 @@ def main():
 
         # 2. Check Effectiveness
         for cat, kw in matches:
-            stats_key = f"{cat}:{kw}"
+            stats_key = (cat, kw)
             keyword_stats[stats_key]['total'] += 1
             
             if cat in current_labels:
@@ -101,7 +75,7 @@ def main():
             fp_rate = stats['false_positive'] / stats['total']
             if fp_rate > 0.2:
                 found_issues = True
-                cat, kw = key.split(':')
+                cat, kw = key
                 example = str(stats['fp_samples'][0]['actual_label']) if stats['fp_samples'] else ""
                 print(f"| {kw:<20} | {cat:<15} | {stats['total']:<5} | {stats['false_positive']:<5} | {fp_rate:.0%} | {example}")
 
@@ -4,7 +4,6 @@ import json
 import glob
 import re
 import joblib
-import pandas as pd
 import numpy as np
 
 # Setup paths
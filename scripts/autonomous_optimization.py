@@ -6,11 +6,12 @@ import subprocess
 import sys
 import json
 import os
-import re
 import random
 
 sys.path.append(os.path.join(os.getcwd(), 'al_rased'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.utils.text import normalize_text
+from al_rased.features.detection.rules import default_scanner
 
 DATA_FILE = "al_rased/data/labeledSamples/training_data.json"
 MODEL_FILE = "al_rased/features/model/classifier.joblib"
@@ -19,48 +20,9 @@ SOURCE_DIRS = [
     "/Users/apple/qxqbotv3/data/telethonSamplesv2"
 ]
 
-# Enhanced patterns for weak categories
-ENHANCED_PATTERNS = {
-    "Hacking": [
-        # Real hacking services
-        re.compile(r"اختراق.*?(حساب|سناب|انستا|واتس|تويتر)", re.I),
-        re.compile(r"تهكير.*?(حساب|جوال|هاتف)", re.I),
-        re.compile(r"استرجاع.*?حساب.*?(مسروق|مخترق)", re.I),
-        re.compile(r"تجسس.*?(واتساب|واتس|رسائل)", re.I),
-        re.compile(r"فتح.*?حساب.*?مقفل", re.I),
-        re.compile(r"كشف.*?(موقع|مكان).*?شخص", re.I),
-        re.compile(r"برنامج.*?تجسس", re.I),
-    ],
-    "Spam": [
-        re.compile(r"(شحن|رشق).*?(متابعين|لايكات|مشاهدات)", re.I),
-        re.compile(r"(قسائم|كوبون|كود خصم).*?(نون|امازون|شي ان)", re.I),
-        re.compile(r"اشتراك.*?(نتفلكس|شاهد|سبوتيفاي|يوتيوب)", re.I),
-        re.compile(r"شحن.*?(شدات|جواهر|الماس)", re.I),
-        re.compile(r"متجر.*?الكتروني.*?(سلة|زد)", re.I),
-        re.compile(r"خدمات.*?(تصميم|برمجة|تسويق)", re.I),
-    ],
-    "Financial Scams": [
-        re.compile(r"(قرض|تمويل).*?(بدون|فوري|سريع)", re.I),
-        re.compile(r"تصفير.*?(مديونية|سمة)", re.I),
-        re.compile(r"(راتب|وظيفة).*?بدون.*?عمل", re.I),
-        re.compile(r"ربح.*?(يومي|مضمون|استثمار)", re.I),
-        re.compile(r"تداول.*?(عملات|فوركس|كريبتو)", re.I),
-        re.compile(r"سعوده.*?وهميه", re.I),
-    ],
-    "Academic Cheating": [
-        re.compile(r"حل.*?(واجبات|اختبارات|كويزات)", re.I),
-        re.compile(r"(بحوث|مشاريع).*?تخرج", re.I),
-        re.compile(r"cv.*?احترافي", re.I),
-        re.compile(r"عرض.*?بوربوينت", re.I),
-    ]
-}
-
-# Safe patterns (should be Normal)
-SAFE_PATTERNS = [
-    re.compile(r"(كيف|وش|شنو|ايش).*?\?", re.I),
-    re.compile(r"(احد|مين).*?(يعرف|جرب)", re.I),
-    re.compile(r"السلام عليكم.*?\?", re.I),
-]
+# Mining and safe patterns come from the shared rule file
+# (features/detection/rules.json)
+scanner = default_scanner()
 
 def load_all_messages():
     import glob
@@ -101,23 +63,22 @@ def enhanced_mining():
         if text in existing_texts:
             continue
             
-        norm_text = normalize_text(text)
+        rules = scanner.scan(normalize_text(text))
         
         # Check if safe (skip)
-        if any(p.search(text) for p in SAFE_PATTERNS):
+        if rules['safe']:
             continue
         
         # Check enhanced patterns
-        for cat, patterns in ENHANCED_PATTERNS.items():
-            if any(p.search(text) or p.search(norm_text) for p in patterns):
-                new_samples.append({
-                    "text": text,
-                    "label": cat,
-                    "reviewed_by": "enhanced_miner",
-                    "note": f"Matched enhanced pattern for {cat}"
-                })
-                existing_texts.add(text)
-                break
+        if rules['matches']:
+            cat = rules['matches'][0]['label']
+            new_samples.append({
+                "text": text,
+                "label": cat,
+                "reviewed_by": "enhanced_miner",
+                "note": f"Matched enhanced pattern for {cat}"
+            })
+            existing_texts.add(text)
     
     print(f"Found {len(new_samples)} new samples from enhanced patterns.")
     
@@ -9,8 +9,13 @@ import json
 import os
 import glob
 import random
+import sys
 from collections import Counter
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from al_rased.core.utils.text import normalize_text
+from al_rased.features.detection.rules import default_scanner
+
 print('⚖️ BALANCING & DIVERSIFYING DATASET')
 print('=' * 70)
 
@@ -18,39 +23,9 @@ print('=' * 70)
 print('\n📥 1. INTENSIVE MINING FOR WEAK CATEGORIES')
 print('-' * 40)
 
-# Extended patterns with more variety
-mining_patterns = {
-    'Hacking': [
-        # Arabic hacking services
-        'هكر', 'تهكير', 'اختراق', 'سرقة حساب', 'فك حماية',
-        'حظر حساب', 'فتح حساب محظور', 'سحب معلومات', 'تجسس',
-        'باسورد', 'كلمة سر', 'رمز التحقق', 'كود التفعيل',
-        # English hacking terms
-        'hack', 'hacker', 'crack', 'bypass', 'bruteforce',
-        # Platform-specific
-        'واتس هكر', 'انستا هكر', 'تليجرام هكر', 'سناب هكر',
-    ],
-    'Spam': [
-        # Followers/Likes services
-        'زيادة متابعين', 'رشق متابعين', 'شراء متابعين', 'متابعين وهميين',
-        'زيادة لايكات', 'زيادة مشاهدات', 'ترويج حساب',
-        # Subscription services
-        'اشتراكات', 'نتفلكس', 'شاهد', 'spotify', 'iptv',
-        # Generic spam
-        'شحن جواهر', 'شحن شدات', 'شحن الماس', 'شحن uc',
-        # Ads
-        'للاعلان', 'للإعلان', 'اعلانات', 'دعاية',
-    ],
-    'Financial Scams': [
-        # Investment scams
-        'استثمار مضمون', 'ارباح يومية', 'ارباح مضمونة', 'عوائد',
-        'تداول', 'فوركس', 'forex', 'ربح سريع', 'ثروة',
-        # Job scams
-        'وظيفة من المنزل', 'راتب بدون عمل', 'دخل اضافي',
-        # Crypto scams
-        'عملات رقمية', 'بتكوين', 'ايثريوم', 'عملة جديدة',
-    ],
-}
+# Mining patterns and request/offer cues come from the shared rule file
+# (features/detection/rules.json)
+scanner = default_scanner()
 
 # Load current data
 file_path = 'al_rased/data/labeledSamples/training_data.json'
@@ -58,7 +33,7 @@ with open(file_path, 'r') as f:
     data = json.load(f)
 
 existing_texts = {d['text'] for d in data}
-mined_counts = {cat: 0 for cat in mining_patterns}
+mined_counts = Counter()
 
 # Search in group_messages
 group_messages_path = 'al_rased/data/group_messages'
@@ -75,28 +50,24 @@ if os.path.exists(group_messages_path):
                     continue
                 
                 txt = msg.get('text', '')
-                txt_lower = txt.lower()
                 
                 if len(txt) < 30 or txt in existing_texts:
                     continue
                 
                 # Check for patterns - must be a SERVICE not a question
-                is_question = any(q in txt_lower for q in ['مين يعرف', 'ابي', 'ابغى', 'كيف'])
-                is_service = any(s in txt_lower for s in ['متوفر', 'للتواصل', 'يوجد لدينا', 'خاص', 'dm', 'للطلب'])
-                
-                if is_question and not is_service:
+                rules = scanner.scan(normalize_text(txt))
+                if rules['polarity'] == 'request':
                     continue
                 
-                for category, patterns in mining_patterns.items():
-                    if any(p in txt_lower for p in patterns):
-                        data.append({
-                            'text': txt,
-                            'label': category,
-                            'source': 'intensive_mining'
-                        })
-                        existing_texts.add(txt)
-                        mined_counts[category] += 1
-                        break
+                if rules['matches']:
+                    category = rules['matches'][0]['label']
+                    data.append({
+                        'text': txt,
+                        'label': category,
+                        'source': 'intensive_mining'
+                    })
+                    existing_texts.add(txt)
+                    mined_counts[category] += 1
         except:
             continue
 
@@ -1,75 +1,93 @@
 """
 Auto-Calibration Script for Detection Thresholds.
-Analyzes training data to find optimal threshold per category.
+Reads the out-of-fold probability cache written by features/model/train.py
+and picks, per category, the threshold with the best F-beta whose false
+positive rate on 'طبيعي' samples stays under --max-fpr. Optionally reports
+how much of the live traffic (daily report logs) each threshold would flag.
+
+Usage:
+    python scripts/calibrate_thresholds.py [--beta 1.0] [--max-fpr 0.01] [--dry-run]
 """
 import sys
 import os
 import json
-import joblib
-import numpy as np
+import math
+import time
+import argparse
 
 sys.path.append(os.path.join(os.getcwd(), 'al_rased'))
-from core.utils.text import normalize_text
+from features.model.oof import load_oof, label_indices, OOF_FILE
+from features.model.calibration import (
+    calibrate as run_calibration,
+    live_flag_rates,
+    load_report_scores,
+    write_thresholds,
+    DEFAULT_BETA,
+    DEFAULT_MAX_NORMAL_FPR,
+    MIN_THRESHOLD,
+)
 
-DATA_FILE = "al_rased/data/labeledSamples/training_data.json"
-MODEL_FILE = "al_rased/features/model/classifier.joblib"
 OUTPUT_FILE = "al_rased/features/detection/thresholds.json"
+REPORTS_DIR = "al_rased/data/live_reports"
+
+def calibrate(beta=DEFAULT_BETA, max_fpr=DEFAULT_MAX_NORMAL_FPR,
+              min_threshold=MIN_THRESHOLD, dry_run=False):
+    # 1. Load cached OOF probabilities
+    print("Loading out-of-fold probabilities...")
+    oof = load_oof()
+    if oof is None:
+        print(f"OOF cache not found at {OOF_FILE}. Run features/model/train.py first.")
+        return None
+
+    # 2. Sweep precision/recall/F-beta per category
+    results = run_calibration(
+        oof["probas"], oof["classes"], label_indices(oof),
+        beta=beta, max_normal_fpr=max_fpr, min_threshold=min_threshold,
+    )
+
+    print(f"\nF{beta:g} optimum with طبيعي FPR <= {max_fpr:.1%}:")
+    for cat, r in results.items():
+        print(f"{cat}: Threshold = {r['threshold']:.2f} | P = {r['precision']:.2f}, "
+              f"R = {r['recall']:.2f}, F = {r['fbeta']:.2f}, FPR = {r['normal_fpr']:.2%}")
 
-def calibrate():
-    # 1. Load Model and Data
-    print("Loading model and training data...")
-    clf = joblib.load(MODEL_FILE)
-    
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # 2. Predict on Training Data (to find confidence distribution)
-    texts = [normalize_text(d['text']) for d in data]
-    labels = [d['label'] for d in data]
-    
-    probas = clf.predict_proba(texts)
-    preds = clf.predict(texts)
-    classes = list(clf.classes_)
-    
-    # 3. Calculate Thresholds
-    # For each category, find the minimum confidence that correctly predicts it
-    # We want threshold = (mean of correct predictions) - 1 * std
-    # This ensures we catch most true positives while staying above noise
-    
-    thresholds = {}
-    
-    for cat in classes:
-        if cat == "Normal":
-            continue
-            
-        cat_idx = classes.index(cat)
-        
-        # Get confidence for TRUE POSITIVES (correctly predicted as this category)
-        true_positive_confs = []
-        for i, true_label in enumerate(labels):
-            if true_label == cat and preds[i] == cat:
-                true_positive_confs.append(probas[i][cat_idx])
-        
-        if true_positive_confs:
-            mean_conf = np.mean(true_positive_confs)
-            std_conf = np.std(true_positive_confs)
-            # Set threshold at mean - 1.5*std (aggressive) but minimum 0.30
-            suggested_threshold = max(0.30, mean_conf - 1.5 * std_conf)
-            thresholds[cat] = round(suggested_threshold, 2)
-            print(f"{cat}: Mean Conf = {mean_conf:.2f}, Std = {std_conf:.2f} -> Threshold = {thresholds[cat]}")
-        else:
-            # No true positives? Use conservative default
-            thresholds[cat] = 0.50
-            print(f"{cat}: No true positives found, using default 0.50")
-    
-    # 4. Save Thresholds
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(thresholds, f, indent=2, ensure_ascii=False)
-    
-    print(f"\nThresholds saved to {OUTPUT_FILE}")
+    # 3. Merge into existing thresholds (keeps keyword-only / frozen categories)
+    try:
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            thresholds = json.load(f)
+    except (OSError, ValueError):
+        thresholds = {}
+    # Round up: rounding down would flag طبيعي samples between the rounded
+    # and calibrated values and break the FPR bound
+    for cat, r in results.items():
+        thresholds[cat] = math.ceil(round(r["threshold"] * 100, 6)) / 100
+
+    # 4. Expected live flag rate from the report logs
+    start = time.perf_counter()
+    labels, confidences = load_report_scores(REPORTS_DIR)
+    if len(labels):
+        rates = live_flag_rates(labels, confidences, thresholds)
+        elapsed = time.perf_counter() - start
+        print(f"\nLive traffic ({len(labels)} scored messages, {elapsed:.2f}s):")
+        for cat, rate in rates.items():
+            if rate > 0:
+                print(f"{cat}: would flag {rate:.2%}")
+
+    # 5. Save Thresholds (atomic replace; the bot hot-reloads on mtime change)
+    if dry_run:
+        print("\nDry run — thresholds not written.")
+    else:
+        write_thresholds(OUTPUT_FILE, thresholds)
+        print(f"\nThresholds saved to {OUTPUT_FILE}")
     print("Final Thresholds:", thresholds)
-    
+
     return thresholds
 
 if __name__ == "__main__":
-    calibrate()
+    parser = argparse.ArgumentParser(description="Calibrate detection thresholds from OOF probabilities")
+    parser.add_argument("--beta", type=float, default=DEFAULT_BETA, help="F-beta weight (<1 favors precision)")
+    parser.add_argument("--max-fpr", type=float, default=DEFAULT_MAX_NORMAL_FPR,
+                        help="Max false-positive rate on طبيعي samples per category")
+    parser.add_argument("--min-threshold", type=float, default=MIN_THRESHOLD)
+    parser.add_argument("--dry-run", action="store_true", help="Print results without writing thresholds.json")
+    args = parser.parse_args()
+    calibrate(args.beta, args.max_fpr, args.min_threshold, args.dry_run)
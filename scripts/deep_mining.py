@@ -2,14 +2,15 @@ import sys
 import os
 import json
 import glob
-import re
 import joblib
-import pandas as pd
 import numpy as np
 
 # Setup paths
 sys.path.append(os.path.join(os.getcwd(), 'al_rased'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.utils.text import normalize_text
+from al_rased.features.detection.rules import default_scanner
+from al_rased.features.model.oof import NORMAL_LABEL
 
 TRAIN_SCRIPT_PATH = "al_rased/features/model/train.py"
 DATA_FILE = "al_rased/data/labeledSamples/training_data.json"
@@ -20,29 +21,9 @@ SOURCE_DIRS = [
     "/Users/apple/qxqbotv3/data/telethonSamplesv2"
 ]
 
-# Patterns for specific tricky cases we want to force-feed the model
-# Using strictly high-precision regexes
-PATTERNS = {
-    "Medical Fraud": [
-        re.compile(r"(سكليف|اجازة|تقرير|عذر).*?(صحتي|تواريخ|قديم|جديد|معتمد|مختم)", re.IGNORECASE),
-        re.compile(r"(ارفع|تنزل).*?(منصة|تطبيق).*?(صحتي)", re.IGNORECASE),
-    ],
-    "Academic Cheating": [
-        re.compile(r"(حل|اسوي|اعداد).*?(واجب|اختبار|بحث|مشروع|تكليف|كويز)", re.IGNORECASE),
-    ],
-    "Financial Scams": [
-        re.compile(r"(قرض|تمويل|سداد).*?(بدون|فوري|ميسر|استخراج|تصفير)", re.IGNORECASE)
-    ],
-    "Hacking": [
-        re.compile(r"(تهكير|اختراق|تجسس).*?(سناب|واتس|انستا|حساب)", re.IGNORECASE)
-    ]
-}
-
-SAFE_PATTERNS = [
-    re.compile(r"(كيف|وش|شنو|يعني|ايش).*?(اطلع|اسوي|طريقة|حل)", re.IGNORECASE), # Questions
-    re.compile(r"\?", re.IGNORECASE),
-    re.compile(r"(احد|مين).*?(يعرف|جرب)", re.IGNORECASE)
-]
+# Mining and safe (question-like) patterns come from the shared rule file
+# (features/detection/rules.json)
+scanner = default_scanner()
 
 def load_all_data():
     messages = []
@@ -98,22 +79,14 @@ def run_deep_mining():
             # 1. Low Confidence Normal (30-70%) -> Could be a subtle violation OR a hard normal
             # 2. Confident Normal but matches Regex -> False Negative
             
-            matched_cat = None
-            is_safe = False
-            
-            # Check Regex Rules
-            for cat, patterns in PATTERNS.items():
-                if any(p.search(norm_batch[idx]) for p in patterns):
-                    matched_cat = cat
-                    break
-            
-            # Check Safe Rules
-            if any(p.search(norm_batch[idx]) for p in SAFE_PATTERNS):
-                is_safe = True
+            # Check rules (one pass: mining patterns and safe patterns)
+            rules = scanner.scan(norm_batch[idx])
+            matched_cat = rules['matches'][0]['label'] if rules['matches'] else None
+            is_safe = rules['safe']
                 
             # Decision Logic
             if matched_cat and not is_safe:
-                if pred_label == "Normal":
+                if pred_label == NORMAL_LABEL:
                     # FALSE NEGATIVE (Missed)
                     new_samples.append({
                         "text": text,
@@ -129,18 +102,18 @@ def run_deep_mining():
                     })
             
             elif is_safe:
-                if pred_label != "Normal":
+                if pred_label != NORMAL_LABEL:
                     # FALSE POSITIVE
                     new_samples.append({
                         "text": text,
-                        "label": "Normal",
+                        "label": NORMAL_LABEL,
                         "reason": f"Deep Mine: False Positive ({pred_label})"
                     })
-                elif pred_label == "Normal" and max_prob < 0.7:
+                elif pred_label == NORMAL_LABEL and max_prob < 0.7:
                      # LOW CONFIDENCE NORMAL (Confused by safe words?)
                      new_samples.append({
                         "text": text,
-                        "label": "Normal",
+                        "label": NORMAL_LABEL,
                         "reason": f"Deep Mine: Weak Normal ({max_prob:.2f})"
                     })
 
@@ -0,0 +1,52 @@
+"""
+Rank Likely Mislabels and Gray-Zone Samples from the OOF Cache.
+Reads the out-of-fold probabilities written by features/model/train.py
+instead of reloading the model and rescoring the dataset.
+
+Usage:
+    python scripts/rank_mislabels.py [top_n]
+"""
+import sys
+import os
+import json
+
+sys.path.append(os.path.join(os.getcwd(), 'al_rased'))
+from features.model.oof import load_oof, stale_ids, rank_mislabels, gray_zone, OOF_FILE
+
+DATA_FILE = "al_rased/data/labeledSamples/training_data.json"
+THRESHOLDS_FILE = "al_rased/features/detection/thresholds.json"
+
+def main():
+    top_n = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    oof = load_oof()
+    if oof is None:
+        print(f"OOF cache not found at {OOF_FILE}. Run features/model/train.py first.")
+        return
+
+    with open(DATA_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with open(THRESHOLDS_FILE, 'r', encoding='utf-8') as f:
+        thresholds = json.load(f)
+
+    stale = set(stale_ids(oof, data))
+    if stale:
+        print(f"⚠️  {len(stale)} samples changed since training — skipped (retrain to refresh).")
+
+    # 1. Mislabel candidates
+    candidates = [c for c in rank_mislabels(oof) if c["sample_id"] not in stale]
+    print(f"\n🔎 Top {min(top_n, len(candidates))} / {len(candidates)} mislabel candidates:")
+    for c in candidates[:top_n]:
+        text = data[c["sample_id"]]["text"].replace("\n", " ")[:60]
+        print(f"[{c['sample_id']:04d}] {c['label']} -> {c['predicted']} "
+              f"({c['confidence']:.2f}, margin {c['margin']:.2f}) | {text}")
+
+    # 2. Gray-zone samples
+    gray = [g for g in gray_zone(oof, thresholds) if g["sample_id"] not in stale]
+    print(f"\n🔘 {len(gray)} gray-zone samples (just below threshold):")
+    for g in gray[:top_n]:
+        text = data[g["sample_id"]]["text"].replace("\n", " ")[:60]
+        print(f"[{g['sample_id']:04d}] {g['label']} ~ {g['predicted']} ({g['confidence']:.2f}) | {text}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Replay Recorded Telegram Updates into a Webhook Endpoint.
+Posts updates (one JSON object per line) in order to a running webhook
+ingress (BOT_MODE=webhook), e.g. a local instance pointed at a test bot.
+
+Usage:
+    python scripts/replay_updates.py updates.jsonl [url] [secret]
+"""
+import sys
+import os
+import json
+import asyncio
+import time
+
+sys.path.append(os.path.join(os.getcwd(), 'al_rased'))
+from core.webhook import replay_updates, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    path = sys.argv[1]
+    url = sys.argv[2] if len(sys.argv) > 2 else f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+    secret = sys.argv[3] if len(sys.argv) > 3 else WEBHOOK_SECRET
+
+    with open(path, 'r', encoding='utf-8') as f:
+        updates = [json.loads(line) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    accepted = asyncio.run(replay_updates(url, updates, secret))
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {accepted}/{len(updates)} updates to {url} in {elapsed:.2f}s "
+          f"({len(updates) / elapsed:.0f} updates/s)")
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,6 @@ import os
 import json
 import glob
 import re
-import pandas as pd
-import numpy as np
 
 # Setup paths to import from al_rased
 sys.path.append(os.path.abspath("al_rased"))
@@ -109,6 +107,7 @@ def run_simulation():
     report.append(f"Potential Misses (False Negatives): {stats['Missed_Likely']} ({stats['Missed_Likely']/stats['Total']:.1%})")
     
     # Breakdown of Detections
+    import pandas as pd  # Deferred: only the final breakdown needs it
     df = pd.DataFrame(results)
     if not df.empty:
         det_counts = df[df['prediction'] != 'Normal']['prediction'].value_counts()
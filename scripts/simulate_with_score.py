@@ -3,8 +3,6 @@ import os
 import json
 import glob
 import re
-import pandas as pd
-import numpy as np
 
 # Setup paths to import from al_rased
 sys.path.append(os.path.abspath("al_rased"))
@@ -123,6 +121,8 @@ def run_simulation():
         json.dump(results, f, indent=2, ensure_ascii=False)
         
     # 4. Generate Report
+    import numpy as np  # Deferred: only the final report needs numpy/pandas
+    import pandas as pd
     avg_conf_viol = np.mean(stats["Avg_Confidence_Violations"]) if stats["Avg_Confidence_Violations"] else 0
     avg_conf_norm = np.mean(stats["Avg_Confidence_Normal"]) if stats["Avg_Confidence_Normal"] else 0
 
@@ -11,44 +11,22 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from al_rased.features.detection.engine import DetectionEngine
 from al_rased.features.detection.handlers import get_thresholds
+from al_rased.features.detection.rules import default_scanner
+from al_rased.core.utils.text import normalize_text
 
-# Expert Rules (Regex Patterns)
-EXPERT_RULES = {
-    'Academic Cheating': [
-        r'حل\s*واجب', r'حل\s*اختبار', r'مشاريع\s*تخرج', r'رسائ?ل\s*ماجستير', 
-        r'اعداد\s*بحوث', r'خدمات\s*طلابية', r'اسايمنت', r'كويزات', r'تسميع',
-        r'حلول\s*واجبات', r'مساعدة\s*في\s*الاختبار', r'قروب\s*حل', r'أبحاث\s*جامعية'
-    ],
-    'Medical Fraud': [
-        r'سكليف', r'اجازة\s*مرضية', r'تقرير\s*طبي', r'عذر\s*طبي', r'مشهد\s*مرافقة',
-        r'مستشفى\s*حكومي', r'منصة\s*صحتي', r'تطبيق\s*صحتي', r'مرضيه\s*معتمده'
-    ],
-    'Financial Scams': [
-        r'استثم[رار]', r'ارباح\s*مضمونة', r'تداول', r'فوركس', r'عملات\s*رقمية',
-        r'ادارة\s*محافظ', r'ربح\s*يومي', r'دخل\s*اضافي', r'توصيات\s*ذهب'
-    ],
-    'Hacking': [
-        r'تهكير', r'اختراق', r'تجسس', r'سحب\s*صور', r'استرداد\s*حساب',
-        r'زيادة\s*متابعين', r'توثيق\s*حساب'
-    ],
-    'Unethical': [
-        r'سكس', r'ني[كڪ]', r'ممحون', r'ديوث', r'قحبة', r'سهرات', r'مساج', r'مدلعة',
-        r'حشيش', r'مخدرات', r'كبتاجون', r'شبو'
-    ],
-    'Spam': [
-        r'سيرفر\s*ماينكرافت', r'تبادل\s*نشر', r'اشترك\s*في\s*قناتنا', r'زيادة\s*متابعين',
-        r'ارقام\s*وهمية', r'تفعيل\s*تليجرام', r'رشق'
-    ]
-}
+# Expert rules come from the shared rule file (features/detection/rules.json)
+scanner = default_scanner()
 
 def check_expert_rules(text):
-    text = text.lower()
+    """One match per category: [{'label', 'pattern'}], keyword rules first."""
+    result = scanner.scan(normalize_text(text))
     matches = []
-    for label, patterns in EXPERT_RULES.items():
-        for pattern in patterns:
-            if re.search(pattern, text):
-                matches.append({'label': label, 'pattern': pattern})
-                break 
+    if result['keyword']:
+        label, keyword = result['keyword']
+        matches.append({'label': label, 'pattern': keyword})
+    for match in result['matches']:
+        if match['label'] not in [m['label'] for m in matches]:
+            matches.append({'label': match['label'], 'pattern': match['pattern']})
     return matches
 
 def main():
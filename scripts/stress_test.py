@@ -8,6 +8,10 @@ from collections import Counter
 # Add parent path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from al_rased.core.utils.multi_match import MultiMatcher
+from al_rased.core.utils.text import SKELETON_SEPARATORS, normalize_text, skeleton, skeleton_stream
+from al_rased.features.detection.engine import KEYWORD_RULES
+
 def main():
     print("🔥 Running Stress Test (Obfuscation & Fuzzy Duplicates)...")
     
@@ -19,13 +23,10 @@ def main():
     # We look for single letters separated by spaces that form keywords
     print("\n1️⃣ Detecting Spaced Keywords...")
     
-    keywords = [
-        ('حل واجب', r'ح\s*ل\s+و\s*ا\s*ج\s*ب'),
-        ('تهكير', r'ت\s*ه\s*ك\s*ي\s*ر'),
-        ('استثمار', r'ا\s*س\s*ت\s*ث\s*م\s*ا\s*r'),
-        ('سكس', r'س\s*ك\s*س'),
-        ('نودز', r'ن\s*و\s*d\s*z')
-    ]
+    # One automaton over the skeletons (separators/tatweel dropped) of the
+    # engine keywords, instead of a \s*-interleaved regex per keyword
+    keywords = [k for kws in KEYWORD_RULES.values() for k in kws]
+    matcher = MultiMatcher((skeleton_stream(normalize_text(k).lower()), k) for k in keywords)
     
     spaced_matches = []
     
@@ -33,19 +34,21 @@ def main():
         text = sample['text']
         labels = sample.get('labels', [sample.get('label', 'Normal')])
         
-        # Only care if label is Normal or Spam
-        if 'Normal' in labels or 'Spam' in labels:
-            for kw, pattern in keywords:
-                # Find spaced pattern (at least 2 spaces to be suspicious)
-                matches = re.findall(pattern, text)
-                if matches:
-                    # Check if it actually has spaces
-                    if any(m.count(' ') >= 2 for m in matches):
-                        spaced_matches.append({
-                            'text': text[:50],
-                            'found': kw,
-                            'label': labels
-                        })
+        # Only care if label is Normal or Spam (English or Arabic label names)
+        if set(labels) & {'Normal', 'Spam', 'طبيعي', 'سبام'}:
+            clean = normalize_text(text).lower()
+            stream, positions = skeleton(clean)
+            for end, skel, kw in matcher.finditer(stream):
+                span = clean[positions[end - len(skel) + 1]:positions[end] + 1]
+                # Suspicious only if the letters are spread out (at least 2 gaps)
+                gaps = sum(1 for c in span if c.isspace() or c in SKELETON_SEPARATORS or c == 'ـ')
+                if gaps >= 2:
+                    spaced_matches.append({
+                        'text': text[:50],
+                        'found': kw,
+                        'label': labels
+                    })
+                    break
 
     print(f"   Found {len(spaced_matches)} obfuscated samples.")
     if spaced_matches:
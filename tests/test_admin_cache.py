@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from al_rased.core.admin_cache import AdminDirectory, fetch_bot_chat_admins
+
+@pytest.mark.asyncio
+async def test_one_fetch_per_chat():
+    """All users of a chat are answered from a single admin-list fetch."""
+    directory = AdminDirectory()
+    fetch = AsyncMock(return_value={1, 2})
+
+    assert await directory.is_admin(-100, 1, fetch) is True
+    assert await directory.is_admin(-100, 3, fetch) is False
+    assert await directory.is_admin(-100, 2, fetch) is True
+    fetch.assert_awaited_once_with(-100)
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_fetch():
+    directory = AdminDirectory()
+
+    async def slow_fetch(chat_id):
+        await asyncio.sleep(0.01)
+        return {7}
+
+    fetch = AsyncMock(side_effect=slow_fetch)
+    results = await asyncio.gather(*(directory.is_admin(-1, uid, fetch) for uid in (7, 8, 9)))
+    assert results == [True, False, False]
+    assert fetch.await_count == 1
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_and_lru_bound():
+    directory = AdminDirectory(ttl=0, max_chats=2)
+    fetch = AsyncMock(return_value={1})
+
+    await directory.is_admin(-1, 1, fetch)
+    await directory.is_admin(-1, 1, fetch)
+    assert fetch.await_count == 2  # ttl=0 -> always refetch
+
+    directory = AdminDirectory(max_chats=2)
+    for chat_id in (-1, -2, -3):
+        directory.set_admins(chat_id, {1})
+    assert len(directory) == 2
+    assert directory.peek(-1, 1) is None
+    assert directory.stats["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_failure_is_not_admin():
+    directory = AdminDirectory()
+    fetch = AsyncMock(side_effect=Exception("forbidden"))
+    assert await directory.is_admin(-1, 1, fetch) is False
+    assert directory.stats["failures"] == 1
+
+def test_member_update_patches_cached_chat():
+    directory = AdminDirectory()
+    directory.set_admins(-1, {1})
+    directory.update_member(-1, 2, True)
+    directory.update_member(-1, 1, False)
+    assert directory.peek(-1, 2) is True
+    assert directory.peek(-1, 1) is False
+
+    # Uncached chats are left alone (fetched on demand later)
+    directory.update_member(-5, 2, True)
+    assert directory.peek(-5, 2) is None
+
+@pytest.mark.asyncio
+async def test_fetch_bot_chat_admins():
+    bot = MagicMock()
+    admins = [MagicMock(), MagicMock()]
+    admins[0].user.id = 10
+    admins[1].user.id = 11
+    bot.get_chat_administrators = AsyncMock(return_value=admins)
+    assert await fetch_bot_chat_admins(bot, -1) == {10, 11}
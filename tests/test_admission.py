@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from telegram import Update
+from al_rased.core import database
+from al_rased.core.admission import AdmissionController, KEYWORDS_ONLY, NORMAL, SAMPLE_ML, SKIP_GRAY
+from al_rased.core.metrics import metrics
+from al_rased.core.update_processor import MAX_CONCURRENT_UPDATES, ChatOrderedUpdateProcessor
+from al_rased.features.detection.engine import DetectionEngine
+
+def _update(chat_id):
+    update = MagicMock(spec=Update)
+    update.effective_chat = MagicMock(id=chat_id)
+    return update
+
+def test_levels_follow_backlog_and_latency():
+    controller = AdmissionController(max_concurrent=1000, shed_backlog=10, latency_target=1.0)
+    assert controller.level() == NORMAL
+    for backlog, level in ((10, SKIP_GRAY), (40, SAMPLE_ML), (160, KEYWORDS_ONLY)):
+        controller._running = backlog
+        assert controller.level() == level
+    controller._running = 0
+    controller.observe_latency(2.5)
+    assert controller.level() == SAMPLE_ML
+    controller._latency_at -= 60  # No verdicts for a while: latency no longer counts
+    assert controller.level() == NORMAL
+    assert AdmissionController(shed_backlog=0, latency_target=0.0).level() == NORMAL
+
+def test_admit_sheds_by_stage_but_never_vip():
+    metrics.reset()
+    controller = AdmissionController(shed_backlog=10, rng=lambda: 0.9, sample_rate=0.25)
+    controller._running = 40  # sample_ml
+    controller.record(-1002, True)
+    assert controller.admit(-1001) == "sample_ml"    # Low-risk group, not sampled
+    assert controller.admit(-1002) is None           # Group with recent violations
+    assert controller.admit(-1001, vip=True) is None
+    assert not controller.forward_gray()
+    assert controller.forward_gray(vip=True)
+    controller._running = 160  # keywords_only
+    assert controller.admit(-1002) == "keywords_only"
+    assert controller.admit(-1002, vip=True) is None
+    assert metrics.counters["shed"] == {"sample_ml": 1, "skip_gray": 1, "keywords_only": 1}
+    assert controller.stats["shed"] == 3
+
+@pytest.mark.asyncio
+async def test_vip_waiters_get_slots_first():
+    controller = AdmissionController(max_concurrent=1)
+    order = []
+
+    async def run(name, vip):
+        async with controller.slot(vip):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async with controller.slot():
+        tasks = [asyncio.create_task(run(n, v)) for n, v in (("a", False), ("b", False), ("vip", True))]
+        await asyncio.sleep(0)
+        assert controller.backlog == 4
+        tasks[1].cancel()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert order == ["vip", "a"]
+    assert controller.backlog == 0
+
+@pytest.mark.asyncio
+async def test_vip_groups_come_from_managed_groups(tmp_path):
+    with patch("al_rased.core.database.DB_PATH", tmp_path / "test.db"):
+        await database.init_db()
+        await database.add_managed_group(-1001, "a", 10)
+        await database.add_managed_group(-1002, "b", 10)
+        await database.set_group_vip(-1002, True)
+        controller = AdmissionController()
+        assert await controller.is_vip(-1002)
+        assert not await controller.is_vip(-1001)
+        await database.set_group_vip(-1001, True)
+        assert not await controller.is_vip(-1001)  # Until the next refresh
+        controller.forget_vip()
+        assert await controller.is_vip(-1001)
+
+def test_predict_keywords_skips_the_model(monkeypatch):
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {})
+    monkeypatch.setattr(DetectionEngine, "_model", None)
+    assert DetectionEngine.predict_keywords("ابي سكليف ضروري")["label"] == "احتيال طبي (طلب)"
+    assert DetectionEngine.predict_keywords("مرحبا بالجميع") == {"label": "طبيعي", "confidence": 0.0}
+
+@pytest.mark.asyncio
+async def test_bot_settings_reach_stage_one():
+    # Default limits: a full update processor must be enough to start shedding
+    controller = AdmissionController()
+    processor = ChatOrderedUpdateProcessor()
+    release = asyncio.Event()
+
+    async def handle():
+        async with controller.slot():
+            await release.wait()
+
+    tasks = [
+        asyncio.create_task(processor.process_update(_update(-1000 - n), handle()))
+        for n in range(MAX_CONCURRENT_UPDATES)
+    ]
+    await asyncio.sleep(0.01)
+    assert controller.backlog == MAX_CONCURRENT_UPDATES
+    assert controller.level() >= SKIP_GRAY
+    release.set()
+    await asyncio.gather(*tasks)
+    assert controller.backlog == 0
@@ -0,0 +1,43 @@
+import pytest
+from benchmarks.run_benchmarks import compare, save_baseline, load_baseline
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"normalize_text": 1000.0, "keyword_rules": 500.0, "predict": 100.0}
+    results = {"normalize_text": 850.0, "keyword_rules": 350.0, "predict": None, "new": 5.0}
+    regressions = compare(results, baseline, tolerance=0.2)
+    assert [(name, round(change, 2)) for name, _, _, change in regressions] == [("keyword_rules", -0.3)]
+
+def test_baseline_roundtrip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_baseline({"normalize_text": 123.0}, path)
+    assert load_baseline(path) == {"normalize_text": 123.0}
+    assert load_baseline(str(tmp_path / "missing.json")) == {}
+
+def test_replay_offsets_scale_and_cap_gaps():
+    from benchmarks.replay import arrival_offsets
+    messages = [{"timestamp": t} for t in (0, 10, 1000, 1010)]
+    assert arrival_offsets(messages) == [0.0] * 4
+    assert arrival_offsets(messages, speed=1, max_gap=300) == [0, 10, 310, 320]
+    assert arrival_offsets(messages, speed=10, max_gap=300) == [0, 1, 31, 32]
+
+@pytest.mark.asyncio
+async def test_replay_records_api_calls_and_keeps_chat_order():
+    from al_rased.core.update_processor import ChatOrderedUpdateProcessor
+    from benchmarks.replay import FakeBot, bot_update, replay
+    bot = FakeBot(latency=0.001)
+    messages = [{"id": i, "timestamp": 0, "text": f"m{i}", "chat_id": 100 + i % 2, "sender_id": 5}
+                for i in range(6)]
+    seen = []
+
+    async def handler(update):
+        await bot.send_message(update.effective_chat.id, update.message.text)
+        seen.append((update.effective_chat.id, update.message.message_id))
+
+    processor = ChatOrderedUpdateProcessor(4)
+    result = await replay([bot_update(m, m["id"]) for m in messages], [0.0] * 6, handler,
+                          processor.process_update)
+    assert result["latency"].count == 6
+    assert bot.calls == {"send_message": 6}
+    assert [mid for chat, mid in seen if chat == -100100] == [0, 2, 4]
+    assert await bot.unban_chat_member(1, 2) is True
+    assert bot.calls["unban_chat_member"] == 1
@@ -0,0 +1,49 @@
+import pytest
+from telegram import Bot
+from telegram.error import RetryAfter
+from benchmarks.bot_api_server import BotAPIServer, ADMIN_ID, drain
+
+@pytest.fixture
+async def server():
+    server = BotAPIServer(group_rate=1000, chat_burst=1000)
+    await server.start()
+    yield server
+    await server.stop()
+
+@pytest.mark.asyncio
+async def test_bot_methods_round_trip(server):
+    async with Bot("0:local", base_url=server.base_url) as bot:
+        sent = await bot.send_message(-1001, "تنبيه", message_thread_id=7, parse_mode="Markdown")
+        assert (sent.message_id, sent.text, sent.message_thread_id) == (1, "تنبيه", 7)
+        topic = await bot.create_forum_topic(-1001, "🔘 عينات رمادية")
+        assert topic.name == "🔘 عينات رمادية"
+        chat = await bot.get_chat(-1001)
+        assert chat.type == "supergroup" and chat.linked_chat_id is None
+        admins = await bot.get_chat_administrators(-1001)
+        assert ADMIN_ID in {m.user.id for m in admins}
+        assert (await bot.get_chat_member(-1001, 5)).status == "member"
+        assert await bot.delete_messages(-1001, [1, 2, 3])
+    assert server.deleted == [(-1001, 1), (-1001, 2), (-1001, 3)]
+    assert server.calls["sendMessage"] == 1
+
+@pytest.mark.asyncio
+async def test_per_chat_flood_control_returns_retry_after():
+    server = BotAPIServer(group_rate=0.5, chat_burst=2)
+    await server.start()
+    try:
+        async with Bot("0:local", base_url=server.base_url) as bot:
+            await bot.send_message(-1001, "1")
+            await bot.send_message(-1001, "2")
+            with pytest.raises(RetryAfter):
+                await bot.send_message(-1001, "3")
+            await bot.send_message(-1002, "other chats are not throttled")
+    finally:
+        await server.stop()
+    assert server.rejected == {"sendMessage": 1}
+
+@pytest.mark.asyncio
+async def test_outbox_drains_backlog_through_flood_waits():
+    server = BotAPIServer(global_rate=10, group_rate=1000, chat_burst=1000)
+    report = await drain(20, 4, server)
+    assert report["delivered"] == 20
+    assert report["rejected_429"] == report["dispatcher"]["flood_waits"] > 0
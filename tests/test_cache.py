@@ -0,0 +1,113 @@
+import pytest
+from al_rased.core.cache import CacheManager
+
+class FakeRedis:
+    """In-process stand-in for redis.asyncio (the subset CacheManager uses)."""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+        self.down = False
+
+    def _check(self, name):
+        self.calls.append(name)
+        if self.down:
+            raise ConnectionError("redis down")
+
+    async def ping(self):
+        self._check("ping")
+        return True
+
+    async def get(self, key):
+        self._check("get")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self._check("set")
+        self.data[key] = value
+
+    async def mget(self, keys):
+        self._check("mget")
+        return [self.data.get(k) for k in keys]
+
+    async def delete(self, key):
+        self._check("delete")
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            def set(self, key, value, ex=None):
+                self.ops.append((key, value))
+
+            async def execute(self):
+                redis._check("pipeline")
+                for key, value in self.ops:
+                    redis.data[key] = value
+
+        return Pipeline()
+
+    async def close(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_l2_shared_between_processes():
+    redis = FakeRedis()
+    writer, reader = CacheManager(), CacheManager()
+    await writer.connect(redis)
+    await reader.connect(redis)
+
+    await writer.set_many("verdict", {"a": {"label": "سبام"}, "b": {"label": "طبيعي"}})
+    assert redis.calls.count("pipeline") == 1
+
+    found = await reader.get_many("verdict", ["a", "b", "c"])
+    assert found == {"a": {"label": "سبام"}, "b": {"label": "طبيعي"}}
+    assert redis.calls.count("mget") == 1
+    assert reader.stats["l2_hits"] == 2 and reader.stats["misses"] == 1
+
+    # Second read is served from L1
+    await reader.get("verdict", "a")
+    assert redis.calls.count("mget") == 1
+    assert reader.stats["l1_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_degrades_to_l1_when_redis_down():
+    redis = FakeRedis()
+    cache = CacheManager()
+    await cache.connect(redis)
+    redis.down = True
+
+    await cache.set("chat", -100, {"title": "Group"})
+    assert cache.stats["redis_errors"] == 1
+    assert not cache.redis_available
+
+    calls = len(redis.calls)
+    assert await cache.get("chat", -100) == {"title": "Group"}
+    assert await cache.get("chat", -200) is None
+    assert len(redis.calls) == calls  # no Redis traffic during back-off
+
+@pytest.mark.asyncio
+async def test_namespace_ttl_and_l1_bound():
+    cache = CacheManager(l1_max_items=2, namespace_ttls={"verdict": 0})
+    await cache.set("verdict", "x", 1)
+    assert await cache.get("verdict", "x") is None  # expired immediately
+
+    for i in range(3):
+        await cache.set("admin", i, [i])
+    assert await cache.get("admin", 0) is None
+    assert cache.stats["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_discard_removes_both_tiers():
+    redis = FakeRedis()
+    cache = CacheManager()
+    await cache.connect(redis)
+    await cache.set("admin", -100, [1, 2])
+    cache.discard("admin", -100)
+    await cache.close()
+    assert redis.data == {}
+    assert await cache.get("admin", -100) is None
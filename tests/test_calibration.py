@@ -0,0 +1,48 @@
+import json
+import numpy as np
+from al_rased.features.model import calibration
+
+CLASSES = ["سبام", "طبيعي"]
+
+def test_pr_curve_sweep():
+    """Curve is evaluated once per distinct score, highest first."""
+    scores = np.array([0.9, 0.8, 0.8, 0.3])
+    positive = np.array([True, True, False, True])
+    curve = calibration.pr_curve(scores, positive)
+
+    assert list(curve["thresholds"]) == [0.9, 0.8, 0.3]
+    assert list(curve["tp"]) == [1, 2, 3]
+    assert list(curve["fp"]) == [0, 1, 1]
+    assert np.allclose(curve["recall"], [1 / 3, 2 / 3, 1.0])
+
+def test_calibrate_respects_normal_fpr():
+    """Threshold rises until طبيعي false positives fit under the limit."""
+    probas = np.array([
+        [0.95, 0.05],
+        [0.70, 0.30],
+        [0.60, 0.40],  # normal sample predicted as spam
+        [0.10, 0.90],
+        [0.20, 0.80],
+    ])
+    true_idx = np.array([0, 0, 1, 1, 1])
+
+    strict = calibration.calibrate(probas, CLASSES, true_idx, max_normal_fpr=0.0)
+    assert strict["سبام"]["threshold"] == 0.70
+    assert strict["سبام"]["normal_fpr"] == 0.0
+
+def test_calibrate_fallback_without_positives():
+    probas = np.array([[0.1, 0.9], [0.2, 0.8]])
+    result = calibration.calibrate(probas, CLASSES, np.array([1, 1]))
+    assert result["سبام"]["threshold"] == calibration.FALLBACK_THRESHOLD
+
+def test_live_flag_rates():
+    labels = np.array(["سبام", "سبام", "طبيعي", "سبام"])
+    confidences = np.array([0.9, 0.4, 0.99, 0.5])
+    rates = calibration.live_flag_rates(labels, confidences, {"سبام": 0.5})
+    assert rates["سبام"] == 0.5
+
+def test_write_thresholds_atomic(tmp_path):
+    path = tmp_path / "thresholds.json"
+    calibration.write_thresholds(str(path), {"سبام": 0.42})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"سبام": 0.42}
+    assert [p.name for p in tmp_path.iterdir()] == ["thresholds.json"]
@@ -0,0 +1,57 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from al_rased.core.chat_cache import ChatMetadataCache
+
+def _bot(linked_chat_id=-1009):
+    bot = MagicMock()
+    bot.get_chat = AsyncMock(return_value=SimpleNamespace(
+        linked_chat_id=linked_chat_id, title="Group", type="supergroup", is_forum=True
+    ))
+    return bot
+
+@pytest.mark.asyncio
+async def test_get_chat_once_per_chat():
+    cache = ChatMetadataCache()
+    bot = _bot()
+    for _ in range(5):
+        metadata = await cache.get(bot, -100)
+    assert metadata == {"linked_chat_id": -1009, "title": "Group", "type": "supergroup", "is_forum": True}
+    bot.get_chat.assert_awaited_once_with(-100)
+
+@pytest.mark.asyncio
+async def test_invalidate_and_title_update():
+    cache = ChatMetadataCache()
+    bot = _bot()
+    await cache.get(bot, -100)
+
+    cache.update_title(-100, "Renamed")
+    assert (await cache.get(bot, -100))["title"] == "Renamed"
+    assert bot.get_chat.await_count == 1
+
+    cache.invalidate(-100)
+    await cache.get(bot, -100)
+    assert bot.get_chat.await_count == 2
+
+@pytest.mark.asyncio
+async def test_failure_returns_empty_metadata():
+    cache = ChatMetadataCache()
+    bot = MagicMock()
+    bot.get_chat = AsyncMock(side_effect=Exception("chat not found"))
+    metadata = await cache.get(bot, -1)
+    assert metadata["linked_chat_id"] is None
+    await cache.get(bot, -1)
+    assert bot.get_chat.await_count == 1  # short negative cache
+
+@pytest.mark.asyncio
+async def test_shared_cache_skips_get_chat():
+    from al_rased.core.cache import CacheManager
+    shared = CacheManager()
+    first = ChatMetadataCache(shared=shared)
+    await first.get(_bot(), -100)
+
+    # Another process/restart with the same shared cache
+    second = ChatMetadataCache(shared=shared)
+    bot = _bot()
+    assert (await second.get(bot, -100))["title"] == "Group"
+    bot.get_chat.assert_not_awaited()
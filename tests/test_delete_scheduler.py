@@ -0,0 +1,105 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from al_rased.core import database
+from al_rased.core.delete_scheduler import DeleteScheduler
+
+@pytest.fixture
+async def test_db(tmp_path):
+    db_path = tmp_path / "test.db"
+    with patch("al_rased.core.database.DB_PATH", db_path):
+        await database.init_db()
+        yield
+
+def _bot():
+    bot = MagicMock()
+    bot.delete_message = AsyncMock()
+    bot.delete_messages = AsyncMock()
+    return bot
+
+@pytest.mark.asyncio
+async def test_due_deletions_grouped_per_chat(test_db):
+    scheduler = DeleteScheduler()
+    for mid in (1, 2, 3):
+        await scheduler.schedule(-100, mid, 0)
+    await scheduler.schedule(-200, 9, 0)
+    await scheduler.schedule(-300, 5, 3600)
+
+    bot = _bot()
+    await scheduler.start(bot)
+    try:
+        for _ in range(250):
+            if scheduler.stats["deleted"] == 4:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await scheduler.stop()
+
+    bot.delete_messages.assert_awaited_once_with(-100, [1, 2, 3])
+    bot.delete_message.assert_awaited_once_with(-200, 9)
+    # Only the far-future job remains persisted
+    assert await database.get_pending_deletions() == [(pytest.approx(time.time() + 3600, abs=5), -300, 5)]
+
+@pytest.mark.asyncio
+async def test_pending_jobs_resume_after_restart(test_db):
+    # Scheduled while no consumer is running (e.g. the process died before it fired)
+    await DeleteScheduler().schedule(-100, 7, -1)
+
+    scheduler = DeleteScheduler()
+    bot = _bot()
+    await scheduler.start(bot)
+    try:
+        for _ in range(250):
+            if scheduler.stats["deleted"]:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await scheduler.stop()
+    bot.delete_message.assert_awaited_once_with(-100, 7)
+    assert await database.get_pending_deletions() == []
+
+@pytest.mark.asyncio
+async def test_earlier_job_wakes_consumer(test_db):
+    scheduler = DeleteScheduler()
+    bot = _bot()
+    await scheduler.start(bot)
+    try:
+        await scheduler.schedule(-100, 1, 3600)
+        await asyncio.sleep(0.02)  # consumer now sleeping until the 1h job
+        await scheduler.schedule(-100, 2, 0)
+        for _ in range(250):
+            if scheduler.stats["deleted"]:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await scheduler.stop()
+    bot.delete_message.assert_awaited_once_with(-100, 2)
+    assert scheduler.pending_count() == 1
+
+@pytest.mark.asyncio
+async def test_transient_failure_keeps_row_and_retries(test_db):
+    from telegram.error import TimedOut
+    await DeleteScheduler().schedule(-100, 7, -1)
+
+    scheduler = DeleteScheduler()
+    bot = _bot()
+    bot.delete_message = AsyncMock(side_effect=[TimedOut(), None])
+    with patch("al_rased.core.delete_scheduler.RETRY_DELAY", 0.3):
+        await scheduler.start(bot)
+        try:
+            for _ in range(250):
+                if scheduler.stats["retried"]:
+                    break
+                await asyncio.sleep(0.02)
+            # Still persisted while waiting for the retry
+            assert [row[1:] for row in await database.get_pending_deletions()] == [(-100, 7)]
+            for _ in range(250):
+                if scheduler.stats["deleted"]:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await scheduler.stop()
+    assert bot.delete_message.await_count == 2
+    assert scheduler.stats["failed"] == 0
+    assert await database.get_pending_deletions() == []
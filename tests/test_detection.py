@@ -51,3 +51,24 @@ def test_model_load_failure(mock_joblib):
     # Should fallback to safe default
     assert result["label"] == "Normal"
     assert result["confidence"] == 0.0
+
+def test_verdict_key_follows_model_and_keywords(monkeypatch, tmp_path):
+    model_path = tmp_path / "classifier.joblib"
+    model_path.write_bytes(b"v1")
+    monkeypatch.setattr("al_rased.features.detection.engine.MODEL_PATH", str(model_path))
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {"سبام": ["رابط"]})
+    monkeypatch.setattr(DetectionEngine, "_version", None)
+
+    key = DetectionEngine.verdict_key("مرحبا")
+    assert DetectionEngine.verdict_key("مرحبا") == key
+    assert DetectionEngine.verdict_key("اهلا") != key
+
+    # Keyword reload
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {"سبام": ["رابط", "اشترك"]})
+    keywords_key = DetectionEngine.verdict_key("مرحبا")
+    assert keywords_key != key
+
+    # Retrained model file
+    import os
+    os.utime(model_path, (1, 1))
+    assert DetectionEngine.verdict_key("مرحبا") not in (key, keywords_key)
@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from telethon.tl.types import Channel, User
+from al_rased.services.telethon_monitor.entity_cache import EntityCache
+
+def _event(chat_id=-100, sender_id=5, chat=None, sender=None):
+    event = MagicMock()
+    event.chat_id = chat_id
+    event.sender_id = sender_id
+    event.chat = chat
+    event.sender = sender
+    event.get_chat = AsyncMock(return_value=MagicMock(spec=Channel, title="Group"))
+    event.get_sender = AsyncMock(return_value=MagicMock(
+        spec=User, id=sender_id, first_name="Ali", last_name=None, username="ali", bot=False
+    ))
+    return event
+
+@pytest.mark.asyncio
+async def test_fetch_once_then_hit():
+    cache = EntityCache()
+    for _ in range(3):
+        event = _event()
+        chat = await cache.get_chat(event)
+        sender = await cache.get_sender(event)
+    assert chat.title == "Group" and chat.is_group
+    assert sender.first_name == "Ali" and not sender.bot
+    assert cache.stats["misses"] == 2
+    assert cache.stats["hits"] == 4
+    event.get_chat.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_embedded_entities_skip_requests():
+    cache = EntityCache()
+    embedded_chat = MagicMock(spec=Channel, title="Renamed")
+    embedded_sender = MagicMock(spec=User, id=5, first_name="New", last_name=None, username=None, bot=True)
+    event = _event(chat=embedded_chat, sender=embedded_sender)
+    assert (await cache.get_chat(event)).title == "Renamed"
+    assert (await cache.get_sender(event)).bot
+    event.get_chat.assert_not_awaited()
+    event.get_sender.assert_not_awaited()
+    assert cache.stats["embedded"] == 2
+
+@pytest.mark.asyncio
+async def test_dialog_sweep_and_lru_bound():
+    cache = EntityCache(max_chats=2)
+    dialogs = [MagicMock(id=-i, entity=MagicMock(spec=Channel, title=f"G{i}")) for i in range(1, 4)]
+    cache.add_dialogs(dialogs)
+    assert cache.get_stats()["chats"] == 2
+    assert cache.stats["evictions"] == 1
+    event = _event(chat_id=-3)
+    assert (await cache.get_chat(event)).title == "G3"
+    event.get_chat.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_private_chat_is_not_group():
+    cache = EntityCache()
+    event = _event(chat=MagicMock(spec=User, first_name="Someone"))
+    assert not (await cache.get_chat(event)).is_group
@@ -3,6 +3,7 @@ import aiosqlite
 from pathlib import Path
 from unittest.mock import patch, MagicMock, AsyncMock
 from al_rased.core import database
+from al_rased.services.telethon_monitor import monitor as monitor_module, reports as reports_module, storage
 from al_rased.services.telethon_monitor.monitor import TelethonMonitor
 from telethon.tl.types import Chat, Channel
 
@@ -13,6 +14,15 @@ async def test_db(tmp_path):
         await database.init_db()
         yield
 
+@pytest.fixture
+def monitor_files(tmp_path):
+    """Keep the monitor's message archive and reports out of al_rased/data."""
+    with patch.object(storage, "MESSAGES_DIR", str(tmp_path / "group_messages")), \
+            patch.object(reports_module, "REPORTS_DIR", str(tmp_path / "live_reports")):
+        with patch.object(monitor_module, "message_storage", storage.MessageStorage()), \
+                patch.object(monitor_module, "reports", reports_module.ReportsManager()):
+            yield tmp_path
+
 @pytest.mark.asyncio
 async def test_system_flags(test_db):
     """Test setting and retrieving system flags (Action Modes)."""
@@ -49,7 +59,7 @@ async def test_bulk_retrieval(test_db):
     assert flags["action_mode:cat2"] == "publish"
 
 @pytest.mark.asyncio
-async def test_monitor_detection_logic(test_db):
+async def test_monitor_detection_logic(test_db, monitor_files):
     """Test the core detection loop in TelethonMonitor (isolated)."""
     
     # Setup Data
@@ -85,8 +95,8 @@ async def test_monitor_detection_logic(test_db):
     # Mock Admin Check (Not admin)
     monitor._is_admin_or_bot = AsyncMock(return_value=(False, False))
     
-    # Mock DetectionEngine (to avoid loading real model)
-    with patch("al_rased.services.telethon_monitor.monitor.DetectionEngine.predict") as mock_predict:
+    # Mock the inference pool (to avoid loading real model)
+    with patch("al_rased.services.telethon_monitor.monitor.inference_pool.predict", new_callable=AsyncMock) as mock_predict:
         mock_predict.return_value = {"label": "Normal", "confidence": 0.0}
         
         # Run processing
@@ -106,7 +116,7 @@ async def test_monitor_detection_logic(test_db):
         monitor.client.edit_permissions.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_monitor_ml_detection_logic(test_db):
+async def test_monitor_ml_detection_logic(test_db, monitor_files):
     """Test ML detection logic (Publish mode)."""
     
     # Setup Data
@@ -135,7 +145,7 @@ async def test_monitor_ml_detection_logic(test_db):
     event.get_sender.return_value = sender
     monitor._is_admin_or_bot = AsyncMock(return_value=(False, False))
 
-    with patch("al_rased.services.telethon_monitor.monitor.DetectionEngine.predict") as mock_predict:
+    with patch("al_rased.services.telethon_monitor.monitor.inference_pool.predict", new_callable=AsyncMock) as mock_predict:
         # Mock ML violation
         mock_predict.return_value = {"label": "Spam", "confidence": 0.95}
         
@@ -147,3 +157,84 @@ async def test_monitor_ml_detection_logic(test_db):
         # Publish mode -> Should NOT delete
         event.delete.assert_not_called()
         monitor.client.edit_permissions.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_basic_group_admins_by_participant_type():
+    """Basic groups ignore the admins filter; only admin participants count."""
+    from telethon.tl.types import ChatParticipant, ChatParticipantAdmin, ChatParticipantCreator
+
+    def member(user_id, participant):
+        user = MagicMock()
+        user.id = user_id
+        user.participant = participant
+        return user
+
+    members = [
+        member(1, ChatParticipantCreator(user_id=1)),
+        member(2, ChatParticipantAdmin(user_id=2, inviter_id=1, date=None)),
+        member(3, ChatParticipant(user_id=3, inviter_id=1, date=None)),
+        member(4, None),
+    ]
+
+    async def iter_participants(chat_id, filter=None):
+        for m in members:
+            yield m
+
+    monitor = TelethonMonitor()
+    monitor.client = MagicMock()
+    monitor.client.iter_participants = iter_participants
+    assert await monitor._fetch_chat_admins(-123) == {1, 2}
+
+def _flood_event(text, message_id):
+    event = AsyncMock()
+    event.message.text = text
+    event.message.id = message_id
+    event.chat_id = 123
+    chat = MagicMock(spec=Chat)
+    chat.title = "Test Group"
+    event.get_chat.return_value = chat
+    sender = MagicMock()
+    sender.first_name = "Flooder"
+    sender.last_name = None
+    sender.username = None
+    sender.id = 4242
+    sender.bot = False
+    event.get_sender.return_value = sender
+    return event
+
+@pytest.mark.asyncio
+async def test_monitor_model_category_wins_over_flood(test_db, monitor_files):
+    """A hacking ad sent in a burst keeps its category and action mode."""
+    await database.set_system_flag("action_mode:تهكير (عرض)", "stop")
+    await database.set_system_flag("action_mode:سبام", "publish")
+    monitor = TelethonMonitor()
+    monitor.client = AsyncMock()
+    monitor._is_admin_or_bot = AsyncMock(return_value=(False, False))
+    monitor._flood.check = MagicMock(return_value={"kind": "repeat", "first": True})
+
+    event = _flood_event("نهكر حسابات سناب وانستا بسعر رمزي تواصل خاص", 2001)
+    with patch("al_rased.services.telethon_monitor.monitor.inference_pool.predict",
+               AsyncMock(return_value={"label": "تهكير (عرض)", "confidence": 0.95})) as predict:
+        await monitor._process_message(event)
+    predict.assert_awaited_once()
+    assert monitor.stats["violations"] == 1
+    event.delete.assert_called_once()  # تهكير is in stop mode, سبام only publishes
+
+@pytest.mark.asyncio
+async def test_monitor_flood_counts_once_per_burst(test_db, monitor_files):
+    await database.set_system_flag("action_mode:سبام", "stop")
+    monitor = TelethonMonitor()
+    monitor.client = AsyncMock()
+    monitor._is_admin_or_bot = AsyncMock(return_value=(False, False))
+    monitor._flood.check = MagicMock(side_effect=[
+        {"kind": "flood", "first": True}, {"kind": "flood", "first": False}
+    ])
+
+    events = [_flood_event(f"رسالة عادية رقم {i} في القروب", 3000 + i) for i in range(2)]
+    with patch("al_rased.services.telethon_monitor.monitor.inference_pool.predict",
+               AsyncMock(return_value={"label": "طبيعي", "confidence": 0.9})):
+        for event in events:
+            await monitor._process_message(event)
+    assert monitor.stats["violations"] == 1
+    events[0].delete.assert_called_once()
+    events[1].delete.assert_not_called()
@@ -0,0 +1,36 @@
+from al_rased.features.detection.flood import FloodDetector
+
+AD = "متوفر اشتراكات نتفلكس وشاهد باسعار مميزه تواصل خاص"
+
+def test_flood_after_max_messages_in_window():
+    detector = FloodDetector(max_users=10, max_messages=5, window=10)
+    verdicts = [detector.check(1, 7, f"رساله رقم {i}", now=100 + i) for i in range(6)]
+    assert verdicts[:4] == [None] * 4
+    assert verdicts[4] == {"kind": "flood", "first": True}
+    assert verdicts[5] == {"kind": "flood", "first": False}  # Same burst
+    # Another user, another chat, or the same pace spread out: no flood
+    assert detector.check(1, 8, "مرحبا", now=106) is None
+    assert detector.check(2, 7, "مرحبا", now=106) is None
+    slow = FloodDetector(max_users=10, max_messages=5, window=10)
+    assert all(slow.check(1, 7, f"رساله {i}", now=i * 3) is None for i in range(20))
+
+def test_repeats_match_on_skeleton():
+    detector = FloodDetector(max_users=10, repeat_max=3, repeat_window=60)
+    assert detector.check(1, 7, AD, now=0) is None
+    assert detector.check(1, 7, AD.replace(" ", "  "), now=20) is None
+    assert detector.check(1, 7, "م.ت.و.ف.ر" + AD[5:], now=40) == {"kind": "repeat", "first": True}
+    assert detector.check(1, 7, AD, now=200) is None  # Earlier copies left the window
+    # Short texts repeat innocently
+    assert all(detector.check(1, 9, "شكرا لك", now=t) is None for t in range(3))
+
+def test_memory_is_capped_and_idle_slots_freed():
+    detector = FloodDetector(max_users=3, max_messages=2, window=10, repeat_window=10)
+    for user in range(5):
+        detector.check(1, user, "مرحبا", now=0)
+    stats = detector.get_stats()
+    assert stats["tracked"] == 3 and stats["evicted_full"] == 2
+    # A reused slot starts clean: no flood carried over from its previous owner
+    assert detector.check(1, 0, "مرحبا", now=1) is None
+    detector.check(1, 9, "مرحبا", now=100)
+    assert detector.get_stats()["tracked"] == 1
+    assert detector.get_stats()["evicted_idle"] == 3
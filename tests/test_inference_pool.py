@@ -0,0 +1,65 @@
+import pytest
+import joblib
+from unittest.mock import patch
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from al_rased.core import database
+from al_rased.features.detection.engine import DetectionEngine
+from al_rased.features.detection.inference_pool import InferencePool
+
+TEXTS = [
+    "مرحبا بالجميع في القروب",
+    "استثمر معي ارباح مضمونه",
+    "عندي سؤال عن الواجب",
+    "خصم على المنتجات اليوم فقط",
+    "hello world",
+]
+
+@pytest.fixture
+async def test_db(tmp_path):
+    with patch("al_rased.core.database.DB_PATH", tmp_path / "test.db"):
+        await database.init_db()
+        yield
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    model = Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression())])
+    model.fit(["مرحبا", "اهلا وسهلا", "خصم منتجات", "عروض خصم"], ["طبيعي", "طبيعي", "سبام", "سبام"])
+    path = tmp_path / "model.joblib"
+    joblib.dump(model, path)
+    # Reference results come from the same model in-process
+    monkeypatch.setattr(DetectionEngine, "_model", model)
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {})
+    return str(path)
+
+def test_predict_batch_matches_predict(model_path):
+    assert DetectionEngine.predict_batch(TEXTS) == [DetectionEngine.predict(t) for t in TEXTS]
+
+@pytest.mark.asyncio
+async def test_inline_without_workers(model_path):
+    pool = InferencePool(workers=0)
+    assert await pool.predict(TEXTS[3]) == DetectionEngine.predict(TEXTS[3])
+    assert not pool.running
+
+@pytest.mark.asyncio
+async def test_workers_match_in_process_and_restart(test_db, model_path):
+    import asyncio
+    pool = InferencePool(workers=2, model_path=model_path)
+    await pool.start()
+    try:
+        expected = [DetectionEngine.predict(t) for t in TEXTS]
+        results = await asyncio.gather(*(pool.predict(t) for t in TEXTS))
+        assert [r["label"] for r in results] == [r["label"] for r in expected]
+        assert [r["confidence"] for r in results] == pytest.approx([r["confidence"] for r in expected])
+
+        # Kill the workers: the batch is retried on a fresh pool
+        for process in list(pool._executor._processes.values()):
+            process.kill()
+            process.join()
+        results = await pool.predict_batch(TEXTS)
+        assert [r["label"] for r in results] == [r["label"] for r in expected]
+        assert pool.stats["restarts"] == 1
+        assert pool.stats["fallbacks"] == 0
+    finally:
+        await pool.stop()
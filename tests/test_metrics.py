@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from al_rased.core.metrics import Metrics, MetricsServer, Histogram, MAX_LABEL_SETS
+
+def test_histogram_buckets_and_quantiles():
+    h = Histogram(buckets=(0.001, 0.01, 0.1))
+    for value in [0.0005] * 90 + [0.05] * 10:
+        h.observe(value)
+    assert h.counts == [90, 0, 10, 0]
+    assert h.quantile(0.5) == 0.001
+    assert h.quantile(0.95) == 0.1
+
+@pytest.mark.asyncio
+async def test_timers_and_counters():
+    m = Metrics()
+    with m.timer("normalize"):
+        pass
+
+    @m.timed("db")
+    async def query():
+        await asyncio.sleep(0)
+
+    await query()
+    m.inc("violations", "سبام")
+    m.inc("violations", "سبام")
+    m.inc("messages", -100)
+
+    summary = m.summary()
+    assert summary["normalize"]["count"] == 1
+    assert summary["db"]["count"] == 1
+    assert m.top("violations") == [("سبام", 2)]
+
+def test_counter_label_cardinality_is_capped():
+    m = Metrics()
+    for chat_id in range(MAX_LABEL_SETS + 50):
+        m.inc("messages", chat_id)
+    assert len(m.counters["messages"]) == MAX_LABEL_SETS + 1
+    assert m.counters["messages"]["other"] == 50
+
+def test_prometheus_text():
+    m = Metrics(prefix="t")
+    m.observe("inference", 0.003)
+    m.inc("detections", 'a"b')
+    text = m.render()
+    assert 't_stage_seconds_bucket{stage="inference",le="0.005"} 1' in text
+    assert 't_stage_seconds_count{stage="inference"} 1' in text
+    assert 't_detections_total{label="a\\"b"} 1' in text
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    m = Metrics(prefix="t")
+    m.inc("messages", 1)
+    server = MetricsServer(m, host="127.0.0.1", port=0)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+    finally:
+        await server.stop()
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert 't_messages_total{label="1"} 1' in response
+
+def test_reset_keeps_descriptions():
+    m = Metrics()
+    m.describe("messages", "Messages screened.")
+    m.observe("db", 0.01)
+    m.inc("messages", 1)
+    m.reset()
+    assert m.summary() == {} and m.counters == {}
+    assert m.help == {"messages": "Messages screened."}
@@ -0,0 +1,49 @@
+import random
+from al_rased.core.utils.multi_match import MultiMatcher
+from al_rased.services.telethon_monitor.name_filter import BannedNameFilter
+
+def test_multi_matcher_finds_overlaps():
+    matcher = MultiMatcher(["he", "she", "hers", "his"])
+    found = sorted((end, kw) for end, kw, _ in matcher.finditer("ushers"))
+    assert found == [(3, "he"), (3, "she"), (5, "hers")]
+
+def test_multi_matcher_agrees_with_substring_search():
+    rng = random.Random(0)
+    alphabet = "abسعر"
+    keywords = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(30)}
+    matcher = MultiMatcher(keywords)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        found = {kw for _, kw, _ in matcher.finditer(text)}
+        assert found == {kw for kw in keywords if kw in text}
+
+def test_category_precedence_matches_mapping_order():
+    name_filter = BannedNameFilter()
+    name_filter.update({"fraud": ["scam"], "spam": ["mr"]})
+    # "mr" occurs first in the name, but "fraud" is listed first
+    assert name_filter.check(1, "Mr Scammer", None, None) == "fraud"
+    assert name_filter.check(2, "Mr Good", None, None) == "spam"
+    assert name_filter.check(3, "Clean", "User", "clean") is None
+
+def test_verdicts_cached_until_name_or_list_changes():
+    name_filter = BannedNameFilter()
+    name_filter.update({"fraud": ["scam"]})
+    assert name_filter.check(1, "Ali", None, None) is None
+    assert name_filter.check(1, "Ali", None, None) is None
+    assert name_filter.stats == {"hits": 1, "misses": 1, "rebuilds": 1}
+
+    # Renamed user is re-screened
+    assert name_filter.check(1, "Ali", None, "scam_ali") == "fraud"
+
+    # Unchanged list does not rebuild; a new list drops cached verdicts
+    name_filter.update({"fraud": ["scam"]})
+    assert name_filter.stats["rebuilds"] == 1
+    name_filter.update({"fraud": ["scam"], "spam": ["ali"]})
+    assert name_filter.check(1, "Ali", None, None) == "spam"
+
+def test_verdict_cache_is_bounded():
+    name_filter = BannedNameFilter(max_users=10)
+    name_filter.update({"fraud": ["scam"]})
+    for user_id in range(100):
+        name_filter.check(user_id, "User", None, None)
+    assert len(name_filter._verdicts) == 10
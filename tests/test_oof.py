@@ -0,0 +1,43 @@
+import numpy as np
+from al_rased.features.model import oof as oof_cache
+
+CLASSES = ["سبام", "طبيعي"]
+
+def _build(tmp_path):
+    probas = np.array([
+        [0.9, 0.1],   # سبام, correct
+        [0.8, 0.2],   # labeled طبيعي but predicted سبام -> mislabel
+        [0.35, 0.65], # طبيعي, correct
+        [0.45, 0.55], # labeled سبام, predicted طبيعي
+    ])
+    labels = ["سبام", "طبيعي", "طبيعي", "سبام"]
+    texts = ["a", "b", "c", "d"]
+    path = tmp_path / "oof.npz"
+    oof_cache.save_oof(probas, CLASSES, [10, 11, 12, 13], labels, texts, path=str(path))
+    return oof_cache.load_oof(str(path))
+
+def test_round_trip(tmp_path):
+    """Cache keeps probabilities, classes and sample IDs."""
+    oof = _build(tmp_path)
+    assert oof["classes"] == CLASSES
+    assert list(oof["sample_ids"]) == [10, 11, 12, 13]
+    assert oof["probas"].shape == (4, 2)
+
+def test_missing_cache(tmp_path):
+    assert oof_cache.load_oof(str(tmp_path / "missing.npz")) is None
+
+def test_rank_mislabels(tmp_path):
+    """Largest disagreement margin comes first."""
+    ranked = oof_cache.rank_mislabels(_build(tmp_path))
+    assert [r["sample_id"] for r in ranked] == [11, 13]
+    assert ranked[0]["predicted"] == "سبام"
+
+def test_gray_zone(tmp_path):
+    """Only non-normal predictions inside the band are returned."""
+    gray = oof_cache.gray_zone(_build(tmp_path), {"سبام": 0.85})
+    assert [g["sample_id"] for g in gray] == [11]
+
+def test_stale_ids(tmp_path):
+    oof = _build(tmp_path)
+    data = [{"text": "x"}] * 10 + [{"text": "a"}, {"text": "changed"}, {"text": "c"}]
+    assert oof_cache.stale_ids(oof, data) == [11, 13]
@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from telegram.error import BadRequest, RetryAfter, Forbidden
+from al_rased.core.outbox import (
+    OutboundDispatcher, split_digest, DIGEST_SEPARATOR,
+    PRIORITY_WARNING, PRIORITY_REPORT, PRIORITY_GRAY
+)
+
+def _bot():
+    bot = MagicMock()
+    sent = []
+
+    async def send_message(**kwargs):
+        sent.append(kwargs)
+        return MagicMock(message_id=len(sent))
+
+    bot.send_message = AsyncMock(side_effect=send_message)
+    return bot, sent
+
+@pytest.mark.asyncio
+async def test_inline_when_not_started():
+    """Without a worker, calls go straight to the given bot."""
+    dispatcher = OutboundDispatcher()
+    bot, sent = _bot()
+    result = await dispatcher.send_message(bot, -1, "hello")
+    assert result.message_id == 1
+    assert sent[0]["text"] == "hello"
+
+@pytest.mark.asyncio
+async def test_priority_lanes():
+    dispatcher = OutboundDispatcher(max_inflight=1)
+    bot, sent = _bot()
+    await dispatcher.start(bot)
+    try:
+        futures = [
+            dispatcher.send_message(None, -1, "gray", PRIORITY_GRAY),
+            dispatcher.send_message(None, -2, "report", PRIORITY_REPORT),
+            dispatcher.send_message(None, -3, "warning", PRIORITY_WARNING),
+        ]
+        await asyncio.gather(*futures)
+    finally:
+        await dispatcher.stop()
+    assert [m["text"] for m in sent] == ["warning", "report", "gray"]
+
+@pytest.mark.asyncio
+async def test_digest_coalescing():
+    dispatcher = OutboundDispatcher()
+    bot, sent = _bot()
+    await dispatcher.start(bot)
+    try:
+        futures = [dispatcher.send_digest(None, -1, f"report {i}") for i in range(5)]
+        results = await asyncio.gather(*futures)
+    finally:
+        await dispatcher.stop()
+    assert len(sent) == 1
+    assert sent[0]["text"].count(DIGEST_SEPARATOR) == 4
+    assert all(r is results[0] for r in results)
+    assert dispatcher.stats["coalesced"] == 4
+
+@pytest.mark.asyncio
+async def test_per_chat_throttle_does_not_block_other_chats():
+    dispatcher = OutboundDispatcher(chat_rate=0.01, chat_burst=1)
+    bot, sent = _bot()
+    await dispatcher.start(bot)
+    try:
+        dispatcher.send_message(None, -1, "a1")
+        dispatcher.send_message(None, -1, "a2")  # throttled
+        await asyncio.wait_for(dispatcher.send_message(None, -2, "b1"), timeout=1)
+    finally:
+        await dispatcher.stop(drain_timeout=0)
+    assert [m["text"] for m in sent] == ["a1", "b1"]
+
+@pytest.mark.asyncio
+async def test_retry_after_then_success():
+    dispatcher = OutboundDispatcher()
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=[RetryAfter(0), MagicMock(message_id=5)])
+    await dispatcher.start(bot)
+    try:
+        result = await asyncio.wait_for(dispatcher.send_message(None, -1, "x"), timeout=2)
+    finally:
+        await dispatcher.stop()
+    assert result.message_id == 5
+    assert dispatcher.stats["flood_waits"] == 1
+
+@pytest.mark.asyncio
+async def test_permanent_error_resolves_none():
+    dispatcher = OutboundDispatcher()
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=Forbidden("kicked"))
+    await dispatcher.start(bot)
+    try:
+        assert await dispatcher.send_message(None, -1, "x") is None
+    finally:
+        await dispatcher.stop()
+    assert bot.send_message.await_count == 1
+
+def test_split_digest_respects_limit():
+    parts = ["a" * 3000, "b" * 3000, "c" * 10]
+    groups = split_digest(parts)
+    assert groups == [[0], [1, 2]]
+    messages = [DIGEST_SEPARATOR.join(parts[i] for i in g) for g in groups]
+    assert all(len(m) <= 4096 for m in messages)
+
+def test_split_digest_never_cuts_a_part():
+    parts = ["a" * 10, "*b*" * 2000, "c" * 10]
+    assert split_digest(parts) == [[0], [1], [2]]
+
+@pytest.mark.asyncio
+async def test_bad_markdown_digest_is_resent_part_by_part():
+    """One unparsable entry must not lose the rest of the digest."""
+    dispatcher = OutboundDispatcher(chat_burst=10)
+    sent = []
+
+    async def send_message(**kwargs):
+        if kwargs.get("parse_mode") and "bad_name" in kwargs["text"]:
+            raise BadRequest("Can't parse entities: can't find end of the entity starting at byte offset 9")
+        sent.append(kwargs)
+        return MagicMock(message_id=len(sent))
+
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=send_message)
+    await dispatcher.start(bot)
+    try:
+        futures = [dispatcher.send_digest(None, -1, text, parse_mode="Markdown")
+                   for text in ("*report 1*", "user bad_name", "*report 3*")]
+        results = await asyncio.wait_for(asyncio.gather(*futures), timeout=2)
+    finally:
+        await dispatcher.stop()
+    assert [(m["text"], m["parse_mode"]) for m in sent] == [
+        ("*report 1*", "Markdown"), ("*report 3*", "Markdown"), ("user bad_name", None)
+    ]
+    assert all(r is not None for r in results)
+    assert dispatcher.stats["failed"] == 0
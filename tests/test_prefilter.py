@@ -0,0 +1,46 @@
+import pytest
+from unittest.mock import MagicMock
+from al_rased.core.utils.text import normalize_text
+from al_rased.features.detection.engine import DetectionEngine, WARM_UP_TEXT
+from al_rased.features.detection.prefilter import screen
+
+def clean(text):
+    return normalize_text(text)
+
+@pytest.mark.parametrize("text", [
+    "الله يعطيك العافيه",
+    "تمام شكرا لك",
+    "صباح الخير 🌹",
+])
+def test_short_chit_chat_is_skipped(text):
+    assert screen(clean(text), 32) == "short"
+
+@pytest.mark.parametrize("text", [
+    "اللي يبي سكليف يكلمني",          # risk term
+    "تعال www.example.com",           # __url__ token
+    "كلم @someone",                   # __mention__ token
+    "اتصل 0551234567",                # __phone__ token
+    "للتواصل 540265438",              # digits
+    "عروض ✅⭕️⚡",                     # decorative symbols
+    "س̷ل̷ا̷م",                         # combining marks
+    "Hello world",                    # mostly Latin
+    WARM_UP_TEXT,
+])
+def test_risk_signals_reach_the_model(text):
+    assert screen(clean(text), 32) is None
+
+def test_length_knob():
+    text = clean("الله يعطيك العافيه على المجهود الرائع والشرح الجميل")
+    assert screen(text, 32) is None
+    assert screen(text, 96) == "short"
+    assert screen(clean("تمام"), 0) is None  # Disabled
+    assert screen("", 32) == "empty"
+
+def test_engine_short_circuits_before_model(monkeypatch):
+    model = MagicMock()
+    monkeypatch.setattr(DetectionEngine, "_model", model)
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {})
+    result = DetectionEngine.predict("تمام شكرا لك")
+    assert result == {"label": "طبيعي", "confidence": 0.0, "prefilter": "short"}
+    assert DetectionEngine.predict_batch(["تمام شكرا لك"]) == [result]
+    model.predict_proba.assert_not_called()
@@ -0,0 +1,54 @@
+import time
+import pytest
+from al_rased.core import profiler as profiler_module
+from al_rased.core.profiler import SamplingProfiler, profile_for
+
+def _busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def _busy_parent(seconds):
+    _busy_leaf(seconds)
+
+def test_sampler_attributes_time_to_hot_function(tmp_path):
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy_parent(0.2)
+    profiler.stop()
+
+    assert profiler.samples > 20
+    top = {name.split(":")[1]: (cum, own) for name, cum, own in profiler.top(50)}
+    assert top["_busy_parent"][0] >= top["_busy_leaf"][0] > 0
+    assert top["_busy_leaf"][1] > top["_busy_parent"][1]
+
+    path = profiler.write_collapsed(str(tmp_path), "test")
+    with open(path, encoding="utf-8") as f:
+        line = f.readline()
+    stack, count = line.rsplit(" ", 1)
+    assert "_busy_parent" in stack and int(count) > 0
+
+@pytest.mark.asyncio
+async def test_profile_for_is_exclusive(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_module, "MAX_DURATION", 1)
+    import asyncio
+    first = asyncio.create_task(profile_for(1, directory=str(tmp_path)))
+    await asyncio.sleep(0)
+    with pytest.raises(RuntimeError):
+        await profile_for(1, directory=str(tmp_path))
+    report = await first
+    assert report["path"].startswith(str(tmp_path))
+    assert not profiler_module.is_profiling()
+
+def test_sampler_covers_executor_threads():
+    import threading
+    profiler = SamplingProfiler(interval=0.001)
+    worker = threading.Thread(target=_busy_parent, args=(0.2,), name="executor-0")
+    profiler.start()
+    worker.start()
+    worker.join()
+    profiler.stop()
+
+    worker_stacks = [s for s in profiler.stacks if s.startswith("thread:executor-0;")]
+    assert any("_busy_leaf" in s for s in worker_stacks)
+    assert not any(s.startswith("thread:sampling-profiler;") for s in profiler.stacks)
@@ -0,0 +1,102 @@
+import json
+import re
+import pytest
+from al_rased.core.utils.text import normalize_text, skeleton, skeleton_stream
+from al_rased.features.detection.engine import DetectionEngine, KEYWORD_RULES
+from al_rased.features.detection.rules import (
+    RuleScanner, default_scanner, keyword_rules, load_rules, regex_anchors, _FOLD,
+)
+from benchmarks.corpus import training_samples
+
+def test_regex_anchors():
+    assert regex_anchors("استثم[رار]") == {"استثم"}
+    assert regex_anchors("(قرض|تمويل).*?(بدون|فوري)") == {"بدون", "فوري"}  # Longest shortest option
+    assert regex_anchors(r"رسائ?ل\s*ماجستير") == {"ماجستير"}
+    assert regex_anchors("[?؟]") is None
+    assert regex_anchors(".*") is None
+
+def test_keyword_precedence_offers_before_requests():
+    labels = list(KEYWORD_RULES)
+    assert labels.index("غير أخلاقي (عرض)") < labels.index("غير أخلاقي (طلب)")
+    scanner = default_scanner()
+    assert scanner.first_keyword(normalize_text("ابي سكس")) == ("غير أخلاقي (عرض)", "سكس")
+    assert scanner.first_keyword(normalize_text("ابي سكليف ضروري")) == ("احتيال طبي (طلب)", "ابي سكليف")
+    assert scanner.first_keyword(normalize_text("السلام عليكم")) is None
+
+def test_scan_signals_polarity_and_safe():
+    scanner = default_scanner()
+    result = scanner.scan(normalize_text("نسوي سكليف معتمد صحتي للتواصل"))
+    assert result["polarity"] == "offer"
+    assert not result["safe"]
+    assert {m["label"] for m in result["matches"]} == {"احتيال طبي (عرض)"}
+
+    result = scanner.scan(normalize_text("ابي احد يحل واجب الرياضيات"))
+    assert result["polarity"] == "request"
+    assert "غش أكاديمي (طلب)" in scanner.categories(normalize_text("ابي احد يحل واجب الرياضيات"))
+
+    assert scanner.scan(normalize_text("كيف احل الواجب؟"))["safe"]
+
+def test_anchored_regexes_agree_with_brute_force():
+    rules = load_rules()
+    scanner = RuleScanner(rules)
+    regexes = [
+        (category, re.compile(pattern.translate(_FOLD), re.IGNORECASE), pattern)
+        for category, entry in rules["categories"].items()
+        for key, block in entry.items() if key != "polar"
+        for pattern in block.get("regexes", [])
+    ]
+    for text, _ in training_samples(400):
+        clean = normalize_text(text)
+        found = {(m["category"], m["pattern"]) for m in scanner.scan(clean)["matches"]}
+        expected = {(c, p) for c, regex, p in regexes if regex.search(clean)}
+        assert expected <= found, text
+
+def test_extra_keywords_rank_after_file_keywords():
+    scanner = RuleScanner(load_rules(), {"سبام": ["قناتي"], "تصنيف جديد": ["كلمه"]})
+    assert scanner.first_keyword("تابعوا قناتي") == ("سبام", "قناتي")
+    assert scanner.first_keyword("كلمه ابي هكر") == ("تهكير (طلب)", "ابي هكر")
+
+def test_engine_rebuilds_scanner_when_db_keywords_change(monkeypatch):
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {})
+    assert DetectionEngine._check_keyword_rules("كلمه محظوره") is None
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {"سبام": ["كلمه محظوره"]})
+    assert DetectionEngine._check_keyword_rules("كلمه محظوره")["label"] == "سبام"
+
+def test_invalid_rule_files_are_rejected(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"categories": {"تهكير": {"any": {"regexes": ["("]}}}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="bad regex"):
+        load_rules(str(path))
+    path.write_text(json.dumps({"categories": {"تهكير": {"any": {"keywords": ["هكر"]}}}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="offer or request"):
+        load_rules(str(path))
+    path.write_text(json.dumps({"categories": {"تهكير": {"sell": {}}}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="unknown block"):
+        load_rules(str(path))
+
+def test_keyword_rules_order():
+    rules = {"categories": {
+        "ا": {"request": {"keywords": ["x"]}, "offer": {"keywords": ["y"]}},
+        "ب": {"polar": False, "any": {"keywords": ["z"]}},
+    }}
+    assert list(keyword_rules(rules)) == ["ا (عرض)", "ب", "ا (طلب)"]
+
+def test_skeleton_drops_separators_and_maps_positions():
+    text = "س.ك ـليـف\u064e!"
+    stream, positions = skeleton(text)
+    assert stream == "سكليف!" == skeleton_stream(text)
+    assert "".join(text[i] for i in positions) == stream
+    assert positions[0] == 0 and positions[-1] == len(text) - 1
+    assert skeleton_stream("ﻫ\u200bكر") == "هكر"  # NFKC + zero-width removed
+
+def test_scanner_matches_spread_out_keywords_on_word_boundaries():
+    scanner = default_scanner()
+    assert scanner.first_keyword(normalize_text("متوفر ت.ه.ك.ي.ر - ح.س.ا.ب")) == ("تهكير (عرض)", "تهكير حساب")
+    clean = normalize_text("تكفون ابي - سكـليف")
+    result = scanner.scan(clean)
+    assert result["keyword"] == ("احتيال طبي (طلب)", "ابي سكليف")
+    start, stop = result["keyword_span"]
+    assert clean[start:stop] == "ابي - سكليف"
+    # Keyword letters spanning word fragments are not a hit
+    assert scanner.first_keyword(normalize_text("بيس كسر")) is None
+    assert scanner.first_keyword(normalize_text("ايش بو")) is None
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+from al_rased.core.startup import StartupTimeline
+from al_rased.features.detection.engine import DetectionEngine, WARM_UP_TEXT
+from al_rased.features.detection.inference_pool import InferencePool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_marks_are_recorded_once():
+    timeline = StartupTimeline()
+    timeline.mark("post_init")
+    first = timeline.marks["post_init"]
+    timeline.mark("post_init")
+    assert timeline.marks["post_init"] == first
+
+    with timeline.importing("core"):
+        pass
+    with timeline.importing("core"):
+        pass
+    timeline.record("model_load", 1.5)
+    report = timeline.report()
+    assert set(report["imports"]) == {"core"}
+    assert report["durations"] == {"model_load": 1.5}
+    assert "post_init" in timeline.summary_text()
+
+def test_engine_import_does_not_load_ml_stack():
+    code = ("import sys; import al_rased.features.detection.engine; "
+            "print(sorted(m for m in ('joblib', 'numpy', 'sklearn') if m in sys.modules))")
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_engine_warm_up_loads_and_predicts(monkeypatch):
+    model = MagicMock()
+    monkeypatch.setattr(DetectionEngine, "_model", None)
+    monkeypatch.setattr(DetectionEngine, "_db_keywords", {})
+    with patch("al_rased.features.detection.engine.joblib") as mock_joblib, \
+         patch("al_rased.features.detection.engine.os.path.exists", return_value=True), \
+         patch.object(DetectionEngine, "predict") as predict:
+        mock_joblib.load.return_value = model
+        steps = DetectionEngine.warm_up()
+    assert DetectionEngine._model is model
+    predict.assert_called_once_with(WARM_UP_TEXT)
+    assert set(steps) == {"model_load", "warm_up_inference"}
+
+@pytest.mark.asyncio
+async def test_pool_warm_up_marks_model_ready():
+    timeline = StartupTimeline()
+    with patch("al_rased.features.detection.inference_pool.startup", timeline), \
+         patch.object(DetectionEngine, "warm_up", return_value={"model_load": 0.5, "warm_up_inference": 0.1}):
+        await InferencePool(workers=0).warm_up()
+    assert "model_ready" in timeline.marks
+    assert timeline.durations == {"model_load": 0.5, "warm_up_inference": 0.1}
+
+@pytest.mark.asyncio
+async def test_pool_warm_up_failure_is_logged():
+    timeline = StartupTimeline()
+    with patch("al_rased.features.detection.inference_pool.startup", timeline), \
+         patch.object(DetectionEngine, "warm_up", side_effect=RuntimeError("boom")):
+        await InferencePool(workers=0).warm_up()
+    assert "model_ready" not in timeline.marks
@@ -0,0 +1,80 @@
+import json
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import pytest
+from al_rased.services.telethon_monitor import storage
+
+START = datetime(2026, 1, 5, 12, 0)
+
+@pytest.fixture
+def messages_dir(tmp_path):
+    with patch.object(storage, "MESSAGES_DIR", str(tmp_path)):
+        yield tmp_path
+
+def load(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def current(store, chat_id) -> list:
+    """Reservoir view of the group's current bucket: kept strata plus the
+    latest entry of every slot."""
+    messages = load(store._buckets[chat_id]["path"])
+    latest = {m["slot"]: m for m in messages if m.get("slot") is not None}
+    return [m for m in messages if m.get("slot") is None] + list(latest.values())
+
+def test_reservoir_is_bounded_and_keeps_flagged(messages_dir):
+    store = storage.MessageStorage(reservoir_size=50, rng=random.Random(1))
+    saved = [store.save_message(1, "group", {"message_id": i, "text": f"m{i}"}, now=START) for i in range(1000)]
+    assert sum(saved) < 1000 and all(saved[:50])
+    for i in range(20):
+        assert store.save_message(1, "group", {"message_id": 10_000 + i, "text": "ad"}, stratum="flagged", now=START)
+    store.save_message(1, "group", {"message_id": 20_000, "text": "?"}, stratum="gray", now=START)
+
+    kept = current(store, 1)
+    assert len([m for m in kept if "slot" in m]) == 50
+    assert sum(1 for m in kept if m.get("stratum") == "flagged") == 20
+    assert sum(1 for m in kept if m.get("stratum") == "gray") == 1
+    # Superseded entries never exceed twice the reservoir on disk
+    assert len(load(store._buckets[1]["path"])) <= 2 * 50 + 21
+    store.flush()
+    assert len(load(store._buckets[1]["path"])) == 71
+
+def test_reservoir_is_uniform(messages_dir):
+    rng = random.Random(7)
+    hits = Counter()
+    for run in range(200):
+        store = storage.MessageStorage(reservoir_size=10, rng=rng)
+        for i in range(100):
+            store.save_message(run, "g", {"message_id": i}, now=START)
+        hits.update(m["message_id"] // 25 for m in current(store, run))
+    # 10 of 100 kept per run: each quarter of the stream expects 500 of 2000
+    assert all(400 < hits[q] < 600 for q in range(4)), hits
+
+def test_time_buckets_rotate(messages_dir):
+    store = storage.MessageStorage(reservoir_size=5, bucket_days=7, buckets_kept=2)
+    for week in range(4):
+        for i in range(3):
+            store.save_message(-100123, "group", {"message_id": i}, now=START + timedelta(weeks=week))
+    files = sorted(os.listdir(messages_dir))
+    assert len(files) == 2 and all(f.startswith("-100123_group_") for f in files)
+    assert all(len(load(messages_dir / f)) == 3 for f in files)
+
+def test_restart_resumes_bucket(messages_dir):
+    store = storage.MessageStorage(reservoir_size=5, rng=random.Random(3))
+    for i in range(40):
+        store.save_message(1, "group", {"message_id": i}, now=START)
+    restarted = storage.MessageStorage(reservoir_size=5, rng=random.Random(3))
+    restarted.save_message(1, "group", {"message_id": 40}, now=START)
+    assert restarted._buckets[1]["seen"] >= 5
+    assert len({m["slot"] for m in current(restarted, 1)}) == 5
+
+def test_violation_source_is_stored(messages_dir):
+    store = storage.MessageStorage(reservoir_size=10, rng=random.Random(1))
+    store.save_message(1, "group", {"message_id": 1, "text": "ad"}, stratum="flagged", source="AI", now=START)
+    store.save_message(1, "group", {"message_id": 2, "text": "hi"}, source="NAME", now=START)
+    store.save_message(1, "group", {"message_id": 3, "text": "hey"}, now=START)
+    sources = {m["message_id"]: m.get("source") for m in current(store, 1)}
+    assert sources == {1: "AI", 2: "NAME", 3: None}
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from al_rased.core.ttl_cache import TTLCache
+
+def test_lru_bound_and_expiry():
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # "b" is now least recent
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats["evictions"] == 1
+
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+def test_patch_keeps_only_cached_keys():
+    cache = TTLCache(ttl=60, max_size=10)
+    cache.set("a", {1})
+    assert cache.patch("a", lambda v: v | {2})
+    assert cache.get("a") == {1, 2}
+    assert not cache.patch("missing", lambda v: v)
+    assert cache.get("missing") is None
+
+@pytest.mark.asyncio
+async def test_get_or_load_is_single_flight():
+    stats = {"hits": 0, "misses": 0}
+    cache = TTLCache(ttl=60, max_size=10, stats=stats)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value", None
+
+    results = await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(5)))
+    assert results == ["value"] * 5
+    assert await cache.get_or_load("k", load) == "value"
+    assert len(calls) == 1
+    assert stats == {"hits": 1, "misses": 5, "evictions": 0}
+
+@pytest.mark.asyncio
+async def test_waiters_survive_a_cancelled_load():
+    cache = TTLCache(ttl=60, max_size=10)
+    started = asyncio.Event()
+
+    async def slow_load():
+        started.set()
+        await asyncio.sleep(10)
+        return "never", None
+
+    async def load():
+        return "value", None
+
+    leader = asyncio.create_task(cache.get_or_load("k", slow_load))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_load("k", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await waiter == "value"  # Took over the load instead of being cancelled
+
+@pytest.mark.asyncio
+async def test_waiters_get_the_load_error():
+    cache = TTLCache(ttl=60, max_size=10)
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.get("k") is None
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from telegram import Update
+from al_rased.core.update_processor import ChatOrderedUpdateProcessor
+
+def _update(chat_id):
+    update = MagicMock(spec=Update)
+    update.effective_chat = MagicMock(id=chat_id)
+    return update
+
+async def _handler(log, chat_id, n, delay):
+    log.append(("start", chat_id, n))
+    await asyncio.sleep(delay)
+    log.append(("end", chat_id, n))
+
+@pytest.mark.asyncio
+async def test_ordered_within_chat_parallel_across_chats():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+    log = []
+    tasks = []
+    for n in range(3):
+        tasks.append(asyncio.create_task(processor.process_update(_update(-1), _handler(log, -1, n, 0.05))))
+    tasks.append(asyncio.create_task(processor.process_update(_update(-2), _handler(log, -2, 0, 0.0))))
+    await asyncio.gather(*tasks)
+
+    chat1 = [(kind, n) for kind, chat, n in log if chat == -1]
+    assert chat1 == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+    # The other chat is not stuck behind the slow one
+    assert log.index(("end", -2, 0)) < log.index(("end", -1, 0))
+    assert processor.stats == {"processed": 4, "queued": 2, "max_backlog": 2}
+    assert processor.active_chats() == 0
+
+@pytest.mark.asyncio
+async def test_queued_updates_do_not_hold_slots():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=2)
+    log = []
+    tasks = [
+        asyncio.create_task(processor.process_update(_update(-1), _handler(log, -1, n, 0.05)))
+        for n in range(5)
+    ]
+    await asyncio.sleep(0.01)
+    # A busy chat's backlog leaves a slot for another chat
+    await asyncio.wait_for(processor.process_update(_update(-2), _handler(log, -2, 0, 0)), timeout=0.03)
+    await asyncio.gather(*tasks)
+    assert processor.stats["processed"] == 6
+
+@pytest.mark.asyncio
+async def test_handler_error_does_not_break_chat():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=4)
+    log = []
+
+    async def boom():
+        raise RuntimeError("handler failed")
+
+    await asyncio.gather(
+        processor.process_update(_update(-1), boom()),
+        processor.process_update(_update(-1), _handler(log, -1, 1, 0)),
+    )
+    assert log == [("start", -1, 1), ("end", -1, 1)]
@@ -0,0 +1,40 @@
+import pytest
+from benchmarks.verdict_diff import Engine, compare_results, shrink
+
+def test_compare_groups_disagreements_shortest_first():
+    texts = ["long spam text here", "spam", "hello", "close"]
+    reference = [("سبام", 0.9), ("سبام", 0.8), ("طبيعي", 0.5), ("طبيعي", 0.5)]
+    candidate = [("طبيعي", 0.6), ("طبيعي", 0.7), ("طبيعي", 0.7), ("طبيعي", 0.5 + 1e-9)]
+    report = compare_results(texts, reference, candidate, tolerance=1e-6)
+    assert (report["label_diffs"], report["confidence_diffs"]) == (2, 1)
+    assert [t for t, _, _ in report["kinds"]["سبام -> طبيعي"]] == ["spam", "long spam text here"]
+    assert report["max_confidence_delta"] == pytest.approx(0.3)
+
+@pytest.mark.asyncio
+async def test_shrink_keeps_only_the_triggering_words():
+    async def still_differs(texts):
+        return ["فوركس" in t and "ارباح" in t for t in texts]
+    text = "مرحبا بالجميع فوركس مع ارباح يومية لكل الاعضاء"
+    assert await shrink(text, still_differs) == "فوركس ارباح"
+
+@pytest.mark.asyncio
+async def test_engines_run_callables_from_their_own_trees(tmp_path):
+    trees = {}
+    for name, word in (("ref", "بيع"), ("cand", "للبيع")):
+        tree = tmp_path / name
+        tree.mkdir()
+        (tree / "rules_engine.py").write_text(
+            f"def predict(text):\n"
+            f"    return {{'label': 'سبام' if {word!r} in text else 'طبيعي', 'confidence': 0.9}}\n",
+            encoding="utf-8",
+        )
+        trees[name] = Engine(name, str(tree), "rules_engine:predict", None, workers=1)
+    texts = ["حساب للبيع", "بيع وشراء", "السلام عليكم"]
+    try:
+        reference = await trees["ref"].predict(texts)
+        candidate = await trees["cand"].predict(texts)
+    finally:
+        for engine in trees.values():
+            engine.close()
+    report = compare_results(texts, reference, candidate, 1e-6)
+    assert [t for t, _, _ in report["kinds"]["سبام -> طبيعي"]] == ["بيع وشراء"]
@@ -0,0 +1,59 @@
+import queue as queue_module
+import pytest
+from al_rased.core.webhook import (
+    WebhookServer, ShardPool, replay_updates, update_chat_id, shard_for, shard_owner
+)
+
+def _message(update_id, chat_id, text="hi"):
+    return {
+        "update_id": update_id,
+        "message": {"message_id": update_id, "date": 0, "text": text,
+                    "chat": {"id": chat_id, "type": "supergroup"}},
+    }
+
+def test_update_chat_id():
+    assert update_chat_id(_message(1, -1001)) == -1001
+    callback = {"update_id": 2, "callback_query": {
+        "id": "1", "from": {"id": 7}, "message": {"chat": {"id": -5}}}}
+    assert update_chat_id(callback) == -5
+    assert update_chat_id({"update_id": 3, "inline_query": {"from": {"id": 9}}}) == 9
+    assert update_chat_id({"update_id": 4, "poll": {}}) is None
+
+def test_shard_assignment_is_stable():
+    owns = shard_owner(1, 4)
+    assert shard_for(-1001, 4) == shard_for(-1001, 4)
+    assert owns(-1001) == (shard_for(-1001, 4) == 1)
+    assert shard_for(None, 4) == 0
+
+def test_pool_keeps_per_chat_order():
+    pool = ShardPool(shards=3)  # Not started: inspect the queues directly
+    chats = [-1001, -1002, -1003, -1004]
+    for i in range(20):
+        pool.dispatch(_message(i, chats[i % 4]))
+    received = {}
+    for shard, queue in enumerate(pool._queues):
+        while True:
+            try:
+                data = queue.get(timeout=0.5)
+            except queue_module.Empty:
+                break
+            chat_id = data["message"]["chat"]["id"]
+            assert shard_for(chat_id, 3) == shard
+            received.setdefault(chat_id, []).append(data["update_id"])
+    assert received == {chat: list(range(i, 20, 4)) for i, chat in enumerate(chats)}
+
+@pytest.mark.asyncio
+async def test_replay_through_stand_in_server():
+    received = []
+    server = WebhookServer(received.append, listen="127.0.0.1", port=0, path="/hook", secret="s3cret")
+    await server.start()
+    try:
+        url = f"http://127.0.0.1:{server.port}/hook"
+        updates = [_message(i, -100 - i % 2) for i in range(10)]
+        assert await replay_updates(url, updates, secret="s3cret") == 10
+        assert await replay_updates(url, updates[:2], secret="wrong") == 0
+        assert await replay_updates(url + "x", updates[:1], secret="s3cret") == 0
+    finally:
+        await server.stop()
+    assert [u["update_id"] for u in received] == list(range(10))
+    assert server.stats == {"accepted": 10, "rejected": 3}